@@ -1,4 +1,5 @@
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from src.main_window import MainWindow
 
@@ -12,4 +13,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # worker processes in frozen (PyInstaller) builds
     main()
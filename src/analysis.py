@@ -0,0 +1,373 @@
+from dataclasses import dataclass
+import numpy as np
+from PIL import Image
+from .document import Document
+from .grid import GridManager
+from .labeling import label, component_boxes
+
+ALPHA_THRESHOLD = 8  # alpha at or below this is treated as empty
+
+Sheet = Image.Image | Document   # what the analyses read; a Document is read without copying
+
+
+def _sheet_pixels(sheet: Sheet, box: tuple[int, int, int, int] | None = None) -> np.ndarray:
+    """(h, w, 4) uint8 RGBA of box (x0, y0, x1, y1), or of the whole sheet for None.
+    A Document yields a view of its buffer; a PIL image is cropped and converted."""
+    if isinstance(sheet, Document):
+        return sheet.pixels if box is None else sheet.view(box)
+    image = sheet if box is None else sheet.crop(box)
+    return np.asarray(image if image.mode == "RGBA" else image.convert("RGBA"))
+
+
+def _sheet_alpha(sheet: Sheet, box: tuple[int, int, int, int] | None = None) -> np.ndarray:
+    """Alpha channel of box (or the whole sheet) as a 2-D uint8 array; see _sheet_pixels."""
+    if isinstance(sheet, Document):
+        return _sheet_pixels(sheet, box)[..., 3]
+    image = sheet if box is None else sheet.crop(box)
+    return np.asarray(image.getchannel("A"))
+
+
+@dataclass
+class OverflowRegion:
+    cell: tuple[int, int]               # (col, row)
+    sides: tuple[str, ...]              # touched inner borders: "left" / "right" / "top" / "bottom"
+    box: tuple[int, int, int, int]      # (x0, y0, x1, y1) in image coordinates
+    pixels: int
+
+
+def _box_intersects(a: tuple[int, int, int, int], b: tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def find_cell_overflow(alpha: np.ndarray, grid: GridManager, image_w: int, image_h: int,
+                       col: int, row: int, threshold: int = ALPHA_THRESHOLD) -> list[OverflowRegion]:
+    """Find connected alpha components of one cell that touch a border shared with another cell.
+
+    alpha is the cell's own alpha channel (h, w). Borders on the image edge are ignored.
+    """
+    cfg = grid.config
+    x, y, w, h = grid.cell_rect(image_w, image_h, col, row)
+    mask = alpha > threshold
+    inner = {
+        "left": col > 0 and mask[:, 0].any(),
+        "right": col < cfg.cols - 1 and mask[:, -1].any(),
+        "top": row > 0 and mask[0, :].any(),
+        "bottom": row < cfg.rows - 1 and mask[-1, :].any(),
+    }
+    if not any(inner.values()):
+        return []
+
+    labels, n = label(mask)
+    boxes, areas = component_boxes(labels, n)
+    regions = []
+    for i in range(n):
+        x0, y0, x1, y1 = (int(v) for v in boxes[i])
+        sides = tuple(side for side, hit in (
+            ("left", inner["left"] and x0 == 0),
+            ("right", inner["right"] and x1 == w),
+            ("top", inner["top"] and y0 == 0),
+            ("bottom", inner["bottom"] and y1 == h),
+        ) if hit)
+        if not sides:
+            continue
+        # bbox touching an edge does not guarantee the component itself does
+        comp = labels[y0:y1, x0:x1] == i + 1
+        sides = tuple(s for s in sides if (
+            (s == "left" and comp[:, 0].any()) or
+            (s == "right" and comp[:, -1].any()) or
+            (s == "top" and comp[0, :].any()) or
+            (s == "bottom" and comp[-1, :].any())
+        ))
+        if sides:
+            regions.append(OverflowRegion(
+                cell=(col, row), sides=sides,
+                box=(x + x0, y + y0, x + x1, y + y1), pixels=int(areas[i]),
+            ))
+    return regions
+
+
+class _CellCache:
+    """Per-cell results kept until an edit touches the cell or the grid layout changes."""
+
+    def __init__(self, grid: GridManager):
+        self.grid = grid
+        self._stale: set[tuple[int, int]] | None = None   # None = everything stale
+        self._layout: tuple[int, int, int, int] | None = None
+
+    def invalidate(self, box: tuple[int, int, int, int] | None = None):
+        """Mark cells intersecting box (x0, y0, x1, y1) for re-analysis. None marks all cells."""
+        if box is None or self._layout is None or self._stale is None:
+            self._stale = None
+            return
+        iw, ih, cols, rows = self._layout
+        for r in range(rows):
+            for c in range(cols):
+                x, y, w, h = self.grid.cell_rect(iw, ih, c, r)
+                if _box_intersects(box, (x, y, x + w, y + h)):
+                    self._stale.add((c, r))
+
+    def _take_stale(self, image: Sheet) -> tuple[set[tuple[int, int]], bool]:
+        """Cells to recompute and whether that is all of them (cached results dropped)."""
+        iw, ih = image.size
+        cfg = self.grid.config
+        layout = (iw, ih, cfg.cols, cfg.rows)
+        if layout != self._layout:
+            self._layout = layout
+            self._stale = None
+        full = self._stale is None
+        stale = {(c, r) for r in range(cfg.rows) for c in range(cfg.cols)} if full else self._stale
+        self._stale = set()
+        return stale, full
+
+
+class OverflowDetector(_CellCache):
+    """Per-cell overflow (bleed) analysis, recomputed only for cells invalidated by edits."""
+
+    def __init__(self, grid: GridManager, threshold: int = ALPHA_THRESHOLD):
+        super().__init__(grid)
+        self.threshold = threshold
+        self._cells: dict[tuple[int, int], list[OverflowRegion]] = {}
+
+    def results(self, image: Sheet) -> list[OverflowRegion]:
+        """Bring stale cells up to date and return all overflow regions."""
+        iw, ih = image.size
+        stale, full = self._take_stale(image)
+        if full:
+            self._cells.clear()
+            alpha = _sheet_alpha(image)
+        else:
+            alpha = None
+        for col, row in stale:
+            x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+            if alpha is not None:
+                cell_alpha = alpha[y:y + h, x:x + w]
+            else:
+                cell_alpha = _sheet_alpha(image, (x, y, x + w, y + h))
+            self._cells[(col, row)] = find_cell_overflow(
+                cell_alpha, self.grid, iw, ih, col, row, self.threshold)
+        return [reg for key in sorted(self._cells, key=lambda c: (c[1], c[0]))
+                for reg in self._cells[key]]
+
+    def affected_cells(self, image: Sheet) -> list[tuple[int, int]]:
+        """Cells (col, row) with at least one overflow region, top-to-bottom, left-to-right."""
+        return sorted({reg.cell for reg in self.results(image)}, key=lambda c: (c[1], c[0]))
+
+
+# ----------------------------------------------------------------------
+# Duplicate frames (perceptual hash)
+# ----------------------------------------------------------------------
+DUPLICATE_DISTANCE = 4   # max differing dHash bits (of 64) for a near-duplicate
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def cell_hash(rgba: np.ndarray, threshold: int = ALPHA_THRESHOLD) -> int | None:
+    """64-bit dHash of an (h, w, 4) uint8 cell, or None for an empty cell.
+
+    Luma is premultiplied by alpha so the silhouette counts and hidden RGB
+    under transparent pixels does not; the cell is box-downscaled to 9x8 and
+    each bit records whether brightness rises to the right.
+    """
+    alpha = rgba[..., 3]
+    if not (alpha > threshold).any():
+        return None
+    luma = (rgba[..., 0] * np.float32(0.299) + rgba[..., 1] * np.float32(0.587)
+            + rgba[..., 2] * np.float32(0.114) + np.float32(1.0)) * (alpha / np.float32(255.0))
+    small = np.asarray(Image.fromarray(luma.astype(np.float32), "F").resize((9, 8), Image.BOX))
+    bits = np.packbits(small[:, 1:] > small[:, :-1])
+    return int.from_bytes(bits.tobytes(), "big")
+
+
+def hamming_matrix(hashes: list[int]) -> np.ndarray:
+    """(n, n) matrix of differing bits between 64-bit hashes."""
+    h = np.array(hashes, dtype=np.uint64)
+    x = (h[:, None] ^ h[None, :]).astype(">u8")
+    return _POPCOUNT[x.view(np.uint8).reshape(len(h), len(h), 8)].sum(axis=2, dtype=np.int32)
+
+
+def cluster_hashes(hashes: list[int], max_distance: int = DUPLICATE_DISTANCE) -> list[list[int]]:
+    """Groups (as index lists, ascending) of hashes linked within max_distance bits.
+
+    Near-duplicate is treated as transitive: a~b and b~c puts a, b, c together.
+    Singletons are omitted.
+    """
+    n = len(hashes)
+    if n < 2:
+        return []
+    close = np.triu(hamming_matrix(hashes) <= max_distance, k=1)
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for a, b in zip(*np.nonzero(close)):
+        ra, rb = find(int(a)), find(int(b))
+        if ra != rb:
+            parent[max(ra, rb)] = min(ra, rb)
+    groups: dict[int, list[int]] = {}
+    for i in range(n):
+        groups.setdefault(find(i), []).append(i)
+    return [g for g in groups.values() if len(g) > 1]
+
+
+def find_duplicate_cells(image: Sheet, grid: GridManager,
+                         max_distance: int = DUPLICATE_DISTANCE) -> list[list[tuple[int, int]]]:
+    """One-shot duplicate clustering of a sheet's cells (see DuplicateDetector)."""
+    return DuplicateDetector(grid, max_distance).clusters(image)
+
+
+class DuplicateDetector(_CellCache):
+    """Per-cell perceptual hashes, re-hashed only for cells invalidated by edits."""
+
+    def __init__(self, grid: GridManager, max_distance: int = DUPLICATE_DISTANCE):
+        super().__init__(grid)
+        self.max_distance = max_distance
+        self._hashes: dict[tuple[int, int], int | None] = {}
+
+    def hashes(self, image: Sheet) -> dict[tuple[int, int], int | None]:
+        """Bring stale cells up to date and return {(col, row): hash or None if empty}."""
+        iw, ih = image.size
+        stale, full = self._take_stale(image)
+        if full:
+            self._hashes.clear()
+            rgba = _sheet_pixels(image)
+        else:
+            rgba = None
+        for col, row in stale:
+            x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+            cell = rgba[y:y + h, x:x + w] if rgba is not None else \
+                _sheet_pixels(image, (x, y, x + w, y + h))
+            self._hashes[(col, row)] = cell_hash(cell)
+        return self._hashes
+
+    def clusters(self, image: Sheet) -> list[list[tuple[int, int]]]:
+        """Near-duplicate groups of cells (col, row), each in row-major order."""
+        hashes = self.hashes(image)
+        cells = sorted((c for c, h in hashes.items() if h is not None), key=lambda c: (c[1], c[0]))
+        groups = cluster_hashes([hashes[c] for c in cells], self.max_distance)
+        return [[cells[i] for i in g] for g in groups]
+
+    def redundant_cells(self, image: Sheet) -> set[tuple[int, int]]:
+        """Every duplicate except the first (row-major) of its group."""
+        return {c for group in self.clusters(image) for c in group[1:]}
+
+
+# ----------------------------------------------------------------------
+# Per-cell content bounding boxes
+# ----------------------------------------------------------------------
+@dataclass(frozen=True)
+class CellContent:
+    box: tuple[int, int, int, int] | None   # (x0, y0, x1, y1) in image coordinates, None if empty
+    pixels: int                              # pixels with alpha above the threshold
+
+
+def _cell_content(alpha: np.ndarray, x: int, y: int, threshold: int) -> tuple[tuple[int, int, int, int], int]:
+    """(box in image coordinates, pixel count) of one cell's alpha; box is (0, 0, 0, 0) when empty."""
+    mask = alpha > threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    if not len(rows):
+        return (0, 0, 0, 0), 0
+    cols = np.flatnonzero(mask.any(axis=0))
+    box = (x + int(cols[0]), y + int(rows[0]), x + int(cols[-1]) + 1, y + int(rows[-1]) + 1)
+    return box, int(np.count_nonzero(mask))
+
+
+def content_boxes(alpha: np.ndarray, grid: GridManager,
+                  threshold: int = ALPHA_THRESHOLD) -> tuple[np.ndarray, np.ndarray]:
+    """Content bbox and pixel count of every cell in one vectorized pass.
+
+    Returns boxes (rows, cols, 4) as image-space (x0, y0, x1, y1), all zero for
+    empty cells, and counts (rows, cols).
+    """
+    ih, iw = alpha.shape
+    cfg = grid.config
+    boxes = np.zeros((cfg.rows, cfg.cols, 4), dtype=np.int32)
+    counts = np.zeros((cfg.rows, cfg.cols), dtype=np.int64)
+    if iw < cfg.cols or ih < cfg.rows:
+        # degenerate grid (empty cells): fall back to per-cell
+        for r in range(cfg.rows):
+            for c in range(cfg.cols):
+                x, y, w, h = grid.cell_rect(iw, ih, c, r)
+                boxes[r, c], counts[r, c] = _cell_content(alpha[y:y + h, x:x + w], x, y, threshold)
+        return boxes, counts
+    xs = [grid.cell_rect(iw, ih, c, 0)[0] for c in range(cfg.cols)] + [iw]
+    ys = [grid.cell_rect(iw, ih, 0, r)[1] for r in range(cfg.rows)] + [ih]
+    mask = alpha > threshold
+    # rows_hit[y, c]: image row y has content inside column band c; cols_hit[r, x] likewise.
+    # (reduceat along axis 0 is strided and slow, so row bands reduce one at a time.)
+    rows_hit = np.logical_or.reduceat(mask, xs[:-1], axis=1)
+    cols_hit = np.stack([mask[ys[r]:ys[r + 1]].any(axis=0) for r in range(cfg.rows)])
+    for r in range(cfg.rows):
+        for c in range(cfg.cols):
+            counts[r, c] = np.count_nonzero(mask[ys[r]:ys[r + 1], xs[c]:xs[c + 1]])
+    for r in range(cfg.rows):
+        band = rows_hit[ys[r]:ys[r + 1]]
+        boxes[r, :, 1] = ys[r] + band.argmax(axis=0)
+        boxes[r, :, 3] = ys[r + 1] - band[::-1].argmax(axis=0)
+    for c in range(cfg.cols):
+        band = cols_hit[:, xs[c]:xs[c + 1]]
+        boxes[:, c, 0] = xs[c] + band.argmax(axis=1)
+        boxes[:, c, 2] = xs[c + 1] - band[:, ::-1].argmax(axis=1)
+    boxes[counts == 0] = 0
+    return boxes, counts
+
+
+class ContentIndex(_CellCache):
+    """Per-cell content bbox and pixel count: computed for the whole sheet in one
+    pass, then only for cells an edit touched. Lookups are O(1) once current."""
+
+    def __init__(self, grid: GridManager, threshold: int = ALPHA_THRESHOLD):
+        super().__init__(grid)
+        self.threshold = threshold
+        self._boxes = np.zeros((0, 0, 4), dtype=np.int32)
+        self._counts = np.zeros((0, 0), dtype=np.int64)
+
+    def update(self, image: Sheet):
+        """Bring stale cells up to date."""
+        stale, full = self._take_stale(image)
+        if not stale:
+            return
+        if full:
+            self._boxes, self._counts = content_boxes(
+                _sheet_alpha(image), self.grid, self.threshold)
+            return
+        iw, ih = image.size
+        for col, row in stale:
+            x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+            alpha = _sheet_alpha(image, (x, y, x + w, y + h))
+            self._boxes[row, col], self._counts[row, col] = _cell_content(alpha, x, y, self.threshold)
+
+    def state(self) -> tuple[tuple[int, int, int, int], np.ndarray, np.ndarray] | None:
+        """(layout, boxes, counts) if fully up to date, for storing alongside the sheet."""
+        if self._layout is None or self._stale != set():
+            return None
+        return self._layout, self._boxes, self._counts
+
+    def restore(self, layout: tuple[int, int, int, int], boxes: np.ndarray, counts: np.ndarray):
+        """Adopt a stored state(); ignored later if the sheet or grid does not match layout."""
+        self._layout = tuple(layout)
+        self._boxes, self._counts = boxes, counts
+        self._stale = set()
+
+    def boxes(self, image: Sheet) -> tuple[np.ndarray, np.ndarray]:
+        """(boxes (rows, cols, 4), counts (rows, cols)); see content_boxes."""
+        self.update(image)
+        return self._boxes, self._counts
+
+    def cell(self, image: Sheet, col: int, row: int) -> CellContent:
+        self.update(image)
+        n = int(self._counts[row, col])
+        return CellContent(tuple(int(v) for v in self._boxes[row, col]) if n else None, n)
+
+    def center_offset(self, image: Sheet, col: int, row: int) -> tuple[float, float] | None:
+        """Content bbox centre minus cell centre in pixels (+x right, +y down); None if empty."""
+        content = self.cell(image, col, row)
+        if content.box is None:
+            return None
+        iw, ih = image.size
+        x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+        x0, y0, x1, y1 = content.box
+        return (x0 + x1 - 2 * x - w) / 2, (y0 + y1 - 2 * y - h) / 2
@@ -0,0 +1,301 @@
+"""Command-line batch processing of sprite sheets (no GUI).
+
+    python -m src.batch remove-bg sheet1.png sheet2.png --out cleaned --cols 3 --rows 3
+    python -m src.batch watch incoming/ --cols 4 --rows 4
+    python -m src.batch macro fix.json sheets/*.png --out fixed --set factor=0.9
+    python -m src.batch relayout sheet.png --cols 3 --rows 3 --to-cols 0 --to-rows 1
+    python -m src.batch metadata sheets/ --cols 4 --rows 2 --format godot --pivot content --fps 12
+"""
+from __future__ import annotations
+import argparse
+import os
+import sys
+import time
+from PIL import Image
+from .grid import GridManager, GridConfig
+from .cleanup import remove_background, defringe, sample_background
+from .analysis import DuplicateDetector, cluster_hashes, DUPLICATE_DISTANCE
+from .thumbnails import ThumbnailCache
+from .watch import POLL_INTERVAL, FolderWatcher, prepare_sheet, scan_folder
+from .macro import Macro, MacroJob, parse_overrides
+from .export import PALETTE_MODES
+from .cell_ops import relayout_pixels
+from .document import Document
+from .metadata import METADATA_FORMATS, PIVOT_MODES, sheet_metadata
+from .project import PROJECT_EXT
+
+
+def _parse_color(text: str) -> tuple[int, int, int]:
+    text = text.lstrip("#")
+    if len(text) != 6:
+        raise argparse.ArgumentTypeError(f"color must be RRGGBB: {text}")
+    return int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16)
+
+
+def _output_path(src: str, out_dir: str | None, suffix: str) -> str:
+    stem, ext = os.path.splitext(os.path.basename(src))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+        return os.path.join(out_dir, stem + ext)
+    return os.path.join(os.path.dirname(src), f"{stem}{suffix}{ext}")
+
+
+def _each_file(paths: list[str], process) -> int:
+    """Run process(path) -> message for every file; a file that cannot be read or
+    written is reported and skipped. Returns the exit code (1 if any failed)."""
+    failed = 0
+    for path in paths:
+        try:
+            message = process(path)
+        except (OSError, ValueError) as e:   # includes PIL.UnidentifiedImageError
+            failed += 1
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        print(f"{path} -> {message}")
+    return 1 if failed else 0
+
+
+def _cmd_remove_bg(args) -> int:
+    grid = GridManager(GridConfig(cols=args.cols, rows=args.rows))
+
+    def process(path: str) -> str:
+        image = Image.open(path).convert("RGBA")
+        color = args.color or sample_background(image)
+        result = remove_background(image, grid, color, args.tolerance,
+                                   not args.everywhere, args.feather)
+        out = _output_path(path, args.out, "_nobg")
+        result.save(out)
+        return out
+
+    return _each_file(args.inputs, process)
+
+
+def _cmd_defringe(args) -> int:
+    grid = GridManager(GridConfig(cols=args.cols, rows=args.rows))
+
+    def process(path: str) -> str:
+        image = Image.open(path).convert("RGBA")
+        bg = None if args.no_unmix else (args.color or sample_background(image))
+        result = defringe(image, grid, args.threshold, bg, args.grow)
+        out = _output_path(path, args.out, "_clean")
+        result.save(out)
+        return out
+
+    return _each_file(args.inputs, process)
+
+
+def _cmd_dupes(args) -> int:
+    """List near-duplicate cells within and across all input sheets."""
+    grid = GridManager(GridConfig(cols=args.cols, rows=args.rows))
+    keys, hashes = [], []
+    for path in args.inputs:
+        cells = DuplicateDetector(grid).hashes(Image.open(path))
+        for (col, row), h in sorted(cells.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+            if h is not None:
+                keys.append(f"{path} (行{row}, 列{col})")
+                hashes.append(h)
+    groups = cluster_hashes(hashes, args.distance)
+    for n, group in enumerate(groups, 1):
+        print(f"グループ {n}:")
+        for i in group:
+            print(f"  {keys[i]}")
+    if not groups:
+        print("重複なし")
+    return 0
+
+
+def _report_sheet(path: str, grid_config: GridConfig, cache: ThumbnailCache):
+    try:
+        sheet = prepare_sheet(path, grid_config, cache)
+    except (OSError, ValueError) as e:
+        print(f"{path}: 読み込み不可 ({e})")
+        return
+    document = sheet.document
+    overflow = sheet.overflow.affected_cells(document)
+    dupes = sheet.duplicates.redundant_cells(document)
+    _, counts = sheet.content.boxes(document)
+    empty = int((counts == 0).sum())
+    w, h = document.size
+    print(f"{path}: {w}x{h}  はみ出し {len(overflow)} コマ  重複 {len(dupes)} コマ  空 {empty} コマ")
+
+
+def _cmd_watch(args) -> int:
+    """Pre-analyse (and thumbnail) sheets as they appear in a folder until interrupted."""
+    config = GridConfig(cols=args.cols, rows=args.rows)
+    cache = ThumbnailCache()
+    watcher = FolderWatcher(args.folder, include_existing=args.existing)
+    try:
+        while True:
+            for path in watcher.poll():
+                _report_sheet(path, config, cache)
+                sys.stdout.flush()
+            if args.once and not watcher.pending:
+                return 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return 0
+
+
+def _cmd_macro(args) -> int:
+    """Replay a recorded macro on every input sheet in the worker-process pool."""
+    try:
+        macro = Macro.load(args.macro)
+        overrides = parse_overrides(args.set)
+    except (OSError, ValueError) as e:
+        print(f"{args.macro}: {e}", file=sys.stderr)
+        return 2
+    outs = [_output_path(path, args.out, "_macro") for path in args.inputs]
+    job = MacroJob(macro, args.inputs, outs, overrides, args.palette)
+    job.start()
+    finished = failed = 0
+    while job.done < job.total:
+        time.sleep(0.05)
+        for path, out, error in job.poll():
+            finished += 1
+            if error is None:
+                print(f"[{finished}/{job.total}] {path} -> {out}")
+            else:
+                failed += 1
+                print(f"[{finished}/{job.total}] {path}: {error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def _cmd_relayout(args) -> int:
+    """Rebuild each sheet with another grid layout (0 = as many as needed)."""
+    grid = GridManager(GridConfig(cols=args.cols, rows=args.rows))
+
+    def process(path: str) -> str:
+        pixels, (cols, rows) = relayout_pixels(
+            Document.open(path).pixels, grid, args.to_cols, args.to_rows,
+            args.padding, args.trim, args.skip_empty)
+        out = _output_path(path, args.out, f"_{cols}x{rows}")
+        Image.fromarray(pixels, "RGBA").save(out)
+        return f"{out} ({cols}x{rows})"
+
+    return _each_file(args.inputs, process)
+
+
+def _expand_inputs(inputs: list[str]) -> list[str]:
+    """Folders expand to the sheets and projects directly inside them."""
+    paths = []
+    for path in inputs:
+        if os.path.isdir(path):
+            found = set(scan_folder(path))
+            found.update(e.path for e in os.scandir(path)
+                         if e.name.lower().endswith(PROJECT_EXT) and e.is_file())
+            paths.extend(sorted(found))
+        else:
+            paths.append(path)
+    return paths
+
+
+def _cmd_metadata(args) -> int:
+    """Write engine frame metadata JSON for each sheet (or .gsproj) and folder of them."""
+    config = GridConfig(cols=args.cols, rows=args.rows)
+    frame_range = None
+    if args.first is not None or args.last is not None:
+        first = max(1, args.first or 1)
+        last = args.last if args.last is not None else config.cols * config.rows
+        frame_range = (first - 1, max(first, last) - 1)
+    failed = 0
+    for path in _expand_inputs(args.inputs):
+        try:
+            out = sheet_metadata(path, config, args.format, args.out, args.pivot, args.fps,
+                                 frame_range)
+        except (OSError, ValueError) as e:
+            failed += 1
+            print(f"{path}: {e}", file=sys.stderr)
+            continue
+        print(f"{path} -> {out}")
+    return 1 if failed else 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m src.batch",
+                                     description="Grid Sprite Editor batch processing")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    def add_grid_args(p):
+        p.add_argument("inputs", nargs="+", help="input PNG files")
+        p.add_argument("--out", help="output folder (default: next to input with a suffix)")
+        p.add_argument("--cols", type=int, default=3)
+        p.add_argument("--rows", type=int, default=3)
+
+    p = sub.add_parser("remove-bg", help="key out a flat background colour")
+    add_grid_args(p)
+    p.add_argument("--color", type=_parse_color,
+                   help="RRGGBB to remove (default: most common corner colour)")
+    p.add_argument("--tolerance", type=int, default=24)
+    p.add_argument("--feather", type=int, default=8)
+    p.add_argument("--everywhere", action="store_true",
+                   help="also key enclosed areas, not only regions touching cell borders")
+    p.set_defaults(func=_cmd_remove_bg)
+
+    p = sub.add_parser("defringe", help="edge / halo cleanup")
+    add_grid_args(p)
+    p.add_argument("--threshold", type=int, default=16, help="alpha below this becomes 0")
+    p.add_argument("--color", type=_parse_color,
+                   help="RRGGBB background to un-mix from edges (default: corner colour)")
+    p.add_argument("--no-unmix", action="store_true", help="skip colour decontamination")
+    p.add_argument("--grow", type=int, default=0, help="negative erodes, positive dilates alpha (px)")
+    p.set_defaults(func=_cmd_defringe)
+
+    p = sub.add_parser("dupes", help="report near-duplicate frames across sheets")
+    p.add_argument("inputs", nargs="+", help="input PNG files")
+    p.add_argument("--cols", type=int, default=3)
+    p.add_argument("--rows", type=int, default=3)
+    p.add_argument("--distance", type=int, default=DUPLICATE_DISTANCE,
+                   help="max differing hash bits (of 64) to count as a duplicate")
+    p.set_defaults(func=_cmd_dupes)
+
+    p = sub.add_parser("watch", help="pre-analyse sheets as they are written into a folder")
+    p.add_argument("folder")
+    p.add_argument("--cols", type=int, default=3)
+    p.add_argument("--rows", type=int, default=3)
+    p.add_argument("--interval", type=float, default=POLL_INTERVAL, help="seconds between scans")
+    p.add_argument("--existing", action="store_true", help="also process sheets already present")
+    p.add_argument("--once", action="store_true", help="exit once nothing is left to process")
+    p.set_defaults(func=_cmd_watch)
+
+    p = sub.add_parser("macro", help="replay a recorded macro on many sheets")
+    p.add_argument("macro", help="macro JSON saved from the editor")
+    p.add_argument("inputs", nargs="+", help="input PNG files")
+    p.add_argument("--out", help="output folder (default: next to input with a suffix)")
+    p.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                   help="override a macro parameter (repeatable)")
+    p.add_argument("--palette", choices=PALETTE_MODES, default="off",
+                   help="PNG output format (see the editor's PNG save options)")
+    p.set_defaults(func=_cmd_macro)
+
+    p = sub.add_parser("relayout", help="convert sheets to another grid or a strip")
+    add_grid_args(p)
+    p.add_argument("--to-cols", type=int, default=0, help="target columns (0 = as many as needed)")
+    p.add_argument("--to-rows", type=int, default=1, help="target rows (0 = as many as needed)")
+    p.add_argument("--padding", type=int, default=0, help="transparent px around every frame")
+    p.add_argument("--trim", action="store_true",
+                   help="crop frames to the union of all cells' content")
+    p.add_argument("--skip-empty", action="store_true", help="drop empty frames")
+    p.set_defaults(func=_cmd_relayout)
+
+    p = sub.add_parser("metadata", help="write engine frame metadata JSON next to sheets")
+    p.add_argument("inputs", nargs="+", help="input PNG / .gsproj files or folders of them")
+    p.add_argument("--out", help="output folder (default: next to each sheet)")
+    p.add_argument("--cols", type=int, default=3, help="grid for PNGs (projects use their own)")
+    p.add_argument("--rows", type=int, default=3)
+    p.add_argument("--format", choices=METADATA_FORMATS, default="aseprite")
+    p.add_argument("--pivot", choices=PIVOT_MODES, default="center",
+                   help="content = bottom centre of each frame's content")
+    p.add_argument("--fps", type=float, default=8)
+    p.add_argument("--first", type=int, help="first frame (1-based, row-major)")
+    p.add_argument("--last", type=int, help="last frame (inclusive)")
+    p.set_defaults(func=_cmd_metadata)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,32 @@
 from __future__ import annotations
+import copy
 import io
 from PyQt6.QtWidgets import QWidget
 from PyQt6.QtCore import Qt, QPointF, QRectF, pyqtSignal
 from PyQt6.QtGui import (
-    QPainter, QPixmap, QImage, QColor, QPen, QPolygonF,
+    QPainter, QPainterPath, QPixmap, QImage, QColor, QPen, QPolygonF, QBrush,
     QMouseEvent, QWheelEvent, QKeyEvent
 )
-from PIL import Image, ImageChops
+import numpy as np
+from PIL import Image
 from .grid import GridManager, GridConfig
 from .history import HistoryManager
+from .analysis import OverflowDetector, DuplicateDetector, ContentIndex
+from .resample import get_thread_executor
+from .cell_ops import (
+    permute_pixels, swap_pixels, shift_cell_pixels, scale_cell_contents, cell_count,
+    relayout_pixels
+)
+from .document import Document
+from .journal import Journal
+from .project import PROJECT_EXT
+from .macro import MacroRecorder, apply_macro
+from . import cleanup
+from .tools.base import combine_mode
+from .selection import (
+    FloatingSelection, SelectionMask, combine
+)
+from .color_select import magic_wand
 
 
 def pil_to_qimage(img: Image.Image) -> QImage:
@@ -17,10 +35,47 @@ def pil_to_qimage(img: Image.Image) -> QImage:
     return QImage(data, img_rgba.width, img_rgba.height, QImage.Format.Format_RGBA8888)
 
 
+def pixels_to_qimage(pixels: np.ndarray) -> QImage:
+    """QImage over a C-contiguous (h, w, 4) RGBA array (shares the buffer; keep it alive)."""
+    h, w = pixels.shape[:2]
+    return QImage(pixels.data, w, h, w * 4, QImage.Format.Format_RGBA8888)
+
+
+def box_intersects(a: tuple[int, int, int, int], b: tuple[int, int, int, int]) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+def clip_box(box: tuple[int, int, int, int], width: int, height: int) -> tuple[int, int, int, int] | None:
+    x0, y0, x1, y1 = max(0, box[0]), max(0, box[1]), min(width, box[2]), min(height, box[3])
+    return (x0, y0, x1, y1) if x0 < x1 and y0 < y1 else None
+
+
+def union_box(a: tuple[int, int, int, int] | None,
+              b: tuple[int, int, int, int] | None) -> tuple[int, int, int, int] | None:
+    """Union of two (x0, y0, x1, y1) boxes; None is treated as empty."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+
+SELECTION_TOOLS = ("rect", "lasso", "wand")
+
+_NUDGE_KEYS = {
+    Qt.Key.Key_Left: (-1, 0),
+    Qt.Key.Key_Right: (1, 0),
+    Qt.Key.Key_Up: (0, -1),
+    Qt.Key.Key_Down: (0, 1),
+}
+
+
 class SpriteCanvas(QWidget):
     image_changed = pyqtSignal()
     file_dropped = pyqtSignal(str)
     viewport_changed = pyqtSignal()  # emits on zoom or pan
+    hover_cell_changed = pyqtSignal(object)  # (col, row) under the cursor, or None
+    layout_changed = pyqtSignal()  # grid cols / rows changed by an edit, undo or redo
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -28,11 +83,25 @@ class SpriteCanvas(QWidget):
         self.setMouseTracking(True)
         self.setAcceptDrops(True)
 
-        self.image: Image.Image | None = None
-        self._pixmap: QPixmap | None = None
+        self.document: Document | None = None
+        self.filepath: str | None = None
+        self._pixmap: QPixmap | None = None   # display copy; may be evicted (see release_caches)
 
         self.grid = GridManager()
         self.history = HistoryManager()
+        # crash-recovery log of edited regions (see journal.py)
+        self.journal = Journal()
+        # macro being recorded (set by MainWindow on the current tab only)
+        self.recorder: MacroRecorder | None = None
+
+        # overflow (bleed) analysis, kept up to date from dirty rects
+        self.overflow = OverflowDetector(self.grid)
+        self.show_overflow = False
+        # near-duplicate frames (perceptual hashes cached per cell)
+        self.duplicates = DuplicateDetector(self.grid)
+        # per-cell content bbox / pixel count (status bar, centering, trimming)
+        self.content = ContentIndex(self.grid)
+        self._hover_cell: tuple[int, int] | None = None
 
         # view transform
         self._zoom = 1.0
@@ -42,9 +111,17 @@ class SpriteCanvas(QWidget):
 
         # selection state
         self.selection_rect: QRectF | None = None
-        self.lasso_polygon: QPolygonF | None = None
-        self._lasso_snapshot: Image.Image | None = None       # image snapshot before drag
-        self._lasso_original_polygon: QPolygonF | None = None  # polygon position before drag
+        self._lasso_polygon: QPolygonF | None = None
+        self._lasso_path: QPainterPath | None = None   # cached outline in image coords
+        self.lasso_offset = QPointF(0, 0)               # pending drag translation
+        self._selection_mask: SelectionMask | None = None  # magic wand / colour range
+        self._mask_pixmap: QPixmap | None = None        # tinted overlay of the mask
+        self.mask_offset = QPointF(0, 0)                # pending drag translation
+        self._mask_drag_start: QPointF | None = None
+
+        # floating selection (rect move / copy / resize / nudge), composited on commit
+        self.floating: FloatingSelection | None = None
+        self._float_pixmap: QPixmap | None = None
 
         # cell move preview
         self._cell_move_delta: tuple[int, int] | None = None
@@ -53,8 +130,11 @@ class SpriteCanvas(QWidget):
         # cell swap highlight
         self.swap_highlight: tuple[int, int] | None = None
 
-        # cell scale selection highlight
+        # cell scale selection highlight and live preview factor (None = off)
         self.cell_scale_selected: set[tuple[int, int]] = set()
+        self.cell_scale_preview: float | None = None
+        self._cell_pixmaps: dict[tuple[int, int, int, int], QPixmap] = {}  # keyed by (x, y, w, h)
+        self._checker_brush: QBrush | None = None
 
         # active tool (set by MainWindow)
         self._tool = None
@@ -64,6 +144,7 @@ class SpriteCanvas(QWidget):
 
         from .tools.rect_select import RectSelectTool
         from .tools.lasso_select import LassoSelectTool
+        from .tools.magic_wand import MagicWandTool
         from .tools.eraser import EraserTool
         from .tools.cell_move import CellMoveTool
         from .tools.cell_swap import CellSwapTool
@@ -73,6 +154,7 @@ class SpriteCanvas(QWidget):
         self.tools = {
             "rect": RectSelectTool(self),
             "lasso": LassoSelectTool(self),
+            "wand": MagicWandTool(self),
             "eraser": EraserTool(self),
             "cell_move": CellMoveTool(self),
             "cell_swap": CellSwapTool(self),
@@ -85,6 +167,7 @@ class SpriteCanvas(QWidget):
     # Tool management
     # ------------------------------------------------------------------
     def set_tool(self, name: str):
+        self.commit_floating()
         self._tool_name = name
         self._tool = self.tools[name]
         self.setCursor(self._tool.cursor())
@@ -92,18 +175,132 @@ class SpriteCanvas(QWidget):
     # ------------------------------------------------------------------
     # Image loading
     # ------------------------------------------------------------------
+    @property
+    def image(self) -> Image.Image | None:
+        """Read-only PIL view of the document (edits go through self.document.pixels)."""
+        return self.document.image if self.document is not None else None
+
+    @image.setter
+    def image(self, image: Image.Image | None):
+        self.document = Document.from_image(image) if image is not None else None
+
     def load_image(self, path: str):
-        self.image = Image.open(path).convert("RGBA")
+        self.drop_floating()
+        self.document = Document.open(path)
+        self.overflow.invalidate()
+        self.duplicates.invalidate()
+        self.content.invalidate()
+        self._loaded(path)
+
+    def load_prepared(self, sheet):
+        """load_image() for a watch.PreparedSheet: adopts its pixels and analyses,
+        which re-check themselves if this canvas has a different grid layout."""
+        self.drop_floating()
+        self.document = sheet.document
+        for analysis in (sheet.overflow, sheet.duplicates, sheet.content):
+            analysis.grid = self.grid
+        self.overflow, self.duplicates, self.content = sheet.overflow, sheet.duplicates, sheet.content
+        self._loaded(sheet.path)
+
+    def load_project(self, project):
+        """Open a project.Project: sheet, grid and rulers now; the stored undo history
+        is attached and read on demand, the stored content index adopted if current."""
+        self.drop_floating()
+        self.document = project.document
+        self.grid.config = project.grid_config
+        self.overflow.invalidate()
+        self.duplicates.invalidate()
+        self.content.invalidate()
+        project.restore_index(self.content)
+        self._loaded(project.path)
+        project.restore_history(self.history)
+
+    def load_recovered(self, document: Document, path: str | None):
+        """Show a document rebuilt from a crash journal (unsaved: it differs from path)."""
+        self.drop_floating()
+        self.document = document
+        self.overflow.invalidate()
+        self.duplicates.invalidate()
+        self.content.invalidate()
+        self._loaded(path)
+        self.journal.record(document.pixels, None)   # the recovered state exists nowhere on disk
+
+    def _loaded(self, path: str | None):
+        self.filepath = path
+        self.journal.start(path)
         self.history.clear()
         self.clear_selection()
         self.refresh_pixmap()
         self.fit_view()
         self.image_changed.emit()
 
-    def refresh_pixmap(self):
-        if self.image:
-            qi = pil_to_qimage(self.image)
+    def refresh_pixmap(self, box: tuple[int, int, int, int] | None = None):
+        """Rebuild the display pixmap. box=(x0, y0, x1, y1) re-uploads only that region."""
+        if not self.image:
+            return
+        qi = pixels_to_qimage(self.document.pixels)
+        if box is None or self._pixmap is None or \
+                (self._pixmap.width(), self._pixmap.height()) != self.document.size:
             self._pixmap = QPixmap.fromImage(qi)
+            return
+        x0, y0, x1, y1 = box
+        painter = QPainter(self._pixmap)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Source)
+        painter.drawImage(x0, y0, qi, x0, y0, x1 - x0, y1 - y0)
+        painter.end()
+
+    def mark_dirty(self, box: tuple[int, int, int, int] | None = None):
+        """Propagate an edit of region box (x0, y0, x1, y1) to the pixmap and analyses.
+        None means the whole image changed."""
+        if not self.image:
+            return
+        if box is not None:
+            iw, ih = self.image.size
+            box = (max(0, box[0]), max(0, box[1]), min(iw, box[2]), min(ih, box[3]))
+            if box[0] >= box[2] or box[1] >= box[3]:
+                return
+        self.journal.record(self.document.pixels, box)
+        self.refresh_pixmap(box)
+        self.overflow.invalidate(box)
+        self.duplicates.invalidate(box)
+        self.content.invalidate(box)
+        if box is None:
+            self._cell_pixmaps.clear()
+        else:
+            for key in [k for k in self._cell_pixmaps
+                        if box_intersects(box, (k[0], k[1], k[0] + k[2], k[1] + k[3]))]:
+                del self._cell_pixmaps[key]
+        self.update()
+
+    def cache_bytes(self) -> int:
+        """Approximate size of the display caches (pixmaps), for the tab memory budget."""
+        pixmaps = [self._pixmap, self._mask_pixmap, self._float_pixmap, *self._cell_pixmaps.values()]
+        return sum(p.width() * p.height() * 4 for p in pixmaps if p is not None)
+
+    def release_caches(self):
+        """Drop the display caches; they are rebuilt from the document when next needed."""
+        self._pixmap = None
+        self._mask_pixmap = None
+        self._cell_pixmaps.clear()
+
+    def _ensure_pixmap(self) -> QPixmap | None:
+        if self._pixmap is None:
+            self.refresh_pixmap()
+        return self._pixmap
+
+    def cell_pixmap(self, col: int, row: int) -> QPixmap:
+        """Cached pixmap of one cell, cut from the display pixmap."""
+        iw, ih = self.image.size
+        key = self.grid.cell_rect(iw, ih, col, row)
+        pix = self._cell_pixmaps.get(key)
+        if pix is None:
+            pix = self._ensure_pixmap().copy(*key)
+            self._cell_pixmaps[key] = pix
+        return pix
+
+    def set_cell_scale_preview(self, factor: float | None):
+        self.cell_scale_preview = factor
+        self.update()
 
     def fit_view(self):
         if not self.image:
@@ -141,7 +338,7 @@ class SpriteCanvas(QWidget):
         painter = QPainter(self)
         painter.fillRect(self.rect(), QColor(40, 40, 40))
 
-        if not self._pixmap:
+        if not self.document or self._ensure_pixmap() is None:
             return
 
         painter.save()
@@ -149,28 +346,30 @@ class SpriteCanvas(QWidget):
         painter.scale(self._zoom, self._zoom)
 
         # checkerboard background to show image boundary and transparency
-        iw_cb, ih_cb = self.image.size
-        cell = 8
-        c1, c2 = QColor(180, 180, 180), QColor(220, 220, 220)
-        for cy in range(0, ih_cb, cell):
-            for cx in range(0, iw_cb, cell):
-                color = c1 if ((cx // cell + cy // cell) % 2 == 0) else c2
-                painter.fillRect(cx, cy, min(cell, iw_cb - cx), min(cell, ih_cb - cy), color)
+        iw, ih = self.image.size
+        painter.fillRect(0, 0, iw, ih, self._checker())
 
         painter.drawPixmap(0, 0, self._pixmap)
 
-        iw, ih = self.image.size
+        # floating selection: lifted pixels follow the selection rect
+        if self.floating is not None and self.selection_rect:
+            if self.floating.cut:
+                x0, y0, x1, y1 = self.floating.source
+                painter.fillRect(QRectF(x0, y0, x1 - x0, y1 - y0), self._checker())
+            painter.drawPixmap(self.selection_rect, self._float_pixmap,
+                               QRectF(self._float_pixmap.rect()))
+
+        # live cell scale preview (cheap pixmap transform; LANCZOS runs on apply)
+        if self.cell_scale_preview is not None and self.cell_scale_selected:
+            self._draw_cell_scale_preview(painter)
 
         # cell move preview overlay
         if self._cell_move_delta and self._cell_move_cell and self.image:
             col, row = self._cell_move_cell
             dx, dy = self._cell_move_delta
             x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
-            cropped = self.image.crop((x, y, x + w, y + h))
-            qi = pil_to_qimage(cropped)
-            pix = QPixmap.fromImage(qi)
             painter.setOpacity(0.7)
-            painter.drawPixmap(x + dx, y + dy, pix)
+            painter.drawPixmap(x + dx, y + dy, self.cell_pixmap(col, row))
             painter.setOpacity(1.0)
 
         # grid lines
@@ -217,6 +416,10 @@ class SpriteCanvas(QWidget):
             for x1, y1, x2, y2 in self.grid.ruler_lines(iw, ih):
                 painter.drawLine(x1, y1, x2, y2)
 
+        # overflow (bleed) overlay
+        if self.show_overflow:
+            self._draw_overflow(painter)
+
         painter.restore()
 
         # selection overlay (in widget space)
@@ -224,6 +427,8 @@ class SpriteCanvas(QWidget):
             self._draw_selection_rect(painter)
         if self.lasso_polygon and not self.lasso_polygon.isEmpty():
             self._draw_lasso(painter)
+        if self._selection_mask is not None:
+            self._draw_selection_mask(painter)
 
     def _draw_selection_rect(self, painter: QPainter):
         from .tools.rect_select import _handle_rects, HANDLE_SIZE
@@ -248,16 +453,164 @@ class SpriteCanvas(QWidget):
             cx = self.image_to_widget(hr.center())
             painter.drawRect(QRectF(cx.x() - hs, cx.y() - hs, HANDLE_SIZE, HANDLE_SIZE))
 
+    def _checker(self) -> QBrush:
+        """Checkerboard brush of 8px squares in image space."""
+        if self._checker_brush is None:
+            tile = QPixmap(16, 16)
+            tile.fill(QColor(180, 180, 180))
+            p = QPainter(tile)
+            p.fillRect(8, 0, 8, 8, QColor(220, 220, 220))
+            p.fillRect(0, 8, 8, 8, QColor(220, 220, 220))
+            p.end()
+            self._checker_brush = QBrush(tile)
+        return self._checker_brush
+
+    def _draw_cell_scale_preview(self, painter: QPainter):
+        """Mirror scale_cells: erase each cell, draw its scaled content centered."""
+        iw, ih = self.image.size
+        factor = self.cell_scale_preview
+        painter.save()
+        painter.setClipRect(0, 0, iw, ih)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        cells = sorted(self.cell_scale_selected, key=lambda c: (c[1], c[0]))
+        pixmaps = [self.cell_pixmap(col, row) for col, row in cells]
+        for (col, row), pix in zip(cells, pixmaps):
+            x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+            nw = max(1, int(w * factor))
+            nh = max(1, int(h * factor))
+            painter.fillRect(x, y, w, h, self._checker())
+            painter.drawPixmap(QRectF(x + (w - nw) // 2, y + (h - nh) // 2, nw, nh),
+                               pix, QRectF(pix.rect()))
+        painter.restore()
+
+    def _draw_overflow(self, painter: QPainter):
+        """Draw overflow regions in image space (painter already transformed)."""
+        iw, ih = self.image.size
+        regions = self.overflow.results(self.document)
+        pen = QPen(QColor(255, 0, 120, 230))
+        pen.setWidth(0)
+        painter.setPen(pen)
+        painter.setBrush(QColor(255, 0, 120, 70))
+        for reg in regions:
+            x0, y0, x1, y1 = reg.box
+            painter.drawRect(QRectF(x0, y0, x1 - x0, y1 - y0))
+        # emphasize the touched cell borders
+        border_pen = QPen(QColor(255, 0, 120, 255))
+        border_pen.setWidth(3)
+        border_pen.setCosmetic(True)
+        painter.setPen(border_pen)
+        for reg in regions:
+            x, y, w, h = self.grid.cell_rect(iw, ih, *reg.cell)
+            x0, y0, x1, y1 = reg.box
+            for side in reg.sides:
+                if side == "left":
+                    painter.drawLine(QPointF(x, y0), QPointF(x, y1))
+                elif side == "right":
+                    painter.drawLine(QPointF(x + w, y0), QPointF(x + w, y1))
+                elif side == "top":
+                    painter.drawLine(QPointF(x0, y), QPointF(x1, y))
+                else:
+                    painter.drawLine(QPointF(x0, y + h), QPointF(x1, y + h))
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
     def _draw_lasso(self, painter: QPainter):
-        poly_widget = QPolygonF([
-            self.image_to_widget(pt) for pt in self.lasso_polygon
-        ])
+        """Draw the cached lasso path through the view transform plus drag offset."""
+        if self._lasso_path is None:
+            self._lasso_path = QPainterPath()
+            self._lasso_path.addPolygon(self._lasso_polygon)
+        painter.save()
+        painter.translate(self._offset)
+        painter.scale(self._zoom, self._zoom)
+        painter.translate(self.lasso_offset)
         pen = QPen(QColor(255, 255, 255, 200))
         pen.setWidth(1)
+        pen.setCosmetic(True)
         pen.setStyle(Qt.PenStyle.DashLine)
         painter.setPen(pen)
         painter.setBrush(QColor(100, 150, 255, 30))
-        painter.drawPolygon(poly_widget)
+        painter.drawPath(self._lasso_path)
+        # closing edge of a lasso still being drawn
+        path = self._lasso_path
+        if path.elementCount() > 2 and path.currentPosition() != self._lasso_polygon.first():
+            painter.drawLine(path.currentPosition(), self._lasso_polygon.first())
+        painter.restore()
+
+    def _draw_selection_mask(self, painter: QPainter):
+        """Tinted mask overlay at its box plus drag offset, with the box outlined."""
+        x0, y0, x1, y1 = self._selection_mask.box
+        if self._mask_pixmap is None:
+            m = self._selection_mask.mask
+            rgba = np.zeros(m.shape + (4,), dtype=np.uint8)
+            rgba[m] = (100, 150, 255, 110)
+            self._mask_pixmap = QPixmap.fromImage(pil_to_qimage(Image.fromarray(rgba, "RGBA")))
+        painter.save()
+        painter.translate(self._offset)
+        painter.scale(self._zoom, self._zoom)
+        painter.translate(self.mask_offset)
+        painter.drawPixmap(x0, y0, self._mask_pixmap)
+        pen = QPen(QColor(255, 255, 255, 200))
+        pen.setWidth(1)
+        pen.setCosmetic(True)
+        pen.setStyle(Qt.PenStyle.DashLine)
+        painter.setPen(pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+        painter.drawRect(QRectF(x0, y0, x1 - x0, y1 - y0))
+        painter.restore()
+
+    # ------------------------------------------------------------------
+    # Selection mask
+    # ------------------------------------------------------------------
+    @property
+    def selection_mask(self) -> SelectionMask | None:
+        return self._selection_mask
+
+    @selection_mask.setter
+    def selection_mask(self, mask: SelectionMask | None):
+        self._selection_mask = mask
+        self._mask_pixmap = None
+        self.mask_offset = QPointF(0, 0)
+
+    def select_color(self, pos: QPointF, tolerance: int, contiguous: bool = True,
+                     whole_sheet: bool = False, mode: str = "replace"):
+        """Magic wand (contiguous) or colour range at pos, within its cell or the whole sheet."""
+        if not self.image:
+            return
+        iw, ih = self.image.size
+        x, y = int(pos.x()), int(pos.y())
+        if not (0 <= x < iw and 0 <= y < ih):
+            return
+        cell = None if whole_sheet else self.grid.cell_at(iw, ih, x, y)
+        if cell is None:
+            box = (0, 0, iw, ih)
+        else:
+            cx, cy, cw, ch = self.grid.cell_rect(iw, ih, *cell)
+            box = (cx, cy, cx + cw, cy + ch)
+        mask = magic_wand(self.document.view(box), x - box[0], y - box[1], tolerance, contiguous)
+        if mode != "replace":
+            self.begin_combine()
+        self.combine_selection(SelectionMask.from_array(mask, box[:2]), mode)
+
+    # ------------------------------------------------------------------
+    # Lasso polygon
+    # ------------------------------------------------------------------
+    @property
+    def lasso_polygon(self) -> QPolygonF | None:
+        return self._lasso_polygon
+
+    @lasso_polygon.setter
+    def lasso_polygon(self, poly: QPolygonF | None):
+        self._lasso_polygon = poly
+        self._lasso_path = None
+        self.lasso_offset = QPointF(0, 0)
+
+    def append_lasso_point(self, pt: QPointF):
+        """Extend the lasso being drawn without rebuilding polygon or path."""
+        if self._lasso_polygon is None:
+            self.lasso_polygon = QPolygonF([pt])
+            return
+        self._lasso_polygon.append(pt)
+        if self._lasso_path is not None:
+            self._lasso_path.lineTo(pt)
 
     # ------------------------------------------------------------------
     # Mouse / Wheel / Key events
@@ -274,15 +627,23 @@ class SpriteCanvas(QWidget):
             return
 
         if event.button() == Qt.MouseButton.LeftButton and self.image:
-            # Alt key = cell move shortcut
-            if event.modifiers() & Qt.KeyboardModifier.AltModifier:
+            mods = event.modifiers()
+            # Alt key = cell move shortcut (Alt+Shift is a selection combine mode)
+            if mods & Qt.KeyboardModifier.AltModifier and not mods & Qt.KeyboardModifier.ShiftModifier:
+                self.commit_floating()
                 self.tools["cell_move"].mouse_press(event, image_pos)
                 self._alt_active = True
+            elif (self._tool_name in SELECTION_TOOLS and self.selection_mask is not None
+                  and combine_mode(mods) == "replace"
+                  and self.selection_mask.contains(int(image_pos.x()), int(image_pos.y()))):
+                # drag a mask selection with any selection tool
+                self._mask_drag_start = image_pos
             else:
                 self._tool.mouse_press(event, image_pos)
 
     def mouseMoveEvent(self, event: QMouseEvent):
         image_pos = self.widget_to_image(QPointF(event.position()))
+        self._update_hover_cell(image_pos)
 
         if self._pan_start:
             delta = QPointF(event.position()) - self._pan_start
@@ -293,9 +654,21 @@ class SpriteCanvas(QWidget):
 
         if self._alt_active:
             self.tools["cell_move"].mouse_move(event, image_pos)
+        elif self._mask_drag_start is not None:
+            self.mask_offset = image_pos - self._mask_drag_start
+            self.update()
         else:
             self._tool.mouse_move(event, image_pos)
 
+    def _update_hover_cell(self, image_pos: QPointF):
+        cell = None
+        if self.image:
+            iw, ih = self.image.size
+            cell = self.grid.cell_at(iw, ih, int(image_pos.x()), int(image_pos.y()))
+        if cell != self._hover_cell:
+            self._hover_cell = cell
+            self.hover_cell_changed.emit(cell)
+
     def mouseReleaseEvent(self, event: QMouseEvent):
         image_pos = self.widget_to_image(QPointF(event.position()))
 
@@ -311,6 +684,9 @@ class SpriteCanvas(QWidget):
         if self._alt_active:
             self.tools["cell_move"].mouse_release(event, image_pos)
             self._alt_active = False
+        elif self._mask_drag_start is not None:
+            self._mask_drag_start = None
+            self.commit_mask_move()
         else:
             self._tool.mouse_release(event, image_pos)
 
@@ -334,6 +710,12 @@ class SpriteCanvas(QWidget):
             self._delete_selection()
         elif event.key() == Qt.Key.Key_Escape:
             self.clear_selection()
+        elif event.key() in _NUDGE_KEYS and self.selection_rect and self._tool_name == "rect":
+            step = 10 if event.modifiers() & Qt.KeyboardModifier.ShiftModifier else 1
+            dx, dy = _NUDGE_KEYS[event.key()]
+            self.nudge_selection(dx * step, dy * step)
+        else:
+            super().keyPressEvent(event)
 
     def keyReleaseEvent(self, event: QKeyEvent):
         if event.key() == Qt.Key.Key_Space:
@@ -344,170 +726,241 @@ class SpriteCanvas(QWidget):
     # Selection helpers
     # ------------------------------------------------------------------
     def clear_selection(self):
+        self.commit_floating()
         self.selection_rect = None
         self.lasso_polygon = None
-        self._lasso_snapshot = None
+        self.selection_mask = None
+        self.update()
+
+    def _rect_box(self) -> tuple[int, int, int, int]:
+        r = self.selection_rect
+        x, y = int(r.x()), int(r.y())
+        return x, y, x + int(r.width()), y + int(r.height())
+
+    def selection_as_mask(self) -> SelectionMask | None:
+        """The current selection (mask, rect or closed lasso) as a SelectionMask."""
+        if self.selection_mask is not None:
+            return self.selection_mask
+        if self.selection_rect:
+            return SelectionMask.from_rect(self._rect_box())
+        if self.lasso_polygon and self.lasso_polygon.count() > 2:
+            return SelectionMask.from_polygon([(int(p.x()), int(p.y())) for p in self.lasso_polygon])
+        return None
+
+    def begin_combine(self):
+        """Turn the current selection into the mask a Shift/Ctrl/Alt shape combines with."""
+        self.commit_floating()
+        sel = self.selection_as_mask()
+        self.selection_rect = None
+        self.lasso_polygon = None
+        self.selection_mask = sel
+        self.update()
+
+    def combine_selection(self, shape: SelectionMask | None, mode: str):
+        """Apply shape to the selection mask with mode (see selection.COMBINE_MODES)."""
+        if mode == "replace":
+            self.clear_selection()
+        self.selection_rect = None
+        self.lasso_polygon = None
+        self.selection_mask = combine(self.selection_mask, shape, mode)
         self.update()
 
     def _delete_selection(self):
         if not self.image:
             return
-        self.history.push(self.image)
-        if self.selection_rect:
-            from PIL import ImageDraw
-            draw = ImageDraw.Draw(self.image)
-            r = self.selection_rect
-            draw.rectangle([int(r.x()), int(r.y()), int(r.right()), int(r.bottom())],
-                           fill=(0, 0, 0, 0))
-        elif self.lasso_polygon and not self.lasso_polygon.isEmpty():
-            self._erase_lasso_region()
-        self.refresh_pixmap()
+        if self.floating is not None:
+            # discard the lifted pixels; a cut still leaves its source erased
+            f = self.floating
+            self.drop_floating()
+            if not f.cut:
+                return
+            box = f.source
+            self.history.push(self.document.pixels, box)
+            self.document.clear(box)
+        else:
+            sel = self.selection_as_mask()
+            if sel is None:
+                return
+            box = self._erase_mask(sel)
+            if box is None:
+                return
+        self.mark_dirty(box)
         self.image_changed.emit()
-        self.update()
 
-    def _erase_lasso_region(self):
-        from PIL import ImageDraw
-        mask = Image.new("L", self.image.size, 0)
-        draw = ImageDraw.Draw(mask)
-        pts = [(int(p.x()), int(p.y())) for p in self.lasso_polygon]
-        if len(pts) >= 3:
-            draw.polygon(pts, fill=255)
-        r, g, b, a = self.image.split()
-        new_a = ImageChops.difference(a, mask)
-        self.image = Image.merge("RGBA", (r, g, b, new_a))
+    def _erase_mask(self, sel: SelectionMask) -> tuple[int, int, int, int] | None:
+        """Clear pixels under sel (to 0, 0, 0, 0) within its box; pushes history and
+        returns the box."""
+        box = clip_box(sel.box, *self.image.size)
+        if box is None:
+            return None
+        self.history.push(self.document.pixels, box)
+        self.document.view(box)[sel.crop(box)] = 0
+        return box
 
     # ------------------------------------------------------------------
-    # resize_selection_pixels (rect select resize commit)
+    # Floating selection (rect select move / copy / resize / nudge)
     # ------------------------------------------------------------------
-    def resize_selection_pixels(self,
-                                sx: int, sy: int, sw: int, sh: int,
-                                nx: int, ny: int, nw: int, nh: int):
-        if not self.image:
+    def float_selection(self, cut: bool):
+        """Lift the pixels under selection_rect into self.floating.
+        Until commit_floating only the selection rect moves; cut=True erases the
+        source on commit (move/resize), False leaves it (copy)."""
+        if not self.image or not self.selection_rect or self.floating is not None:
             return
-        self.history.push(self.image)
-        from PIL import ImageDraw
-        region = self.image.crop((sx, sy, sx + sw, sy + sh))
-        resized = region.resize((max(1, nw), max(1, nh)), Image.LANCZOS)
-        # erase original
-        draw = ImageDraw.Draw(self.image)
-        draw.rectangle([sx, sy, sx + sw, sy + sh], fill=(0, 0, 0, 0))
-        # paste resized at new position
-        self.image.alpha_composite(resized, dest=(nx, ny))
-        # update selection rect to new size
-        self.selection_rect = QRectF(nx, ny, nw, nh)
-        self.refresh_pixmap()
-        self.image_changed.emit()
+        r = self.selection_rect
+        x, y = int(r.x()), int(r.y())
+        box = clip_box((x, y, x + int(r.width()), y + int(r.height())), *self.image.size)
+        if box is None:
+            return
+        x0, y0, x1, y1 = box
+        self.selection_rect = QRectF(x0, y0, x1 - x0, y1 - y0)
+        self.floating = FloatingSelection(self.image.crop(box), box, cut)
+        self._float_pixmap = self._ensure_pixmap().copy(x0, y0, x1 - x0, y1 - y0)
         self.update()
 
-    # ------------------------------------------------------------------
-    # move_selection_pixels (rect select move commit)
-    # ------------------------------------------------------------------
-    def move_selection_pixels(self, sx: int, sy: int, sw: int, sh: int, dx: int, dy: int):
-        if not self.image:
+    def drop_floating(self):
+        """Forget the floating pixels without touching the sheet."""
+        self.floating = None
+        self._float_pixmap = None
+        self.update()
+
+    def nudge_selection(self, dx: int, dy: int):
+        """Arrow-key nudge: lift the selection (cut) if needed and move it."""
+        if not self.selection_rect:
             return
-        self.history.push(self.image)
-        region = self.image.crop((sx, sy, sx + sw, sy + sh))
-        # erase source
-        from PIL import ImageDraw
-        draw = ImageDraw.Draw(self.image)
-        draw.rectangle([sx, sy, sx + sw, sy + sh], fill=(0, 0, 0, 0))
-        # paste at new location (clipped to image)
-        self.image.alpha_composite(region, dest=(sx + dx, sy + dy))
-        self.refresh_pixmap()
-        self.image_changed.emit()
+        self.float_selection(cut=True)
+        self.selection_rect = self.selection_rect.translated(dx, dy)
         self.update()
 
+    def commit_floating(self):
+        """Composite the floating selection at selection_rect as one history entry.
+        No-op when nothing is floating or it was put back where it came from."""
+        f = self.floating
+        if f is None or not self.image:
+            return
+        self.drop_floating()
+        r = self.selection_rect
+        if r is None:
+            return
+        nx, ny = int(r.x()), int(r.y())
+        nw, nh = max(1, int(r.width())), max(1, int(r.height()))
+        dst = (nx, ny, nx + nw, ny + nh)
+        if dst == f.source:
+            return
+        box = clip_box(union_box(f.source if f.cut else None, dst), *self.image.size)
+        if box is None:
+            return
+        self.history.push(self.document.pixels, box)
+        if f.cut:
+            self.document.clear(f.source)
+        self.document.composite(f.render((nw, nh)), nx, ny)
+        self.selection_rect = QRectF(nx, ny, nw, nh)
+        self.mark_dirty(box)
+        self.image_changed.emit()
+
     # ------------------------------------------------------------------
     # flip_horizontal
     # ------------------------------------------------------------------
     def flip_horizontal(self):
-        """Flip selection rect region horizontally. If no selection, flip whole image."""
+        """Flip selection rect region horizontally. If no selection, flip whole image.
+        A mask selection flips its pixels (and itself) within its bounding box."""
         if not self.image:
             return
-        self.history.push(self.image)
-        if self.selection_rect:
-            r = self.selection_rect
-            x, y = int(r.x()), int(r.y())
-            w, h = int(r.width()), int(r.height())
-            region = self.image.crop((x, y, x + w, y + h))
-            flipped = region.transpose(Image.FLIP_LEFT_RIGHT)
-            from PIL import ImageDraw
-            ImageDraw.Draw(self.image).rectangle([x, y, x + w, y + h], fill=(0, 0, 0, 0))
-            self.image.alpha_composite(flipped, dest=(x, y))
-        else:
-            self.image = self.image.transpose(Image.FLIP_LEFT_RIGHT)
-        self.refresh_pixmap()
+        self.commit_floating()
+        if self.selection_mask is not None:
+            self._flip_mask_selection()
+            return
+        box = self._rect_box() if self.selection_rect else None
+        self.history.push(self.document.pixels, box)
+        self.document.flip_horizontal(box)
+        self.record_step("flip_horizontal", box=list(box) if box else None)
+        self.mark_dirty(box)
         self.image_changed.emit()
-        self.update()
 
-    # ------------------------------------------------------------------
-    # copy_selection_pixels (rect select Ctrl+drag copy)
-    # ------------------------------------------------------------------
-    def copy_selection_pixels(self, sx: int, sy: int, sw: int, sh: int, dx: int, dy: int):
-        if not self.image:
+    def _flip_mask_selection(self):
+        sel = self.selection_mask
+        box = clip_box(sel.box, *self.image.size)
+        if box is None:
             return
-        self.history.push(self.image)
-        region = self.image.crop((sx, sy, sx + sw, sy + sh))
-        self.image.alpha_composite(region, dest=(sx + dx, sy + dy))
-        self.refresh_pixmap()
+        flipped_sel = sel.flipped_horizontal()
+        self.history.push(self.document.pixels, box)
+        region = self.document.view(box)
+        src = sel.crop(box)
+        cut = np.where(src[..., None], region, 0).astype(np.uint8)
+        region[src] = 0
+        # mirror within the (unclipped) selection box, then cut back to the visible part
+        x0, y0, x1, y1 = sel.box
+        full = np.zeros((y1 - y0, x1 - x0, 4), dtype=np.uint8)
+        full[box[1] - y0:box[3] - y0, box[0] - x0:box[2] - x0] = cut
+        mirrored = full[:, ::-1][box[1] - y0:box[3] - y0, box[0] - x0:box[2] - x0]
+        out = Image.alpha_composite(Image.fromarray(region, "RGBA"),
+                                    Image.fromarray(np.ascontiguousarray(mirrored), "RGBA"))
+        region[:] = np.asarray(out)
+        self.selection_mask = flipped_sel
+        self.mark_dirty(box)
         self.image_changed.emit()
-        self.update()
 
     # ------------------------------------------------------------------
     # Lasso move commit
     # ------------------------------------------------------------------
     def commit_lasso_move(self):
-        """Called by LassoSelectTool after dragging."""
-        if not self.image or not self.lasso_polygon or not self._lasso_snapshot:
-            return
-        if self._lasso_original_polygon is None:
+        """Called by LassoSelectTool after dragging: move the pixels under lasso_polygon
+        by lasso_offset. Only the union of the source and destination boxes is touched."""
+        if not self.image or not self.lasso_polygon:
             return
 
-        pts_original = [(int(p.x()), int(p.y())) for p in self._lasso_original_polygon]
-        pts_current  = [(int(p.x()), int(p.y())) for p in self.lasso_polygon]
-        if len(pts_original) < 3 or len(pts_current) < 3:
+        pts = [(int(p.x()), int(p.y())) for p in self.lasso_polygon]
+        dx, dy = int(self.lasso_offset.x()), int(self.lasso_offset.y())
+        if len(pts) < 3 or (dx == 0 and dy == 0):
+            self.lasso_offset = QPointF(0, 0)
+            self.update()
             return
 
-        from PIL import ImageDraw
-
-        # Compute move delta from polygon centroid
-        ox = sum(p[0] for p in pts_original) / len(pts_original)
-        oy = sum(p[1] for p in pts_original) / len(pts_original)
-        cx = sum(p[0] for p in pts_current)  / len(pts_current)
-        cy = sum(p[1] for p in pts_current)  / len(pts_current)
-        dx, dy = int(cx - ox), int(cy - oy)
-
-        # 1. Build mask at original polygon position
-        orig_mask = Image.new("L", self.image.size, 0)
-        ImageDraw.Draw(orig_mask).polygon(pts_original, fill=255)
-
-        # 2. Cut pixels from snapshot preserving original alpha
-        #    multiply(alpha, mask): inside polygon = original alpha, outside = 0
-        snap_r, snap_g, snap_b, snap_a = self._lasso_snapshot.split()
-        cut_alpha = ImageChops.multiply(snap_a, orig_mask)
-        cut = Image.merge("RGBA", (snap_r, snap_g, snap_b, cut_alpha))
-
-        # 3. Shift the cut region by (dx, dy)
-        shifted = Image.new("RGBA", self.image.size, (0, 0, 0, 0))
-        shifted.paste(cut, (dx, dy))
+        sel = SelectionMask.from_polygon(pts)
+        # polygon follows the pixels; keep it visible so user can drag again (Escape clears)
+        self.lasso_polygon = self.lasso_polygon.translated(dx, dy)
+        self._move_masked_pixels(sel, dx, dy)
 
-        # 4. Erase original region from current image
-        #    multiply(alpha, inverted_mask): inside polygon = 0, outside = original alpha
-        img_r, img_g, img_b, img_a = self.image.split()
-        inv_mask = ImageChops.invert(orig_mask)
-        new_a = ImageChops.multiply(img_a, inv_mask)
-        self.image = Image.merge("RGBA", (img_r, img_g, img_b, new_a))
-
-        # 5. Alpha-composite shifted region onto image (preserves transparency)
-        self.image = Image.alpha_composite(self.image, shifted)
+    # ------------------------------------------------------------------
+    # Selection mask move commit
+    # ------------------------------------------------------------------
+    def commit_mask_move(self):
+        """Called after dragging a mask selection: move the masked pixels by mask_offset."""
+        sel = self.selection_mask
+        if not self.image or sel is None:
+            return
+        dx, dy = int(self.mask_offset.x()), int(self.mask_offset.y())
+        if dx == 0 and dy == 0:
+            self.mask_offset = QPointF(0, 0)
+            self.update()
+            return
+        self.selection_mask = sel.translated(dx, dy)
+        self._move_masked_pixels(sel, dx, dy)
 
-        # Update snapshot and original polygon to current state for continued dragging
-        self._lasso_snapshot = self.image.copy()
-        self._lasso_original_polygon = QPolygonF(self.lasso_polygon)
-        # Keep lasso_polygon visible so user can drag again; clear with Escape
-        self.refresh_pixmap()
+    def _move_masked_pixels(self, sel: SelectionMask | None, dx: int, dy: int):
+        """Move the pixels under sel by (dx, dy) as one history entry,
+        touching only the union of the source and destination boxes."""
+        if sel is None:
+            self.update()
+            return
+        box = clip_box(union_box(sel.box, sel.translated(dx, dy).box), *self.image.size)
+        if box is None:
+            self.update()
+            return
+        self.history.push(self.document.pixels, box)
+
+        # Everything below is in box-local coordinates (region is a view into the sheet)
+        region = self.document.view(box)
+        src = sel.crop(box)
+        # 1. Cut pixels preserving original alpha; 2. erase them from the region
+        cut = np.where(src[..., None], region, 0).astype(np.uint8)
+        region[src] = 0
+        # 3. Shift the cut by (dx, dy) and alpha-composite it back (keeps transparency)
+        shifted = Image.new("RGBA", (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+        shifted.paste(Image.fromarray(cut, "RGBA"), (dx, dy))
+        region[:] = np.asarray(Image.alpha_composite(Image.fromarray(region, "RGBA"), shifted))
+
+        self.mark_dirty(box)
         self.image_changed.emit()
-        self.update()
 
     # ------------------------------------------------------------------
     # Cell move apply
@@ -515,78 +968,31 @@ class SpriteCanvas(QWidget):
     def apply_cell_move(self, cell: tuple[int, int], dx: int, dy: int):
         if not self.image:
             return
-        col, row = cell
         iw, ih = self.image.size
-        x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
-
-        # crop cell content
-        region = self.image.crop((x, y, x + w, y + h))
-
-        # erase cell
-        from PIL import ImageDraw
-        draw = ImageDraw.Draw(self.image)
-        draw.rectangle([x, y, x + w, y + h], fill=(0, 0, 0, 0))
-
-        # paste shifted (clip to cell bounds)
-        new_x = x + dx
-        new_y = y + dy
-        # create cell-sized canvas and paste shifted region
-        cell_canvas = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-        cell_canvas.alpha_composite(region, dest=(dx, dy))
-        self.image.alpha_composite(cell_canvas, dest=(x, y))
-
-        self.refresh_pixmap()
+        x, y, w, h = self.grid.cell_rect(iw, ih, *cell)
+        self.history.push(self.document.pixels, (x, y, x + w, y + h))
+        shift_cell_pixels(self.document.pixels, self.grid, cell, dx, dy)
+        self.record_step("cell_move", cell=list(cell), dx=dx, dy=dy)
+        self.mark_dirty((x, y, x + w, y + h))
         self.image_changed.emit()
-        self.update()
 
     # ------------------------------------------------------------------
     # Cell scale
     # ------------------------------------------------------------------
     def scale_cells(self, cells: set[tuple[int, int]], factor: float):
         """Scale content of each cell by factor, centered in cell.
-        Process order: left-to-right, top-to-bottom (later overwrites earlier).
+        All cells are sampled from the image before scaling and resized in parallel.
+        Compositing order: left-to-right, top-to-bottom (later overwrites earlier).
         Content outside image bounds is clipped; inside image bounds remains."""
         if not self.image or not cells:
             return
-        self.history.push(self.image)
-        from PIL import ImageDraw
+        self.commit_floating()
+        self.history.push(self.document.pixels)
 
-        iw, ih = self.image.size
-        # sort: top-to-bottom, left-to-right so right-bottom overwrites
-        sorted_cells = sorted(cells, key=lambda c: (c[1], c[0]))
-
-        for col, row in sorted_cells:
-            x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
-            region = self.image.crop((x, y, x + w, y + h))
-
-            # new size
-            nw = max(1, int(w * factor))
-            nh = max(1, int(h * factor))
-            scaled = region.resize((nw, nh), Image.LANCZOS)
-
-            # center offset within cell
-            ox = x + (w - nw) // 2
-            oy = y + (h - nh) // 2
-
-            # erase original cell area
-            draw = ImageDraw.Draw(self.image)
-            draw.rectangle([x, y, x + w, y + h], fill=(0, 0, 0, 0))
-
-            # paste scaled — alpha_composite handles clipping at image bounds
-            # compute intersection with image bounds
-            px = max(0, ox)
-            py = max(0, oy)
-            px2 = min(iw, ox + nw)
-            py2 = min(ih, oy + nh)
-            if px < px2 and py < py2:
-                crop_x = px - ox
-                crop_y = py - oy
-                visible = scaled.crop((crop_x, crop_y, crop_x + (px2 - px), crop_y + (py2 - py)))
-                self.image.alpha_composite(visible, dest=(px, py))
-
-        self.refresh_pixmap()
+        dirty = scale_cell_contents(self.document, self.grid, cells, factor, get_thread_executor())
+        self.record_step("scale_cells", cells=self._recorded_cells(cells), factor=factor)
+        self.mark_dirty(dirty)
         self.image_changed.emit()
-        self.update()
 
     # ------------------------------------------------------------------
     # Cell swap
@@ -597,38 +1003,147 @@ class SpriteCanvas(QWidget):
         iw, ih = self.image.size
         ax, ay, aw, ah = self.grid.cell_rect(iw, ih, *cell_a)
         bx, by, bw, bh = self.grid.cell_rect(iw, ih, *cell_b)
-        region_a = self.image.crop((ax, ay, ax + aw, ay + ah))
-        region_b = self.image.crop((bx, by, bx + bw, by + bh))
-        # resize if cells differ in size (non-uniform grids)
-        if (aw, ah) != (bw, bh):
-            region_a = region_a.resize((bw, bh), Image.LANCZOS)
-            region_b = region_b.resize((aw, ah), Image.LANCZOS)
-        from PIL import ImageDraw
-        draw = ImageDraw.Draw(self.image)
-        draw.rectangle([ax, ay, ax + aw, ay + ah], fill=(0, 0, 0, 0))
-        draw.rectangle([bx, by, bx + bw, by + bh], fill=(0, 0, 0, 0))
-        self.image.alpha_composite(region_b, dest=(ax, ay))
-        self.image.alpha_composite(region_a, dest=(bx, by))
-        self.refresh_pixmap()
+        # only the two cells are snapshotted, as one undo step
+        self.history.push_regions(self.document.pixels,
+                                  [(ax, ay, ax + aw, ay + ah), (bx, by, bx + bw, by + bh)])
+        swap_pixels(self.document.pixels, self.grid, cell_a, cell_b)
+        self.record_step("swap_cells", a=list(cell_a), b=list(cell_b))
+        # one refresh for both cells
+        self.mark_dirty((min(ax, bx), min(ay, by), max(ax + aw, bx + bw), max(ay + ah, by + bh)))
+        self.image_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Re-layout (other grid / strip)
+    # ------------------------------------------------------------------
+    def relayout(self, cols: int, rows: int, padding: int = 0, trim: bool = False,
+                 skip_empty: bool = False):
+        """Rebuild the sheet as cols x rows frames (0 = as many as needed; see
+        cell_ops.relayout_pixels) as one undo step. The grid takes the new layout."""
+        if not self.image:
+            return
+        self.commit_floating()
+        content = self.content.boxes(self.document) if trim or skip_empty else None
+        pixels, (cols_out, rows_out) = relayout_pixels(
+            self.document.pixels, self.grid, cols, rows, padding, trim, skip_empty, content)
+        self.history.push(self.document.pixels, layout=self.grid_layout())
+        self.record_step("relayout", cols=cols, rows=rows, padding=padding, trim=trim,
+                         skip_empty=skip_empty)
+        self.document.replace(pixels)
+        self.mark_dirty()
+        self._set_layout((cols_out, rows_out))
+        self.image_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Cell reorder (arbitrary permutation)
+    # ------------------------------------------------------------------
+    def reorder_cells(self, order: list[int | None]):
+        """Rearrange frames in one pass: destination frame i gets source frame order[i]
+        (row-major indices, duplicates allowed, None = empty)."""
+        if not self.image:
+            return
+        self.commit_floating()
+        self.history.push(self.document.pixels)
+        self.document.replace(permute_pixels(self.document.pixels, self.grid, order))
+        self.record_step("reorder_cells", order=list(order))
+        self.mark_dirty()
+        self.image_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Cleanup (background removal / defringe)
+    # ------------------------------------------------------------------
+    def remove_background(self, color, tolerance: int, from_borders: bool = True,
+                          feather: int = 0):
+        """Key out color over the whole sheet as one undo step (see cleanup.remove_background)."""
+        if not self.image:
+            return
+        self.commit_floating()
+        self.history.push(self.document.pixels)
+        cleanup.key_background(self.document.pixels, self.grid, color, tolerance,
+                               from_borders, feather)
+        self.record_step("remove_background", color=list(color), tolerance=tolerance,
+                         from_borders=from_borders, feather=feather)
+        self.mark_dirty()
+        self.image_changed.emit()
+
+    def defringe(self, alpha_threshold: int, bg_color=None, grow: int = 0):
+        """Edge / halo cleanup of every cell as one undo step (see cleanup.defringe)."""
+        if not self.image:
+            return
+        self.commit_floating()
+        self.history.push(self.document.pixels)
+        cleanup.defringe_cells(self.document.pixels, self.grid, alpha_threshold, bg_color, grow)
+        self.record_step("defringe", alpha_threshold=alpha_threshold,
+                         bg_color=list(bg_color) if bg_color else None, grow=grow)
+        self.mark_dirty()
+        self.image_changed.emit()
+
+    # ------------------------------------------------------------------
+    # Macros
+    # ------------------------------------------------------------------
+    def record_step(self, op: str, **args):
+        """Append an operation to the macro being recorded, if any (see macro.py)."""
+        if self.recorder is not None:
+            self.recorder.add(op, self.grid.config, **args)
+
+    def _recorded_cells(self, cells) -> list | str:
+        """Cells as recorded: "all" when every cell is selected, so the macro fits any grid."""
+        if len(cells) == cell_count(self.grid):
+            return "all"
+        return sorted([list(c) for c in cells], key=lambda c: (c[1], c[0]))
+
+    def apply_macro(self, macro, overrides: dict | None = None):
+        """Replay macro on this sheet as one undo step (may change the grid layout and size)."""
+        if not self.image:
+            return
+        self.commit_floating()
+        size = self.document.size
+        # replay on copies: a step that fails leaves the sheet, grid and history untouched
+        grid = GridManager(copy.deepcopy(self.grid.config))
+        result = apply_macro(macro, Document(self.document.pixels.copy()), grid, overrides)
+        self.history.push(self.document.pixels, layout=self.grid_layout())
+        self.document.replace(result.pixels)
+        self.mark_dirty()
+        if self.document.size != size:
+            self.fit_view()
+        self._set_layout((grid.config.cols, grid.config.rows))
         self.image_changed.emit()
-        self.update()
 
     # ------------------------------------------------------------------
     # Undo / Redo
     # ------------------------------------------------------------------
     def undo(self):
+        self.commit_floating()
         if self.image and self.history.can_undo():
-            self.image = self.history.undo(self.image)
-            self.refresh_pixmap()
+            box, layout = self.history.undo_box(), self.history.undo_layout()
+            self._adopt(self.history.undo(self.document.pixels, self.grid_layout()))
+            self.mark_dirty(box)
+            self._set_layout(layout)
             self.image_changed.emit()
-            self.update()
 
     def redo(self):
+        self.commit_floating()
         if self.image and self.history.can_redo():
-            self.image = self.history.redo(self.image)
-            self.refresh_pixmap()
+            box, layout = self.history.redo_box(), self.history.redo_layout()
+            self._adopt(self.history.redo(self.document.pixels, self.grid_layout()))
+            self.mark_dirty(box)
+            self._set_layout(layout)
             self.image_changed.emit()
-            self.update()
+
+    def grid_layout(self) -> tuple[int, int]:
+        return self.grid.config.cols, self.grid.config.rows
+
+    def _set_layout(self, layout: tuple[int, int] | None):
+        """Switch the grid to layout (cols, rows) if given and different, and refit the view."""
+        if layout is None or tuple(layout) == self.grid_layout():
+            return
+        self.grid.config.cols, self.grid.config.rows = layout
+        self.fit_view()
+        self.layout_changed.emit()
+
+    def _adopt(self, pixels: np.ndarray):
+        """Take over the array history handed back (a new one for full snapshots)."""
+        if pixels is not self.document.pixels:
+            self.document.replace(pixels)
 
     # ------------------------------------------------------------------
     # Drag & drop
@@ -636,15 +1151,14 @@ class SpriteCanvas(QWidget):
     def dragEnterEvent(self, event):
         if event.mimeData().hasUrls():
             urls = event.mimeData().urls()
-            if urls and urls[0].toLocalFile().lower().endswith(".png"):
+            if urls and urls[0].toLocalFile().lower().endswith((".png", PROJECT_EXT)):
                 event.acceptProposedAction()
 
     def dropEvent(self, event):
-        urls = event.mimeData().urls()
-        if urls:
-            path = urls[0].toLocalFile()
-            if path.lower().endswith(".png"):
-                self.load_image(path)
+        # the window decides where dropped sheets open (one tab each)
+        for url in event.mimeData().urls():
+            path = url.toLocalFile()
+            if path.lower().endswith((".png", PROJECT_EXT)):
                 self.file_dropped.emit(path)
 
     def resizeEvent(self, event):
@@ -0,0 +1,206 @@
+"""Headless cell-level operations on a sprite sheet (no Qt required)."""
+from __future__ import annotations
+import numpy as np
+from PIL import Image
+from .analysis import content_boxes
+from .document import Document
+from .grid import GridManager
+
+
+def cell_count(grid: GridManager) -> int:
+    return grid.config.cols * grid.config.rows
+
+
+def index_to_cell(grid: GridManager, index: int) -> tuple[int, int]:
+    """Row-major frame index -> (col, row)."""
+    return index % grid.config.cols, index // grid.config.cols
+
+
+def cell_to_index(grid: GridManager, cell: tuple[int, int]) -> int:
+    col, row = cell
+    return row * grid.config.cols + col
+
+
+def identity_order(grid: GridManager) -> list[int]:
+    return list(range(cell_count(grid)))
+
+
+def permute_cells(image: Image.Image, grid: GridManager, order: list[int | None]) -> Image.Image:
+    """Build a new sheet where destination frame i holds source frame order[i].
+
+    Frames are row-major indices. A source may appear several times (duplicate);
+    None or a missing tail entry leaves the destination cell transparent.
+    Cells of different size (non-uniform grids) are resized with LANCZOS.
+    """
+    return Image.fromarray(permute_pixels(np.asarray(image.convert("RGBA")), grid, order), "RGBA")
+
+
+def permute_pixels(src: np.ndarray, grid: GridManager, order: list[int | None]) -> np.ndarray:
+    """permute_cells on an (h, w, 4) uint8 array; returns a new array."""
+    out = np.zeros_like(src)
+    for dst_index in range(cell_count(grid)):
+        src_index = order[dst_index] if dst_index < len(order) else None
+        if src_index is None:
+            continue
+        dst = grid.cell_view(out, *index_to_cell(grid, dst_index))
+        cell = grid.cell_view(src, *index_to_cell(grid, src_index))
+        if cell.shape == dst.shape:
+            dst[:] = cell
+        else:
+            dh, dw = dst.shape[:2]
+            dst[:] = np.asarray(Image.fromarray(cell, "RGBA").resize((dw, dh), Image.LANCZOS))
+    return out
+
+
+def swap_pixels(pixels: np.ndarray, grid: GridManager,
+                cell_a: tuple[int, int], cell_b: tuple[int, int]):
+    """Swap two cells in place (cells of different size are resized, as in permute_cells)."""
+    a = grid.cell_view(pixels, *cell_a)
+    b = grid.cell_view(pixels, *cell_b)
+    if a.shape != b.shape:
+        pixels[:] = permute_pixels(pixels, grid, swap_order(grid, cell_a, cell_b))
+        return
+    tmp = a.copy()
+    a[:] = b
+    b[:] = tmp
+
+
+def shift_cell_pixels(pixels: np.ndarray, grid: GridManager, cell: tuple[int, int], dx: int, dy: int):
+    """Shift the content of one cell in place; what leaves the cell is clipped."""
+    view = grid.cell_view(pixels, *cell)
+    h, w = view.shape[:2]
+    shifted = np.zeros_like(view)
+    if abs(dx) < w and abs(dy) < h:
+        shifted[max(0, dy):h + min(0, dy), max(0, dx):w + min(0, dx)] = \
+            view[max(0, -dy):h - max(0, dy), max(0, -dx):w - max(0, dx)]
+    view[:] = shifted
+
+
+def scale_cell_contents(document: Document, grid: GridManager, cells, factor: float,
+                        executor=None) -> tuple[int, int, int, int] | None:
+    """Scale the content of each cell by factor about the cell centre (Lanczos).
+
+    All cells are sampled before any is written; they are composited top-to-bottom,
+    left-to-right so later cells overwrite earlier ones where scaled content spills.
+    Resizes run on executor if given. Returns the box written (None if no cells).
+    """
+    iw, ih = document.size
+    image = document.image
+    sorted_cells = sorted(cells, key=lambda c: (c[1], c[0]))
+    rects = [grid.cell_rect(iw, ih, col, row) for col, row in sorted_cells]
+    jobs = []
+    for x, y, w, h in rects:
+        args = (image.crop((x, y, x + w, y + h)).resize,
+                (max(1, int(w * factor)), max(1, int(h * factor))), Image.LANCZOS)
+        jobs.append(executor.submit(*args) if executor is not None else args)
+    dirty = None
+    for (x, y, w, h), job in zip(rects, jobs):
+        scaled = job.result() if executor is not None else job[0](*job[1:])
+        nw, nh = scaled.size
+        # erase the original cell area, then composite centred (clipped at sheet bounds)
+        document.clear((x, y, x + w, y + h))
+        written = document.composite(scaled, x + (w - nw) // 2, y + (h - nh) // 2)
+        for box in ((x, y, x + w, y + h), written):
+            if box is None:
+                continue
+            dirty = box if dirty is None else (min(dirty[0], box[0]), min(dirty[1], box[1]),
+                                               max(dirty[2], box[2]), max(dirty[3], box[3]))
+    return dirty
+
+
+def swap_order(grid: GridManager, cell_a: tuple[int, int], cell_b: tuple[int, int]) -> list[int]:
+    order = identity_order(grid)
+    a, b = cell_to_index(grid, cell_a), cell_to_index(grid, cell_b)
+    order[a], order[b] = order[b], order[a]
+    return order
+
+
+def reverse_order(order: list[int | None]) -> list[int | None]:
+    return list(reversed(order))
+
+
+def rotate_order(order: list[int | None], steps: int) -> list[int | None]:
+    """Rotate left by steps (negative rotates right)."""
+    if not order:
+        return []
+    steps %= len(order)
+    return order[steps:] + order[:steps]
+
+
+def duplicate_in_order(order: list[int | None], position: int) -> list[int | None]:
+    """Insert a copy of order[position] right after it; the last frame drops off."""
+    if not 0 <= position < len(order):
+        return list(order)
+    return (order[:position + 1] + [order[position]] + order[position + 1:])[:len(order)]
+
+
+# ----------------------------------------------------------------------
+# Re-layout (N x M grid -> other grid / strip)
+# ----------------------------------------------------------------------
+def fit_layout(frames: int, cols: int, rows: int) -> tuple[int, int]:
+    """Target layout for frames; cols or rows 0 means "as many as needed"
+    (cols=0, rows=1 is a horizontal strip, cols=1, rows=0 a vertical one)."""
+    frames = max(1, frames)
+    if cols <= 0 and rows <= 0:
+        cols = frames
+    if cols <= 0:
+        cols = -(-frames // rows)
+    if rows <= 0:
+        rows = -(-frames // cols)
+    return cols, rows
+
+
+def relayout_frames(grid: GridManager, counts: np.ndarray | None = None,
+                    skip_empty: bool = False) -> list[tuple[int, int]]:
+    """Source cells (col, row) in row-major order, without empty ones if skip_empty."""
+    cfg = grid.config
+    return [(c, r) for r in range(cfg.rows) for c in range(cfg.cols)
+            if not skip_empty or counts is None or counts[r, c]]
+
+
+def relayout_pixels(src: np.ndarray, grid: GridManager, cols: int, rows: int,
+                    padding: int = 0, trim: bool = False, skip_empty: bool = False,
+                    content: tuple[np.ndarray, np.ndarray] | None = None
+                    ) -> tuple[np.ndarray, tuple[int, int]]:
+    """Build a sheet of cols x rows frames from the cells of src in one allocation;
+    returns it with the final (cols, rows) (a 0 is resolved as in fit_layout).
+
+    Frames keep row-major order; frames beyond cols * rows are dropped. Every frame
+    slot is the size of the largest cell, or with trim the union of all cells'
+    content bboxes (cell-relative, so frames stay aligned to each other), plus
+    padding transparent pixels on each side, so the result divides evenly into
+    a cols x rows grid. content = (boxes, counts) as from content_boxes; computed
+    when trim / skip_empty need it and it is not given.
+    """
+    ih, iw = src.shape[:2]
+    if (trim or skip_empty) and content is None:
+        content = content_boxes(src[..., 3], grid)
+    boxes, counts = content if content is not None else (None, None)
+    frames = relayout_frames(grid, counts, skip_empty)
+    cols, rows = fit_layout(len(frames), cols, rows)
+    frames = frames[:cols * rows]
+    rects = {cell: grid.cell_rect(iw, ih, *cell) for cell in frames}
+
+    # region of each cell copied into its slot, relative to the cell origin
+    fw = max((w for _, _, w, _ in rects.values()), default=1)
+    fh = max((h for _, _, _, h in rects.values()), default=1)
+    ux0, uy0, ux1, uy1 = 0, 0, fw, fh
+    if trim:
+        rel = []
+        for (c, r), (x, y, _, _) in rects.items():
+            if counts[r, c]:
+                x0, y0, x1, y1 = (int(v) for v in boxes[r, c])
+                rel.append((x0 - x, y0 - y, x1 - x, y1 - y))
+        if rel:
+            ux0, uy0 = min(b[0] for b in rel), min(b[1] for b in rel)
+            ux1, uy1 = max(b[2] for b in rel), max(b[3] for b in rel)
+    sw, sh = ux1 - ux0 + 2 * padding, uy1 - uy0 + 2 * padding
+
+    out = np.zeros((rows * sh, cols * sw, 4), dtype=np.uint8)
+    for i, (col, row) in enumerate(frames):
+        view = grid.cell_view(src, col, row)[uy0:uy1, ux0:ux1]
+        h, w = view.shape[:2]
+        ox = (i % cols) * sw + padding
+        oy = (i // cols) * sh + padding
+        out[oy:oy + h, ox:ox + w] = view
+    return out, (cols, rows)
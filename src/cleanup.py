@@ -0,0 +1,169 @@
+"""Sheet cleanup passes on RGBA arrays (no Qt required)."""
+from __future__ import annotations
+import numpy as np
+from PIL import Image
+from .grid import GridManager
+from .labeling import label
+from .resample import get_thread_executor
+
+_NEIGHBOURS = [(dy, dx) for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx]
+
+
+def color_distance(rgba: np.ndarray, color) -> np.ndarray:
+    """Per-pixel max |channel - color| over RGB, as uint8 (no widening to int16)."""
+    dist = None
+    for k in range(3):
+        ch = rgba[..., k]
+        c = np.uint8(color[k])
+        d = np.maximum(ch, c) - np.minimum(ch, c)
+        dist = d if dist is None else np.maximum(dist, d)
+    return dist
+
+
+def cell_border_mask(grid: GridManager, width: int, height: int) -> np.ndarray:
+    """True on the outermost pixel ring of every cell."""
+    border = np.zeros((height, width), dtype=bool)
+    for col in range(grid.config.cols):
+        x, _, w, _ = grid.cell_rect(width, height, col, 0)
+        border[:, [x, x + w - 1]] = True
+    for row in range(grid.config.rows):
+        _, y, _, h = grid.cell_rect(width, height, 0, row)
+        border[[y, y + h - 1], :] = True
+    return border
+
+
+def sample_background(image: Image.Image) -> tuple[int, int, int]:
+    """Most common colour among the four sheet corners (a reasonable key default)."""
+    w, h = image.size
+    rgb = image.convert("RGB")
+    corners = [rgb.getpixel(p) for p in ((0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1))]
+    return max(corners, key=corners.count)
+
+
+def remove_background(image: Image.Image, grid: GridManager, color, tolerance: int = 24,
+                      from_borders: bool = True, feather: int = 0) -> Image.Image:
+    """Key out color in one vectorized pass over the whole sheet.
+
+    Pixels within tolerance of color become transparent. With from_borders only
+    regions connected to a cell border are keyed, so enclosed areas of the same
+    colour (eye highlights, white clothing) survive. feather > 0 fades alpha over
+    the next feather levels of colour distance instead of a hard cut.
+    """
+    rgba = np.array(image.convert("RGBA"))
+    key_background(rgba, grid, color, tolerance, from_borders, feather)
+    return Image.fromarray(rgba, "RGBA")
+
+
+def key_background(rgba: np.ndarray, grid: GridManager, color, tolerance: int = 24,
+                   from_borders: bool = True, feather: int = 0):
+    """In-place remove_background on an (h, w, 4) uint8 array."""
+    dist = color_distance(rgba, color)
+    reach = dist <= min(255, tolerance + feather)
+    if from_borders:
+        labels, n = label(reach)
+        h, w = reach.shape
+        seeds = np.unique(labels[cell_border_mask(grid, w, h)])
+        keep = np.zeros(n + 1, dtype=bool)
+        keep[seeds] = True
+        keep[0] = False
+        reach = keep[labels]
+    if feather > 0:
+        # linear ramp: 0 at tolerance, full alpha at tolerance + feather
+        ramp = np.clip((dist[reach].astype(np.float32) - tolerance) / feather, 0.0, 1.0)
+        rgba[..., 3][reach] = (rgba[..., 3][reach] * ramp).astype(np.uint8)
+    else:
+        rgba[..., 3][reach] = 0
+
+
+def _shifted(a: np.ndarray, dy: int, dx: int, fill) -> np.ndarray:
+    """a moved by (dy, dx) within its own bounds; vacated pixels get fill."""
+    out = np.full_like(a, fill)
+    h, w = a.shape[:2]
+    out[max(0, dy):h + min(0, dy), max(0, dx):w + min(0, dx)] = \
+        a[max(0, -dy):h + min(0, -dy), max(0, -dx):w + min(0, -dx)]
+    return out
+
+
+def _erode_alpha(rgba: np.ndarray, steps: int):
+    for _ in range(steps):
+        alpha = rgba[..., 3]
+        low = alpha.copy()
+        for dy, dx in _NEIGHBOURS:
+            # outside the cell counts as opaque so edge-touching art is not shaved
+            np.minimum(low, _shifted(alpha, dy, dx, 255), out=low)
+        rgba[..., 3] = low
+
+
+def _dilate_alpha(rgba: np.ndarray, steps: int):
+    """Grow alpha by one pixel per step. Pixels that had some alpha keep their
+    colour and only gain opacity; newly grown (alpha 0) pixels take the colour of
+    their most opaque neighbour, never the hidden background RGB.
+
+    On the little-endian uint32 view alpha is the most significant byte, so a
+    max filter over packed neighbours picks the most opaque one whole.
+    """
+    packed = rgba.view(np.uint32)[..., 0]
+    alpha = rgba[..., 3]
+    for _ in range(steps):
+        best = np.zeros_like(packed)
+        for dy, dx in _NEIGHBOURS:
+            np.maximum(best, _shifted(packed, dy, dx, 0), out=best)
+        best_alpha = (best >> 24).astype(np.uint8)
+        grown = (alpha == 0) & (best_alpha > 0)
+        np.maximum(alpha, best_alpha, out=alpha)
+        packed[grown] = best[grown]
+
+
+def unmix_table(bg_color) -> np.ndarray:
+    """(3, 256, 256) uint8 table: lut[k, a, c] = foreground channel k of a pixel
+    showing c at alpha a over bg_color. Rows a = 0 and 255 are the identity."""
+    a = np.arange(256, dtype=np.float32)[:, None] / 255.0
+    c = np.arange(256, dtype=np.float32)[None, :]
+    lut = np.empty((3, 256, 256), dtype=np.uint8)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for k in range(3):
+            f = (c - (1.0 - a) * float(bg_color[k])) / a
+            lut[k] = np.clip(np.nan_to_num(f), 0, 255).round()
+    lut[:, 0, :] = lut[:, 255, :] = np.arange(256, dtype=np.uint8)
+    return lut
+
+
+def defringe_cell(rgba: np.ndarray, alpha_threshold: int = 16, unmix: np.ndarray | None = None,
+                  grow: int = 0):
+    """Clean one cell's (h, w, 4) uint8 array in place.
+
+    1. alpha below alpha_threshold becomes 0 (near-invisible noise);
+    2. with an unmix_table(B), semi-transparent pixels are un-mixed from the
+       background colour B: C = a*F + (1-a)*B  ->  F = (C - (1-a)*B) / a;
+    3. grow < 0 erodes, grow > 0 dilates the alpha by |grow| pixels.
+    """
+    alpha = rgba[..., 3]
+    alpha[alpha < alpha_threshold] = 0
+    if unmix is not None:
+        row = alpha.astype(np.intp) << 8
+        for k in range(3):
+            rgba[..., k] = unmix[k].reshape(-1)[row | rgba[..., k]]
+    if grow < 0:
+        _erode_alpha(rgba, -grow)
+    elif grow > 0:
+        _dilate_alpha(rgba, grow)
+    return rgba
+
+
+def defringe(image: Image.Image, grid: GridManager, alpha_threshold: int = 16,
+             bg_color=None, grow: int = 0) -> Image.Image:
+    """Run defringe_cell on every cell in parallel (cells never bleed into each other)."""
+    rgba = np.array(image.convert("RGBA"))
+    defringe_cells(rgba, grid, alpha_threshold, bg_color, grow)
+    return Image.fromarray(rgba, "RGBA")
+
+
+def defringe_cells(rgba: np.ndarray, grid: GridManager, alpha_threshold: int = 16,
+                   bg_color=None, grow: int = 0):
+    """In-place defringe on an (h, w, 4) uint8 array, one cell view per task."""
+    views = [grid.cell_view(rgba, col, row)
+             for row in range(grid.config.rows) for col in range(grid.config.cols)]
+    unmix = unmix_table(bg_color) if bg_color is not None else None
+    executor = get_thread_executor()
+    for fut in [executor.submit(defringe_cell, v, alpha_threshold, unmix, grow) for v in views]:
+        fut.result()
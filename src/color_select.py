@@ -0,0 +1,75 @@
+"""Tolerance masks for magic-wand and colour-range selection (no Qt required)."""
+from __future__ import annotations
+import numpy as np
+from .labeling import component_runs, paint_component
+
+
+_CHUNK_BYTES = 1 << 18   # rows per pass sized to stay in cache
+WAND_BAND = 32           # first half-height of the rows a contiguous wand labels
+WAND_BAND_GROWTH = 8
+
+
+def color_mask(rgba: np.ndarray, color, tolerance: int) -> np.ndarray:
+    """Pixels of an (h, w, 4) uint8 array whose every channel is within tolerance of color.
+
+    A fully transparent color matches on alpha alone, so every invisible pixel
+    counts as the same background whatever its hidden RGB.
+    """
+    h, w = rgba.shape[:2]
+    c = np.asarray(color, dtype=np.int16)[:4]
+    tolerance = max(0, int(tolerance))
+    lo = np.clip(c - tolerance, 0, 255)
+    span = np.clip(c + tolerance, 0, 255) - lo
+    if int(c[3]) == 0:
+        lo[:3], span[:3] = 0, 255
+    # one contiguous pass per row band over interleaved channels: uint8 wraparound
+    # turns lo <= v <= hi into (v - lo) <= span, and the four per-channel results
+    # of a pixel are read back as one uint32
+    lo = np.tile(lo.astype(np.uint8), w)
+    span = np.tile(span.astype(np.uint8), w)
+    out = np.empty((h, w), dtype=bool)
+    chunk = max(1, _CHUNK_BYTES // (w * 4))
+    buf = np.empty((chunk, w * 4), dtype=np.uint8)
+    for y0 in range(0, h, chunk):
+        y1 = min(h, y0 + chunk)
+        d = buf[:y1 - y0]
+        np.subtract(rgba[y0:y1].reshape(y1 - y0, w * 4), lo, out=d)
+        np.less_equal(d, span, out=d.view(bool))
+        np.equal(d.view(np.uint32), 0x01010101, out=out[y0:y1])
+    return out
+
+
+def magic_wand(rgba: np.ndarray, x: int, y: int, tolerance: int,
+               contiguous: bool = True) -> np.ndarray:
+    """Bool mask of pixels matching the color at (x, y).
+
+    contiguous=True keeps only the 8-connected region around the seed;
+    False selects the color range everywhere in rgba.
+
+    The contiguous region is labelled in a band of rows around the seed that
+    grows only while the region reaches the band's top or bottom row, and the
+    colour test runs once per row as the band takes it in, so a small sprite
+    on a large sheet costs about its own height.
+    """
+    color = rgba[y, x].copy()
+    if not contiguous:
+        return color_mask(rgba, color, tolerance)
+    h = rgba.shape[0]
+    mask = np.empty(rgba.shape[:2], dtype=bool)
+    top, bottom, half = y, y, WAND_BAND
+    while True:
+        new_top, new_bottom = max(0, y - half), min(h, y + 1 + half)
+        mask[new_top:top] = color_mask(rgba[new_top:top], color, tolerance)
+        mask[bottom:new_bottom] = color_mask(rgba[bottom:new_bottom], color, tolerance)
+        top, bottom = new_top, new_bottom
+        runs = component_runs(mask[top:bottom], x, y - top)
+        rows = runs[0]
+        if (top == 0 or rows.min() > 0) and (bottom == h or rows.max() < bottom - top - 1):
+            break
+        half *= WAND_BAND_GROWTH
+    band = mask[top:bottom]
+    if top == 0 and bottom == h:
+        return paint_component(mask.shape, runs, band)
+    out = np.zeros(rgba.shape[:2], dtype=bool)
+    out[top:bottom] = paint_component(band.shape, runs, band)
+    return out
@@ -0,0 +1,93 @@
+"""Canonical pixel storage of an open sprite sheet (no Qt required)."""
+from __future__ import annotations
+import numpy as np
+from PIL import Image
+
+
+def to_pixels(image: Image.Image) -> np.ndarray:
+    """Writable, C-contiguous (h, w, 4) uint8 copy of image as RGBA."""
+    return np.array(image.convert("RGBA"), dtype=np.uint8, order="C")
+
+
+class Document:
+    """A sprite sheet held as one C-contiguous (h, w, 4) uint8 RGBA array.
+
+    Edits are slice assignments on pixels (or on views of it, see
+    GridManager.cell_view). image is a read-only PIL view over the same
+    buffer for the Pillow functions that need one; it never copies.
+    """
+
+    def __init__(self, pixels: np.ndarray):
+        self._pixels = pixels
+        self._image: Image.Image | None = None
+
+    @classmethod
+    def from_image(cls, image: Image.Image) -> Document:
+        return cls(to_pixels(image))
+
+    @classmethod
+    def open(cls, path: str) -> Document:
+        with Image.open(path) as im:
+            return cls.from_image(im)
+
+    # -- access ---------------------------------------------------------
+    @property
+    def pixels(self) -> np.ndarray:
+        return self._pixels
+
+    @property
+    def size(self) -> tuple[int, int]:
+        h, w = self._pixels.shape[:2]
+        return w, h
+
+    @property
+    def image(self) -> Image.Image:
+        """PIL view sharing the pixel buffer (read-only: writes go through pixels)."""
+        if self._image is None:
+            h, w = self._pixels.shape[:2]
+            self._image = Image.frombuffer("RGBA", (w, h), self._pixels, "raw", "RGBA", 0, 1)
+        return self._image
+
+    def view(self, box: tuple[int, int, int, int]) -> np.ndarray:
+        """Writable view of box (x0, y0, x1, y1); the box must lie inside the sheet."""
+        x0, y0, x1, y1 = box
+        return self._pixels[y0:y1, x0:x1]
+
+    def replace(self, pixels: np.ndarray):
+        """Swap in a new buffer (size changes, whole-sheet results, full undo)."""
+        self._pixels = np.ascontiguousarray(pixels, dtype=np.uint8)
+        self._image = None
+
+    # -- edits ----------------------------------------------------------
+    def clear(self, box: tuple[int, int, int, int]):
+        self.view(box)[:] = 0
+
+    def composite(self, layer: Image.Image, x: int, y: int) -> tuple[int, int, int, int] | None:
+        """alpha_composite layer over the sheet at (x, y), clipped to the sheet.
+        Returns the box written, or None when nothing overlaps."""
+        iw, ih = self.size
+        lw, lh = layer.size
+        px, py = max(0, x), max(0, y)
+        px2, py2 = min(iw, x + lw), min(ih, y + lh)
+        if px >= px2 or py >= py2:
+            return None
+        box = (px, py, px2, py2)
+        dst = self.view(box)
+        src = layer.crop((px - x, py - y, px2 - x, py2 - y))
+        dst[:] = np.asarray(Image.alpha_composite(Image.fromarray(dst, "RGBA"), src))
+        return box
+
+    def flip_horizontal(self, box: tuple[int, int, int, int] | None = None):
+        """Mirror the whole sheet, or the pixels inside box about its centre.
+        A box partly outside the sheet mirrors as if padded with transparency."""
+        if box is None:
+            self._pixels[:] = self._pixels[:, ::-1]
+            return
+        iw, ih = self.size
+        x0, y0, x1, y1 = box
+        cx0, cy0, cx1, cy1 = max(0, x0), max(0, y0), min(iw, x1), min(ih, y1)
+        if cx0 >= cx1 or cy0 >= cy1:
+            return
+        full = np.zeros((cy1 - cy0, x1 - x0, 4), dtype=np.uint8)
+        full[:, cx0 - x0:cx1 - x0] = self._pixels[cy0:cy1, cx0:cx1]
+        self._pixels[cy0:cy1, cx0:cx1] = full[:, ::-1][:, cx0 - x0:cx1 - x0]
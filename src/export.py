@@ -1,23 +1,90 @@
 import os
 from pathlib import Path
+import numpy as np
 from PIL import Image
 from .grid import GridManager
+from .resample import TiledResizeJob, CellResizeJob
+from .analysis import DuplicateDetector, DUPLICATE_DISTANCE
 
 
-def export_cells(image: Image.Image, grid: GridManager, output_dir: str, base_name: str):
-    """Export each cell as individual PNG files."""
+# ----------------------------------------------------------------------
+# Palette (indexed) PNG
+# ----------------------------------------------------------------------
+PALETTE_MODES = ("off", "lossless", "quantize")   # off = always 32-bit RGBA
+
+
+def _palette_indices(pixels: np.ndarray, colors: np.ndarray) -> np.ndarray:
+    """Index of each packed RGBA pixel in colors (all pixels known to be in colors).
+
+    Uses the smallest modulus that separates the palette as a perfect hash, so
+    the lookup is one vectorized mod and gather instead of a per-pixel search.
+    """
+    n = len(colors)
+    modulus = max(n, 2)
+    while len(np.unique(colors % modulus)) != n:
+        modulus += 1
+    lut = np.zeros(modulus, dtype=np.uint8)
+    lut[colors % modulus] = np.arange(n, dtype=np.uint8)
+    return lut[pixels % np.uint32(modulus)]
+
+
+def to_palette_image(image: Image.Image, quantize: bool = False,
+                     dither: bool = True) -> Image.Image | None:
+    """Indexed 'P' copy of image with per-entry alpha (written as tRNS).
+
+    Lossless when the image has at most 256 RGBA colours. Otherwise it is
+    quantized to 256 colours (optionally Floyd-Steinberg dithered) if quantize,
+    else None is returned.
+    """
+    rgba = image.convert("RGBA")
+    counted = rgba.getcolors(256)   # C-side count, stops early past 256
+    if counted is None:
+        if not quantize:
+            return None
+        dither_mode = Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE
+        return rgba.quantize(256, method=Image.Quantize.FASTOCTREE, dither=dither_mode)
+    arr = np.ascontiguousarray(np.asarray(rgba))
+    pixels = arr.view(np.uint32).reshape(arr.shape[:2])
+    colors = np.array([c for _, c in counted], dtype=np.uint8).view(np.uint32).reshape(-1)
+    # opaque entries last keeps the tRNS chunk short
+    alpha = colors.view(np.uint8).reshape(-1, 4)[:, 3]
+    colors = colors[np.argsort(alpha == 255, kind="stable")]
+    out = Image.fromarray(_palette_indices(pixels, colors), "P")
+    out.putpalette(colors.view(np.uint8).tobytes(), rawmode="RGBA")
+    return out
+
+
+def save_png(image: Image.Image, path: str, palette: str = "off", dither: bool = True):
+    """Save as PNG; palette mode "lossless" / "quantize" writes an indexed PNG when possible."""
+    if palette != "off":
+        indexed = to_palette_image(image, quantize=palette == "quantize", dither=dither)
+        if indexed is not None:
+            indexed.save(path, optimize=True)
+            return
+    image.save(path)
+
+
+def export_cells(image: Image.Image, grid: GridManager, output_dir: str, base_name: str,
+                 dedupe: bool = False, max_distance: int = DUPLICATE_DISTANCE,
+                 palette: str = "off", dither: bool = True):
+    """Export each cell as individual PNG files.
+    dedupe=True skips cells that near-duplicate an earlier (row-major) cell;
+    palette / dither are passed to save_png per cell."""
     iw, ih = image.size
     cfg = grid.config
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     stem = Path(base_name).stem
+    skip = DuplicateDetector(grid, max_distance).redundant_cells(image) if dedupe else set()
     exported = []
     for row in range(cfg.rows):
         for col in range(cfg.cols):
+            if (col, row) in skip:
+                continue
             x, y, w, h = grid.cell_rect(iw, ih, col, row)
             cell = image.crop((x, y, x + w, y + h))
             filename = f"{stem}_{row}_{col}.png"
             path = os.path.join(output_dir, filename)
-            cell.save(path)
+            save_png(cell, path, palette, dither)
             exported.append(path)
     return exported
 
@@ -31,5 +98,14 @@ RESIZE_PRESETS = [
 ]
 
 
-def resize_image(image: Image.Image, width: int, height: int) -> Image.Image:
-    return image.resize((width, height), Image.LANCZOS)
+def resize_image(image: Image.Image, width: int, height: int,
+                 progress=None, cancelled=None) -> Image.Image | None:
+    """Lanczos resize, tiled across worker processes for large outputs.
+    Returns None if cancelled() became True before completion."""
+    return TiledResizeJob(image, width, height).run(progress, cancelled)
+
+
+def resize_image_per_cell(image: Image.Image, grid: GridManager, width: int, height: int,
+                          progress=None, cancelled=None) -> Image.Image | None:
+    """Resize every cell independently into its cell of the target sheet (no cross-cell bleed)."""
+    return CellResizeJob(image, grid, width, height).run(progress, cancelled)
@@ -0,0 +1,204 @@
+from __future__ import annotations
+import os
+from concurrent.futures import Future
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem, QListView,
+    QPushButton, QLabel, QFileDialog, QScrollArea, QCheckBox
+)
+from PyQt6.QtCore import Qt, QSize, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QPixmap
+from .canvas import pil_to_qimage
+from .thumbnails import (
+    THUMB_SIZE, STRIP_CELL, ThumbnailCache, ThumbnailJob, get_thumbnail_executor
+)
+from .watch import IMAGE_EXTENSIONS, POLL_INTERVAL, FolderWatcher, SheetPreparer, PreparedSheet
+
+
+class FolderBrowser(QWidget):
+    """Thumbnails of every sheet in a folder (decoded in the background and cached
+    on disk) plus a per-cell strip of the selected sheet. Double-click opens it.
+
+    With 監視 on, sheets that appear in the folder are added as they arrive and
+    decoded / analysed in the background, so opening one adopts the prepared
+    result instead of loading from disk (see take_prepared)."""
+
+    open_requested = pyqtSignal(str)
+
+    def __init__(self, grid_config, parent=None):
+        """grid_config() -> GridConfig of the current document, used to cut the
+        strip preview and to pre-analyse watched sheets."""
+        super().__init__(parent)
+        self._grid_config = grid_config
+        self._cache = ThumbnailCache()
+        self._watcher: FolderWatcher | None = None
+        self._preparer = SheetPreparer(self._cache)
+        self._watch_timer = QTimer(self)
+        self._watch_timer.setInterval(int(POLL_INTERVAL * 1000))
+        self._watch_timer.timeout.connect(self._poll_watch)
+        self._folder: str | None = None
+        self._items: dict[str, QListWidgetItem] = {}
+        self._job: ThumbnailJob | None = None
+        self._strip_future: Future | None = None   # strip of the current item (latest wins)
+        self._timer = QTimer(self)
+        self._timer.setInterval(50)
+        self._timer.timeout.connect(self._poll)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        top = QHBoxLayout()
+        self._folder_label = QLabel("フォルダ未選択")
+        self._folder_label.setStyleSheet("color: #aaa;")
+        top.addWidget(self._folder_label, 1)
+        btn_pick = QPushButton("フォルダ...")
+        btn_pick.clicked.connect(self._pick_folder)
+        top.addWidget(btn_pick)
+        btn_reload = QPushButton("更新")
+        btn_reload.clicked.connect(lambda: self.set_folder(self._folder))
+        top.addWidget(btn_reload)
+        self._chk_watch = QCheckBox("監視")
+        self._chk_watch.setToolTip("フォルダに追加されたシートを自動で読み込み、事前に解析します")
+        self._chk_watch.toggled.connect(self._on_watch_toggled)
+        top.addWidget(self._chk_watch)
+        layout.addLayout(top)
+
+        self._list = QListWidget()
+        self._list.setViewMode(QListView.ViewMode.IconMode)
+        self._list.setResizeMode(QListView.ResizeMode.Adjust)
+        self._list.setMovement(QListView.Movement.Static)
+        self._list.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self._list.setGridSize(QSize(THUMB_SIZE + 16, THUMB_SIZE + 32))
+        self._list.setUniformItemSizes(True)
+        self._list.itemActivated.connect(self._on_activated)
+        self._list.currentItemChanged.connect(self._on_current_changed)
+        layout.addWidget(self._list, 1)
+
+        self._strip_label = QLabel()
+        self._strip_label.setMinimumHeight(STRIP_CELL)
+        strip_scroll = QScrollArea()
+        strip_scroll.setWidget(self._strip_label)
+        strip_scroll.setWidgetResizable(True)
+        strip_scroll.setFixedHeight(STRIP_CELL + 24)
+        strip_scroll.setVerticalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        layout.addWidget(strip_scroll)
+
+    # ------------------------------------------------------------------
+    # Folder
+    # ------------------------------------------------------------------
+    def _pick_folder(self):
+        folder = QFileDialog.getExistingDirectory(self, "フォルダを選択", self._folder or "")
+        if folder:
+            self.set_folder(folder)
+
+    def set_folder(self, folder: str | None):
+        """List the sheets in folder; thumbnails fill in as the workers finish."""
+        if self._job:
+            self._job.cancel()
+            self._job = None
+        self._list.clear()
+        self._items.clear()
+        self._strip_label.clear()
+        self._folder = os.path.abspath(folder) if folder else None
+        folder = self._folder
+        self._preparer.cancel()
+        self._restart_watch()
+        if not folder:
+            return
+        self._folder_label.setText(os.path.basename(folder) or folder)
+        self._folder_label.setToolTip(folder)
+        try:
+            names = sorted(e.name for e in os.scandir(folder)
+                           if e.is_file() and e.name.lower().endswith(IMAGE_EXTENSIONS))
+        except OSError:
+            names = []
+        for name in names:
+            self._add_item(os.path.join(folder, name))
+        self._job = ThumbnailJob(self._cache, list(self._items))
+        self._job.start()
+        self._timer.start()
+
+    def _add_item(self, path: str) -> QListWidgetItem:
+        item = QListWidgetItem(os.path.basename(path))
+        item.setData(Qt.ItemDataRole.UserRole, path)
+        item.setToolTip(path)
+        self._list.addItem(item)
+        self._items[path] = item
+        return item
+
+    # ------------------------------------------------------------------
+    # Watch mode
+    # ------------------------------------------------------------------
+    def _on_watch_toggled(self, _checked: bool):
+        self._restart_watch()
+
+    def _restart_watch(self):
+        self._watcher = None
+        self._watch_timer.stop()
+        if self._chk_watch.isChecked() and self._folder:
+            self._watcher = FolderWatcher(self._folder)
+            self._watch_timer.start()
+
+    def _poll_watch(self):
+        if self._watcher is None:
+            return
+        for path in self._watcher.poll():
+            item = self._items.get(path) or self._add_item(path)
+            item.setText(os.path.basename(path) + "\n(解析中)")
+            self._preparer.submit(path, self._grid_config())
+        self._timer.start()
+
+    def take_prepared(self, path: str) -> PreparedSheet | None:
+        """Pre-analysed sheet for path if watch mode prepared it and it is unchanged."""
+        return self._preparer.take(path)
+
+    # ------------------------------------------------------------------
+    # Background results
+    # ------------------------------------------------------------------
+    def _poll(self):
+        if self._job:
+            for path, image in self._job.poll():
+                item = self._items.get(path)
+                if item is None:
+                    continue
+                if image is None:
+                    item.setText(item.text() + "\n(読み込み不可)")
+                else:
+                    item.setIcon(QIcon(QPixmap.fromImage(pil_to_qimage(image))))
+            if self._job.done >= self._job.total:
+                self._job = None
+        for path, sheet in self._preparer.poll():
+            item = self._items.get(path)
+            if item is None:
+                continue
+            if sheet is None:
+                item.setText(os.path.basename(path) + "\n(読み込み不可)")
+            else:
+                item.setText(os.path.basename(path))
+                item.setIcon(QIcon(QPixmap.fromImage(pil_to_qimage(sheet.thumbnail))))
+        if self._strip_future is not None and self._strip_future.done():
+            fut, self._strip_future = self._strip_future, None
+            try:
+                strip = fut.result()
+            except (OSError, ValueError):
+                strip = None
+            if strip is not None:
+                self._strip_label.setPixmap(QPixmap.fromImage(pil_to_qimage(strip)))
+        if self._job is None and self._strip_future is None and not self._preparer.busy:
+            self._timer.stop()
+
+    def _on_current_changed(self, item: QListWidgetItem | None, _previous=None):
+        self._strip_label.clear()
+        if item is None:
+            return
+        path = item.data(Qt.ItemDataRole.UserRole)
+        cfg = self._grid_config()
+        cols, rows = cfg.cols, cfg.rows
+        self._strip_future = get_thumbnail_executor().submit(self._cache.strip, path, cols, rows)
+        self._timer.start()
+
+    def refresh_strip(self):
+        """Re-cut the strip of the selected sheet (grid layout changed)."""
+        self._on_current_changed(self._list.currentItem())
+
+    def _on_activated(self, item: QListWidgetItem):
+        self.open_requested.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -0,0 +1,128 @@
+from __future__ import annotations
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QListWidget, QListWidgetItem,
+    QPushButton, QAbstractItemView, QListView, QLabel
+)
+from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtGui import QIcon, QColor
+from .cell_ops import (
+    index_to_cell, cell_to_index, identity_order, reverse_order, rotate_order, duplicate_in_order
+)
+
+THUMB_SIZE = 64
+# background tints for near-duplicate groups (cycled)
+DUPLICATE_COLORS = [QColor(255, 170, 0, 90), QColor(0, 200, 255, 90), QColor(255, 80, 200, 90),
+                    QColor(120, 255, 80, 90)]
+
+
+class FramePanel(QWidget):
+    """Frame strip: drag thumbnails into a new order, then apply it in one pass."""
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self._canvas = canvas
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(4, 4, 4, 4)
+
+        # list mode laid out as a strip: a drop moves the model row, which order() reads
+        # (icon mode would let thumbnails be dropped at free positions instead)
+        self._list = QListWidget()
+        self._list.setViewMode(QListView.ViewMode.ListMode)
+        self._list.setFlow(QListView.Flow.LeftToRight)
+        self._list.setWrapping(False)
+        self._list.setIconSize(QSize(THUMB_SIZE, THUMB_SIZE))
+        self._list.setDragDropMode(QAbstractItemView.DragDropMode.InternalMove)
+        self._list.setDefaultDropAction(Qt.DropAction.MoveAction)
+        self._list.setDropIndicatorShown(True)
+        self._list.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self._list.setFixedHeight(THUMB_SIZE + 44)
+        layout.addWidget(self._list)
+
+        btn_row = QHBoxLayout()
+        for label, slot in (
+            ("⇆ 逆順", self._reverse),
+            ("◀ 左へ回転", lambda: self._rotate(1)),
+            ("右へ回転 ▶", lambda: self._rotate(-1)),
+            ("複製", self._duplicate),
+            ("リセット", self.rebuild),
+        ):
+            btn = QPushButton(label)
+            btn.clicked.connect(slot)
+            btn_row.addWidget(btn)
+        btn_row.addStretch()
+        self._dup_label = QLabel()
+        self._dup_label.setStyleSheet("color: #aaa;")
+        btn_row.addWidget(self._dup_label)
+        btn_apply = QPushButton("適用")
+        btn_apply.clicked.connect(self._apply)
+        btn_row.addWidget(btn_apply)
+        layout.addLayout(btn_row)
+
+    # ------------------------------------------------------------------
+    # Order <-> list items
+    # ------------------------------------------------------------------
+    def order(self) -> list[int | None]:
+        return [self._list.item(i).data(Qt.ItemDataRole.UserRole) for i in range(self._list.count())]
+
+    def _duplicate_groups(self) -> dict[int, tuple[int, list[int]]]:
+        """{frame index: (group number, frame indices of its group)} for near-duplicates."""
+        grid = self._canvas.grid
+        groups = {}
+        for n, cells in enumerate(self._canvas.duplicates.clusters(self._canvas.document)):
+            indices = [cell_to_index(grid, c) for c in cells]
+            for i in indices:
+                groups[i] = (n, indices)
+        return groups
+
+    def _set_order(self, order: list[int | None]):
+        self._list.clear()
+        if not self._canvas.image:
+            self._dup_label.clear()
+            return
+        groups = self._duplicate_groups()
+        n_groups = len({n for n, _ in groups.values()})
+        self._dup_label.setText(f"重複候補: {n_groups} グループ" if n_groups else "")
+        for src_index in order:
+            item = QListWidgetItem(f"{src_index + 1}" if src_index is not None else "-")
+            item.setData(Qt.ItemDataRole.UserRole, src_index)
+            if src_index is not None:
+                pix = self._canvas.cell_pixmap(*index_to_cell(self._canvas.grid, src_index))
+                item.setIcon(QIcon(pix.scaled(
+                    THUMB_SIZE, THUMB_SIZE, Qt.AspectRatioMode.KeepAspectRatio,
+                    Qt.TransformationMode.SmoothTransformation)))
+                if src_index in groups:
+                    n, members = groups[src_index]
+                    item.setBackground(DUPLICATE_COLORS[n % len(DUPLICATE_COLORS)])
+                    item.setToolTip("重複候補: " + ", ".join(str(i + 1) for i in members))
+            self._list.addItem(item)
+
+    def set_canvas(self, canvas):
+        """Follow another document (tab switch); the caller rebuilds."""
+        self._canvas = canvas
+
+    def rebuild(self):
+        """Reset to the sheet's current frame order (called on image/grid change)."""
+        self._set_order(identity_order(self._canvas.grid) if self._canvas.image else [])
+
+    # ------------------------------------------------------------------
+    # Edits
+    # ------------------------------------------------------------------
+    def _reverse(self):
+        self._set_order(reverse_order(self.order()))
+
+    def _rotate(self, steps: int):
+        self._set_order(rotate_order(self.order(), steps))
+
+    def _duplicate(self):
+        row = self._list.currentRow()
+        if row < 0:
+            return
+        self._set_order(duplicate_in_order(self.order(), row))
+        self._list.setCurrentRow(row + 1)
+
+    def _apply(self):
+        order = self.order()
+        if order == identity_order(self._canvas.grid):
+            return
+        self._canvas.reorder_cells(order)
@@ -37,6 +37,12 @@ class GridManager:
         h = image_h - y if row == self.config.rows - 1 else ch
         return x, y, w, h
 
+    def cell_view(self, pixels, col: int, row: int):
+        """Zero-copy view of one cell of an (h, w, 4) pixel array (writes go to the sheet)."""
+        ih, iw = pixels.shape[:2]
+        x, y, w, h = self.cell_rect(iw, ih, col, row)
+        return pixels[y:y + h, x:x + w]
+
     def cell_at(self, image_w: int, image_h: int, px: int, py: int) -> tuple[int, int] | None:
         """Returns (col, row) for the given pixel position, or None if out of bounds."""
         if px < 0 or py < 0 or px >= image_w or py >= image_h:
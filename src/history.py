@@ -1,33 +1,130 @@
-from PIL import Image
+import numpy as np
+
+
+def is_regions(box) -> bool:
+    """box is a tuple of boxes (a push_regions entry) rather than one box."""
+    return box is not None and len(box) > 0 and not isinstance(box[0], (int, np.integer))
+
+
+def bounds(box) -> tuple[int, int, int, int] | None:
+    if not is_regions(box):
+        return box
+    return (min(b[0] for b in box), min(b[1] for b in box),
+            max(b[2] for b in box), max(b[3] for b in box))
+
+
+def _gather(pixels: np.ndarray, regions) -> np.ndarray:
+    return np.concatenate([pixels[y0:y1, x0:x1].reshape(-1) for x0, y0, x1, y1 in regions])
+
+
+def _scatter(pixels: np.ndarray, regions, flat: np.ndarray):
+    offset = 0
+    for x0, y0, x1, y1 in regions:
+        view = pixels[y0:y1, x0:x1]
+        view[:] = flat[offset:offset + view.size].reshape(view.shape)
+        offset += view.size
 
 
 class HistoryManager:
-    """Undo/Redo manager. Stores PIL Image snapshots."""
+    """Undo/Redo manager. Stores copies of the document's (h, w, 4) pixel array,
+    either of the whole sheet or of the region (x0, y0, x1, y1) an edit is about to touch.
+    A stored array may also be a zero-argument loader (history read from a project
+    file on demand); it is called when the entry is first needed. An entry may also
+    carry the grid layout (cols, rows) to restore with it, for edits that change it.
+
+    An entry's box may also be a tuple of several boxes (push_regions, e.g. the two
+    cells of a swap); its snapshot is then the regions' pixels flattened end to end."""
 
     MAX_STEPS = 50
 
     def __init__(self):
-        self._undo_stack: list[Image.Image] = []
-        self._redo_stack: list[Image.Image] = []
+        # entries are (box, pixels, layout); box None = full snapshot, layout None = unchanged
+        self._undo_stack: list[tuple[tuple[int, int, int, int] | None, np.ndarray,
+                                     tuple[int, int] | None]] = []
+        self._redo_stack: list[tuple[tuple[int, int, int, int] | None, np.ndarray,
+                                     tuple[int, int] | None]] = []
 
-    def push(self, image: Image.Image):
-        """Call before every edit operation."""
-        self._undo_stack.append(image.copy())
+    def push(self, pixels: np.ndarray, box: tuple[int, int, int, int] | None = None,
+             layout: tuple[int, int] | None = None):
+        """Call before every edit operation. box limits the snapshot to the edited region;
+        layout is the grid (cols, rows) before an edit that changes it."""
+        if box is not None:
+            ih, iw = pixels.shape[:2]
+            box = (max(0, box[0]), max(0, box[1]), min(iw, box[2]), min(ih, box[3]))
+            if box[0] >= box[2] or box[1] >= box[3]:
+                return
+            self._undo_stack.append((box, pixels[box[1]:box[3], box[0]:box[2]].copy(), layout))
+        else:
+            self._undo_stack.append((None, pixels.copy(), layout))
+        self._trim()
+
+    def push_regions(self, pixels: np.ndarray, boxes: list[tuple[int, int, int, int]]):
+        """push() for an edit touching several separate regions, as one undo step."""
+        ih, iw = pixels.shape[:2]
+        regions = []
+        for box in boxes:
+            box = (max(0, box[0]), max(0, box[1]), min(iw, box[2]), min(ih, box[3]))
+            if box[0] < box[2] and box[1] < box[3]:
+                regions.append(box)
+        if not regions:
+            return
+        self._undo_stack.append((tuple(regions), _gather(pixels, regions), None))
+        self._trim()
+
+    def _trim(self):
         if len(self._undo_stack) > self.MAX_STEPS:
             self._undo_stack.pop(0)
         self._redo_stack.clear()
 
-    def undo(self, current: Image.Image) -> Image.Image | None:
+    @staticmethod
+    def _swap(entry, current: np.ndarray, other_stack: list,
+              current_layout: tuple[int, int] | None) -> np.ndarray:
+        box, snapshot, layout = entry
+        if callable(snapshot):
+            snapshot = snapshot()
+        back = current_layout if layout is not None else None
+        if box is None:
+            other_stack.append((None, current, back))
+            return snapshot
+        if is_regions(box):
+            other_stack.append((box, _gather(current, box), back))
+            _scatter(current, box, snapshot)
+            return current
+        x0, y0, x1, y1 = box
+        region = current[y0:y1, x0:x1]
+        other_stack.append((box, region.copy(), back))
+        region[:] = snapshot
+        return current
+
+    def undo(self, current: np.ndarray,
+             current_layout: tuple[int, int] | None = None) -> np.ndarray | None:
+        """Restore the previous state. Region entries are written into current in
+        place; a full snapshot is returned as a new array for the caller to adopt.
+        current_layout is stored for redo when the entry restores a layout (undo_layout)."""
         if not self._undo_stack:
             return None
-        self._redo_stack.append(current.copy())
-        return self._undo_stack.pop()
+        return self._swap(self._undo_stack.pop(), current, self._redo_stack, current_layout)
 
-    def redo(self, current: Image.Image) -> Image.Image | None:
+    def redo(self, current: np.ndarray,
+             current_layout: tuple[int, int] | None = None) -> np.ndarray | None:
         if not self._redo_stack:
             return None
-        self._undo_stack.append(current.copy())
-        return self._redo_stack.pop()
+        return self._swap(self._redo_stack.pop(), current, self._undo_stack, current_layout)
+
+    def undo_box(self) -> tuple[int, int, int, int] | None:
+        """Region the next undo will touch, bounding all of a multi-region entry
+        (None = whole image)."""
+        return bounds(self._undo_stack[-1][0]) if self._undo_stack else None
+
+    def redo_box(self) -> tuple[int, int, int, int] | None:
+        return bounds(self._redo_stack[-1][0]) if self._redo_stack else None
+
+    def undo_layout(self) -> tuple[int, int] | None:
+        """Grid (cols, rows) the next undo restores (None = layout unchanged)."""
+        return self._undo_stack[-1][2] if self._undo_stack else None
+
+    def redo_layout(self) -> tuple[int, int] | None:
+        return self._redo_stack[-1][2] if self._redo_stack else None
 
     def can_undo(self) -> bool:
         return bool(self._undo_stack)
@@ -35,6 +132,15 @@ class HistoryManager:
     def can_redo(self) -> bool:
         return bool(self._redo_stack)
 
+    def entries(self) -> tuple[list, list]:
+        """(undo, redo) stacks of (box, array or loader, layout), oldest first."""
+        return list(self._undo_stack), list(self._redo_stack)
+
+    def load(self, undo: list, redo: list):
+        """Replace both stacks (see entries)."""
+        self._undo_stack = list(undo)[-self.MAX_STEPS:]
+        self._redo_stack = list(redo)
+
     def clear(self):
         self._undo_stack.clear()
         self._redo_stack.clear()
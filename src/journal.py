@@ -0,0 +1,246 @@
+"""Crash-recovery journal: every edited region appended to a per-document file in
+the background, replayed onto the original sheet after a crash (no Qt required)."""
+from __future__ import annotations
+import json
+import os
+import struct
+import uuid
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from .document import Document
+from .project import is_project, open_project
+from .watch import file_key
+
+JOURNAL_DIR = os.path.join(os.path.expanduser("~"), ".cache", "grid-sprite-editor", "journal")
+MAX_JOURNAL_BYTES = 256 * 1024 * 1024   # past this the journal restarts from a full snapshot
+COMPRESS_LEVEL = 1                      # speed over ratio: runs once per edit
+
+_MAGIC = b"GSEJ1\n"
+# sheet w, h; edited box x0, y0, x1, y1; compressed byte count
+_RECORD = struct.Struct("<7I")
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_journal_executor() -> ThreadPoolExecutor:
+    """Single writer thread, so records reach every journal in the order of the edits."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=1)
+    return _executor
+
+
+class Journal:
+    """Append-only log of one open document.
+
+    start() begins a journal against the sheet as saved on disk (or against a
+    full snapshot for an unsaved document); record() copies the edited region
+    (cost proportional to the edit) and leaves compression and the write to the
+    writer thread. discard() removes the file on a clean close, so any journal
+    left behind by a process that is no longer running marks an unclean shutdown.
+    """
+
+    def __init__(self, directory: str = JOURNAL_DIR):
+        self.directory = directory
+        self.path = os.path.join(directory, f"{uuid.uuid4().hex}.journal")
+        self._file = None            # only touched on the writer thread
+        self._bytes = 0
+        self._started = False
+
+    @property
+    def started(self) -> bool:
+        return self._started
+
+    def start(self, source: str | None, pixels: np.ndarray | None = None):
+        """Restart against source as it is on disk now. pixels are written as a
+        full first record, for when the document differs from the file (e.g. a
+        lossy palette save). With neither, the first record() snapshots."""
+        if source is None and pixels is None:
+            self._started = False
+            return
+        header = {"source": os.path.abspath(source) if source else None,
+                  "key": file_key(source) if source else None, "pid": os.getpid()}
+        self._started = True
+        self._bytes = 0
+        get_journal_executor().submit(self._write_header, json.dumps(header).encode("utf-8"))
+        if source is None or pixels is not None:
+            self.record(pixels, None)
+
+    def record(self, pixels: np.ndarray, box: tuple[int, int, int, int] | None):
+        """Log the current content of box (x0, y0, x1, y1; None = whole sheet)."""
+        ih, iw = pixels.shape[:2]
+        if not self._started:
+            self.start(None, pixels)
+            return
+        if box is not None and self._bytes > MAX_JOURNAL_BYTES:
+            self.start(None, pixels)   # compact: one snapshot instead of unbounded growth
+            return
+        x0, y0, x1, y1 = box if box is not None else (0, 0, iw, ih)
+        region = pixels[y0:y1, x0:x1].tobytes()
+        get_journal_executor().submit(self._append, (iw, ih, x0, y0, x1, y1), region)
+
+    def discard(self):
+        """Clean close: drop the journal once pending writes are done."""
+        if self._started:
+            self._started = False
+            get_journal_executor().submit(self._remove)
+
+    # -- writer thread ---------------------------------------------------
+    def _write_header(self, header: bytes):
+        if self._file is not None:
+            self._file.close()
+        os.makedirs(self.directory, exist_ok=True)
+        self._file = open(self.path, "wb")
+        self._file.write(_MAGIC + header + b"\n")
+        self._file.flush()
+
+    def _append(self, dims: tuple[int, ...], region: bytes):
+        if self._file is None:
+            return
+        data = zlib.compress(region, COMPRESS_LEVEL)
+        self._file.write(_RECORD.pack(*dims, len(data)))
+        self._file.write(data)
+        self._file.flush()   # in the OS once written: survives a crash of the editor
+        self._bytes += _RECORD.size + len(data)
+
+    def _remove(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def wait_for_writes():
+    """Block until every queued journal write has reached the file system."""
+    get_journal_executor().submit(lambda: None).result()
+
+
+# ----------------------------------------------------------------------
+# Recovery
+# ----------------------------------------------------------------------
+@dataclass
+class OrphanJournal:
+    path: str
+    source: str | None      # sheet the journal applies to (None: starts from a snapshot)
+    key: tuple[int, int] | None
+    pid: int
+
+    @property
+    def source_changed(self) -> bool:
+        """The sheet on disk was modified after the journal started."""
+        return self.source is not None and file_key(self.source) != self.key
+
+
+def _pid_alive_windows(pid: int) -> bool:
+    # os.kill(pid, 0) sends CTRL_C_EVENT on Windows; ask the process table instead
+    import ctypes
+    from ctypes import wintypes
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    kernel32.OpenProcess.argtypes = (wintypes.DWORD, wintypes.BOOL, wintypes.DWORD)
+    kernel32.GetExitCodeProcess.argtypes = (wintypes.HANDLE, ctypes.POINTER(wintypes.DWORD))
+    kernel32.CloseHandle.argtypes = (wintypes.HANDLE,)
+    process_query_limited_information, still_active, error_access_denied = 0x1000, 259, 5
+    handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+    if not handle:
+        # no such process, unless it exists but belongs to someone else
+        return ctypes.get_last_error() == error_access_denied
+    try:
+        code = wintypes.DWORD()
+        if not kernel32.GetExitCodeProcess(handle, ctypes.byref(code)):
+            return True
+        return code.value == still_active
+    finally:
+        kernel32.CloseHandle(handle)
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid == os.getpid():
+        return True
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        return _pid_alive_windows(pid)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True   # exists but not ours, or no way to tell: leave it alone
+    return True
+
+
+def _read_header(f) -> dict | None:
+    if f.read(len(_MAGIC)) != _MAGIC:
+        return None
+    try:
+        return json.loads(f.readline())
+    except ValueError:
+        return None
+
+
+def find_orphans(directory: str = JOURNAL_DIR) -> list[OrphanJournal]:
+    """Journals whose editor process is gone, i.e. left by an unclean shutdown."""
+    orphans = []
+    try:
+        names = sorted(n for n in os.listdir(directory) if n.endswith(".journal"))
+    except OSError:
+        return orphans
+    for name in names:
+        path = os.path.join(directory, name)
+        try:
+            with open(path, "rb") as f:
+                header = _read_header(f)
+        except OSError:
+            continue
+        if header is None:
+            continue
+        if _pid_alive(int(header.get("pid", 0))):
+            continue
+        key = header.get("key")
+        orphans.append(OrphanJournal(path, header.get("source"), tuple(key) if key else None,
+                                     int(header.get("pid", 0))))
+    return orphans
+
+
+def replay(orphan: OrphanJournal) -> Document | None:
+    """Rebuild the document: the source sheet with every complete record applied.
+    A record torn by the crash ends the replay. None if there is nothing to rebuild."""
+    pixels = None
+    if orphan.source is not None and os.path.exists(orphan.source):
+        base = open_project(orphan.source).document if is_project(orphan.source) \
+            else Document.open(orphan.source)
+        pixels = np.array(base.pixels)
+    with open(orphan.path, "rb") as f:
+        if _read_header(f) is None:
+            return None
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                break
+            iw, ih, x0, y0, x1, y1, n = _RECORD.unpack(head)
+            data = f.read(n)
+            if len(data) < n:
+                break
+            try:
+                region = zlib.decompress(data)
+            except zlib.error:
+                break
+            if len(region) != (x1 - x0) * (y1 - y0) * 4:
+                break
+            if pixels is None or pixels.shape[:2] != (ih, iw):
+                pixels = np.zeros((ih, iw, 4), dtype=np.uint8)   # resized: a full record follows
+            pixels[y0:y1, x0:x1] = np.frombuffer(region, dtype=np.uint8).reshape(y1 - y0, x1 - x0, 4)
+    return Document(pixels) if pixels is not None else None
+
+
+def remove(orphan: OrphanJournal):
+    try:
+        os.remove(orphan.path)
+    except OSError:
+        pass
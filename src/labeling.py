@@ -0,0 +1,142 @@
+import numpy as np
+
+
+def _runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Returns (row, start, end) arrays of horizontal True runs, in row-major order."""
+    h, w = mask.shape
+    # transitions between neighbouring columns, with the row ends counting as False;
+    # rows of edge are w + 1 wide and within a row edges alternate start, end, ...
+    edge = np.empty((h, w + 1), dtype=bool)
+    edge[:, 0] = mask[:, 0]
+    edge[:, w] = mask[:, w - 1]
+    np.not_equal(mask[:, 1:], mask[:, :-1], out=edge[:, 1:w])
+    edges = np.flatnonzero(edge)
+    starts = edges[0::2]
+    ends = edges[1::2]
+    rows = starts // (w + 1)
+    return rows, starts - rows * (w + 1), ends - rows * (w + 1)
+
+
+def _run_components(mask: np.ndarray, connectivity: int):
+    """Horizontal runs of mask and, per run, the smallest run index of its component.
+
+    Returns (rows, starts, ends, parent); parent is None when there are no runs.
+    """
+    h, w = mask.shape
+    rows, starts, ends = _runs(mask)
+    n_runs = len(rows)
+    if n_runs == 0:
+        return rows, starts, ends, None
+
+    # Overlapping runs between row r and r+1. Keys are globally sorted because
+    # runs come out in row-major order and never overlap within a row.
+    stride = w + 2
+    c = 1 if connectivity == 8 else 0
+    start_key = rows * stride + starts
+    end_key = rows * stride + ends
+    below = np.nonzero(rows > 0)[0]
+    prev = (rows[below] - 1) * stride
+    lo = np.searchsorted(end_key, prev + starts[below] - c, side="right")
+    hi = np.searchsorted(start_key, prev + ends[below] + c, side="left")
+    counts = np.maximum(hi - lo, 0)
+    edge_b = np.repeat(below, counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    edge_a = np.repeat(lo, counts) + offsets
+
+    # Hook root onto root (larger onto smaller) and compress fully each round,
+    # dropping edges whose ends already share a root. Converges in a few rounds.
+    parent = np.arange(n_runs)
+    while len(edge_a):
+        pa, pb = parent[edge_a], parent[edge_b]
+        open_ = pa != pb
+        if not open_.any():
+            break
+        edge_a, edge_b, pa, pb = edge_a[open_], edge_b[open_], pa[open_], pb[open_]
+        np.minimum.at(parent, np.maximum(pa, pb), np.minimum(pa, pb))
+        while True:
+            jumped = parent[parent]
+            if np.array_equal(jumped, parent):
+                break
+            parent = jumped
+    return rows, starts, ends, parent
+
+
+def _paint_runs(shape: tuple[int, int], rows, starts, ends, values, dtype) -> np.ndarray:
+    """Fill runs with values via a prefix sum over +value/-value run edges."""
+    h, w = shape
+    delta = np.zeros(h * (w + 1), dtype=dtype if dtype is not bool else np.int8)
+    base = rows * (w + 1)
+    delta[base + starts] = values
+    delta[base + ends] = -values if np.ndim(values) else -1
+    out = np.cumsum(delta, dtype=delta.dtype).reshape(h, w + 1)[:, :w]
+    return out.astype(bool) if dtype is bool else np.ascontiguousarray(out)
+
+
+def label(mask: np.ndarray, connectivity: int = 8) -> tuple[np.ndarray, int]:
+    """Label connected True regions of a 2D bool mask.
+
+    Returns (labels, n) where labels is an int32 array (0 = background,
+    1..n = component id). Works on horizontal runs so the Python-level cost
+    scales with the number of runs, not pixels.
+    """
+    rows, starts, ends, parent = _run_components(mask, connectivity)
+    if parent is None:
+        return np.zeros(mask.shape, dtype=np.int32), 0
+    _, run_label = np.unique(parent, return_inverse=True)
+    run_label = run_label.astype(np.int32) + 1
+    return _paint_runs(mask.shape, rows, starts, ends, run_label, np.int32), int(run_label.max())
+
+
+def component_runs(mask: np.ndarray, x: int, y: int, connectivity: int = 8):
+    """(rows, starts, ends) of the runs forming the region of mask containing
+    (x, y); None if (x, y) is outside mask or unset."""
+    h, w = mask.shape
+    if not (0 <= x < w and 0 <= y < h) or not mask[y, x]:
+        return None
+    rows, starts, ends, parent = _run_components(mask, connectivity)
+    seed = np.nonzero((rows == y) & (starts <= x) & (ends > x))[0][0]
+    keep = parent == parent[seed]
+    return rows[keep], starts[keep], ends[keep]
+
+
+def paint_component(shape: tuple[int, int], runs, mask: np.ndarray | None = None) -> np.ndarray:
+    """Bool mask of shape with runs (as from component_runs) set; only the rows
+    the runs span are painted. Given the mask the runs came from, a component
+    covering all of it is returned as a copy of mask without painting."""
+    if runs is None:
+        return np.zeros(shape, dtype=bool)
+    rows, starts, ends = runs
+    if mask is not None and int((ends - starts).sum()) == np.count_nonzero(mask):
+        return mask.copy()
+    out = np.zeros(shape, dtype=bool)
+    top, bottom = int(rows.min()), int(rows.max()) + 1
+    out[top:bottom] = _paint_runs((bottom - top, shape[1]), rows - top, starts, ends, True, bool)
+    return out
+
+
+def component_at(mask: np.ndarray, x: int, y: int, connectivity: int = 8) -> np.ndarray:
+    """Bool mask of the connected region of mask containing (x, y) (all False if unset).
+
+    Cheaper than label() when only the seed's component is wanted: nothing is
+    relabelled and only that component's runs are written out.
+    """
+    return paint_component(mask.shape, component_runs(mask, x, y, connectivity), mask)
+
+
+def component_boxes(labels: np.ndarray, n: int) -> tuple[np.ndarray, np.ndarray]:
+    """Returns (boxes, areas) for labels 1..n.
+
+    boxes is an (n, 4) int array of (x0, y0, x1, y1) with exclusive x1/y1,
+    areas the pixel count of each component.
+    """
+    ys, xs = np.nonzero(labels)
+    ids = labels[ys, xs] - 1
+    boxes = np.empty((n, 4), dtype=np.int64)
+    boxes[:, 0:2] = np.iinfo(np.int64).max
+    boxes[:, 2:4] = -1
+    np.minimum.at(boxes[:, 0], ids, xs)
+    np.minimum.at(boxes[:, 1], ids, ys)
+    np.maximum.at(boxes[:, 2], ids, xs + 1)
+    np.maximum.at(boxes[:, 3], ids, ys + 1)
+    areas = np.bincount(ids, minlength=n)
+    return boxes, areas
@@ -0,0 +1,298 @@
+"""Recorded edit macros: sheet operations stored as JSON and replayed headlessly on
+one document or across many files in a process pool (no Qt required).
+
+A macro file looks like
+
+    {"params": {"factor": 0.9},
+     "steps": [{"op": "set_grid", "cols": 4, "rows": 4},
+               {"op": "swap_cells", "a": [0, 0], "b": [3, 0]},
+               {"op": "scale_cells", "cells": "all", "factor": "$factor"}]}
+
+String arguments of the form "$name" take their value from params, which a
+replay can override (e.g. --set factor=0.85 in batch mode).
+"""
+from __future__ import annotations
+import copy
+import json
+import numbers
+import os
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from PIL import Image
+from .cell_ops import (
+    swap_pixels, shift_cell_pixels, scale_cell_contents, permute_pixels, relayout_pixels
+)
+from .cleanup import key_background, defringe_cells, sample_background
+from .document import Document
+from .export import save_png
+from .grid import GridManager, GridConfig
+from .resample import CellResizeJob, get_process_executor
+
+
+@dataclass
+class MacroStep:
+    op: str
+    args: dict = field(default_factory=dict)
+
+
+@dataclass
+class Macro:
+    steps: list[MacroStep] = field(default_factory=list)
+    params: dict = field(default_factory=dict)   # defaults for "$name" arguments
+
+    def to_json(self) -> dict:
+        return {"params": self.params, "steps": [{"op": s.op, **s.args} for s in self.steps]}
+
+    @classmethod
+    def from_json(cls, data: dict) -> Macro:
+        if not isinstance(data, dict) or not isinstance(data.get("steps", []), list):
+            raise ValueError("not a macro file")
+        steps = []
+        for entry in data.get("steps", []):
+            if not isinstance(entry, dict) or "op" not in entry:
+                raise ValueError(f"bad macro step: {entry!r}")
+            args = dict(entry)
+            op = args.pop("op")
+            if op not in OPERATIONS:
+                raise ValueError(f"unknown macro operation: {op}")
+            steps.append(MacroStep(op, args))
+        params = data.get("params", {})
+        if not isinstance(params, dict):
+            raise ValueError("macro params must be an object")
+        return cls(steps, dict(params))
+
+    def save(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_json(), f, indent=1, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> Macro:
+        with open(path, encoding="utf-8") as f:
+            return cls.from_json(json.load(f))
+
+
+class MacroRecorder:
+    """Collects the operations a canvas performs. A set_grid step is inserted
+    whenever the grid layout differs from the one the previous step ran on."""
+
+    def __init__(self):
+        self.macro = Macro()
+        self._layout: tuple[int, int] | None = None
+
+    def add(self, op: str, grid_config: GridConfig, **args):
+        layout = (grid_config.cols, grid_config.rows)
+        if layout != self._layout:
+            self.macro.steps.append(MacroStep("set_grid", {"cols": layout[0], "rows": layout[1]}))
+            self._layout = layout
+        self.macro.steps.append(MacroStep(op, copy.deepcopy(args)))
+
+    def __len__(self) -> int:
+        return sum(1 for s in self.macro.steps if s.op != "set_grid")
+
+
+# ----------------------------------------------------------------------
+# Operations: fn(document, grid, **args) -> document (a new one if resized)
+# ----------------------------------------------------------------------
+def _check_cell(grid: GridManager, cell) -> tuple[int, int]:
+    """cell as (col, row); ValueError unless it lies inside the grid."""
+    cfg = grid.config
+    if not (isinstance(cell, (list, tuple)) and len(cell) == 2
+            and all(isinstance(v, numbers.Integral) and not isinstance(v, bool) for v in cell)):
+        raise ValueError(f"bad cell: {cell!r}")
+    col, row = int(cell[0]), int(cell[1])
+    if not (0 <= col < cfg.cols and 0 <= row < cfg.rows):
+        raise ValueError(f"cell {[col, row]} is outside the {cfg.cols}x{cfg.rows} grid")
+    return col, row
+
+
+def _cells(grid: GridManager, cells) -> list[tuple[int, int]]:
+    """"all" or a list of [col, row], each checked against the grid."""
+    cfg = grid.config
+    if cells == "all":
+        return [(c, r) for r in range(cfg.rows) for c in range(cfg.cols)]
+    if not isinstance(cells, list):
+        raise ValueError(f'cells must be "all" or a list of [col, row]: {cells!r}')
+    return [_check_cell(grid, c) for c in cells]
+
+
+def _op_set_grid(document, grid, cols: int, rows: int):
+    if int(cols) < 1 or int(rows) < 1:
+        raise ValueError(f"bad grid size: {cols}x{rows}")
+    grid.config.cols, grid.config.rows = int(cols), int(rows)
+    return document
+
+
+def _op_swap_cells(document, grid, a, b):
+    swap_pixels(document.pixels, grid, _check_cell(grid, a), _check_cell(grid, b))
+    return document
+
+
+def _op_cell_move(document, grid, cell, dx: int, dy: int):
+    shift_cell_pixels(document.pixels, grid, _check_cell(grid, cell), int(dx), int(dy))
+    return document
+
+
+def _op_scale_cells(document, grid, cells, factor: float):
+    scale_cell_contents(document, grid, _cells(grid, cells), factor)
+    return document
+
+
+def _op_flip_horizontal(document, grid, box=None):
+    document.flip_horizontal(tuple(box) if box else None)
+    return document
+
+
+def _op_reorder_cells(document, grid, order):
+    count = grid.config.cols * grid.config.rows
+    for i in order:
+        if i is not None and not (isinstance(i, int) and 0 <= i < count):
+            raise ValueError(f"frame {i!r} is outside the {count} frames of the grid")
+    document.replace(permute_pixels(document.pixels, grid, order))
+    return document
+
+
+def _op_relayout(document, grid, cols: int, rows: int, padding: int = 0,
+                 trim: bool = False, skip_empty: bool = False):
+    pixels, layout = relayout_pixels(document.pixels, grid, cols, rows, padding, trim, skip_empty)
+    grid.config.cols, grid.config.rows = layout
+    return Document(pixels)
+
+
+def _op_resize(document, grid, scale, per_cell: bool = False):
+    """scale is [sx, sy] relative to the current size, so one macro fits sheets of any size."""
+    iw, ih = document.size
+    w, h = max(1, round(iw * scale[0])), max(1, round(ih * scale[1]))
+    if per_cell:
+        image = CellResizeJob(document.image, grid, w, h).run()
+    else:
+        image = document.image.resize((w, h), Image.LANCZOS)
+    return Document.from_image(image)
+
+
+def _op_remove_background(document, grid, color=None, tolerance: int = 24,
+                          from_borders: bool = True, feather: int = 0):
+    color = tuple(color) if color else sample_background(document.image)
+    key_background(document.pixels, grid, color, tolerance, from_borders, feather)
+    return document
+
+
+def _op_defringe(document, grid, alpha_threshold: int = 16, bg_color=None, grow: int = 0):
+    defringe_cells(document.pixels, grid, alpha_threshold, tuple(bg_color) if bg_color else None, grow)
+    return document
+
+
+OPERATIONS = {
+    "set_grid": _op_set_grid,
+    "swap_cells": _op_swap_cells,
+    "cell_move": _op_cell_move,
+    "scale_cells": _op_scale_cells,
+    "flip_horizontal": _op_flip_horizontal,
+    "reorder_cells": _op_reorder_cells,
+    "relayout": _op_relayout,
+    "resize": _op_resize,
+    "remove_background": _op_remove_background,
+    "defringe": _op_defringe,
+}
+
+
+def _resolve(value, params: dict):
+    if isinstance(value, str) and value.startswith("$"):
+        name = value[1:]
+        if name not in params:
+            raise ValueError(f"macro parameter not set: {name}")
+        return params[name]
+    if isinstance(value, list):
+        return [_resolve(v, params) for v in value]
+    return value
+
+
+def apply_macro(macro: Macro, document: Document, grid: GridManager,
+                overrides: dict | None = None) -> Document:
+    """Run every step on document (edited in place unless a step resizes it) and
+    return the result. set_grid steps change grid.config."""
+    params = {**macro.params, **(overrides or {})}
+    for step in macro.steps:
+        args = {k: _resolve(v, params) for k, v in step.args.items()}
+        try:
+            document = OPERATIONS[step.op](document, grid, **args)
+        except ValueError:
+            raise
+        except TypeError as e:
+            raise ValueError(f"bad arguments for {step.op}: {e}") from e
+        except Exception as e:   # a hand-edited argument the op cannot handle
+            raise ValueError(f"{step.op} failed: {e!r}") from e
+    return document
+
+
+def parse_overrides(items: list[str]) -> dict:
+    """name=value strings -> params; values are parsed as JSON when possible."""
+    params = {}
+    for item in items:
+        name, sep, text = item.partition("=")
+        if not sep:
+            raise ValueError(f"expected name=value: {item}")
+        try:
+            params[name] = json.loads(text)
+        except ValueError:
+            params[name] = text
+    return params
+
+
+# ----------------------------------------------------------------------
+# Batch replay
+# ----------------------------------------------------------------------
+def run_macro_file(macro_json: dict, path: str, out_path: str,
+                   overrides: dict | None = None, palette: str = "off") -> str:
+    """Worker entry point: open path, replay the macro, save to out_path."""
+    macro = Macro.from_json(macro_json)
+    document = apply_macro(macro, Document.open(path), GridManager(GridConfig()), overrides)
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    save_png(document.image, out_path, palette)
+    return out_path
+
+
+class MacroJob:
+    """A macro replayed on many sheets in the worker-process pool.
+
+    Call start(), then poll() for (path, output or None, error or None) of the
+    sheets finished since the last poll until done == total.
+    """
+
+    def __init__(self, macro: Macro, paths: list[str], out_paths: list[str],
+                 overrides: dict | None = None, palette: str = "off"):
+        self.macro = macro
+        self.paths = list(paths)
+        self.out_paths = list(out_paths)
+        self.overrides = overrides
+        self.palette = palette
+        self._futures: dict[Future, str] = {}
+        self.done = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.paths)
+
+    def start(self):
+        executor = get_process_executor()
+        data = self.macro.to_json()
+        for path, out in zip(self.paths, self.out_paths):
+            fut = executor.submit(run_macro_file, data, path, out, self.overrides, self.palette)
+            self._futures[fut] = path
+
+    def poll(self) -> list[tuple[str, str | None, str | None]]:
+        results = []
+        for fut in [f for f in self._futures if f.done()]:
+            path = self._futures.pop(fut)
+            self.done += 1
+            if fut.cancelled():
+                continue
+            try:
+                results.append((path, fut.result(), None))
+            except Exception as e:   # reported as this sheet's error; the others go on
+                results.append((path, None, str(e) or repr(e)))
+        return results
+
+    def cancel(self):
+        for fut in self._futures:
+            fut.cancel()
+        self._futures.clear()
@@ -1,4 +1,5 @@
 from __future__ import annotations
+import copy
 import os
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
@@ -6,12 +7,22 @@ from PyQt6.QtWidgets import (
     QFileDialog, QMessageBox, QGroupBox, QDockWidget,
     QSizePolicy, QColorDialog, QComboBox, QPushButton,
     QDialog, QDialogButtonBox, QFormLayout,
-    QScrollArea, QScrollBar
+    QScrollArea, QScrollBar, QProgressBar, QProgressDialog, QTabWidget
 )
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QAction, QKeySequence, QColor, QIcon
+from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtGui import QAction, QActionGroup, QKeySequence, QColor, QIcon
 from .canvas import SpriteCanvas
-from .export import export_cells, RESIZE_PRESETS, resize_image
+from .frame_panel import FramePanel
+from .folder_browser import FolderBrowser
+from .export import export_cells, save_png, RESIZE_PRESETS
+from .resample import TiledResizeJob, CellResizeJob
+from .cleanup import sample_background
+from .cell_ops import fit_layout, relayout_frames
+from .memory_budget import CacheBudget
+from . import journal
+from .project import PROJECT_EXT, is_project, open_project, save_project
+from .macro import Macro, MacroRecorder, MacroJob
+from .metadata import METADATA_FORMATS, metadata_path, write_metadata
 
 
 class MainWindow(QMainWindow):
@@ -20,12 +31,20 @@ class MainWindow(QMainWindow):
         self.setWindowTitle("Grid Sprite Editor")
         self.resize(1200, 800)
 
-        self._filepath: str | None = None
-
-        self._canvas = SpriteCanvas()
-        self._canvas.image_changed.connect(self._on_image_changed)
-        self._canvas.file_dropped.connect(self._on_file_dropped)
-        self._canvas.viewport_changed.connect(self._sync_scrollbars)
+        self._palette_mode = "off"   # see export.PALETTE_MODES
+        self._tool_name = "rect"
+        # display caches of inactive tabs are evicted least-recently-used first
+        self._budget = CacheBudget()
+        self._recorder: MacroRecorder | None = None   # macro being recorded
+        self._macro_job: MacroJob | None = None
+
+        # one SpriteCanvas per open document; self._canvas is the current tab
+        self._tabs = QTabWidget()
+        self._tabs.setDocumentMode(True)
+        self._tabs.setTabsClosable(True)
+        self._tabs.setMovable(True)
+        self._tabs.tabCloseRequested.connect(self._close_tab)
+        self._add_canvas()
 
         # Canvas + scrollbars
         canvas_container = QWidget()
@@ -36,7 +55,7 @@ class MainWindow(QMainWindow):
         canvas_h = QHBoxLayout()
         canvas_h.setContentsMargins(0, 0, 0, 0)
         canvas_h.setSpacing(0)
-        canvas_h.addWidget(self._canvas)
+        canvas_h.addWidget(self._tabs)
 
         self._vscroll = QScrollBar(Qt.Orientation.Vertical)
         self._vscroll.valueChanged.connect(self._on_vscroll)
@@ -53,7 +72,146 @@ class MainWindow(QMainWindow):
         self._build_menu()
         self._build_toolbar()
         self._build_side_panel()
+        self._build_frame_panel()
+        self._build_folder_browser()
         self._build_status_bar()
+        self._tabs.currentChanged.connect(self._on_tab_changed)
+        self._budget.touch(self._canvas)
+        # once the window is up: offer to restore documents a crash left journals for
+        QTimer.singleShot(0, self._recover_journals)
+
+    # ------------------------------------------------------------------
+    # Documents (tabs)
+    # ------------------------------------------------------------------
+    @property
+    def _canvas(self) -> SpriteCanvas:
+        """Canvas of the current tab."""
+        return self._tabs.currentWidget()
+
+    @property
+    def _filepath(self) -> str | None:
+        return self._canvas.filepath
+
+    @_filepath.setter
+    def _filepath(self, path: str | None):
+        self._canvas.filepath = path
+
+    def _add_canvas(self) -> SpriteCanvas:
+        canvas = SpriteCanvas()
+        if self._tabs.count():
+            # sheets of one batch usually share a layout: start from the current grid
+            canvas.grid.config = copy.deepcopy(self._canvas.grid.config)
+        canvas.image_changed.connect(self._on_image_changed)
+        canvas.file_dropped.connect(self._on_file_dropped)
+        canvas.viewport_changed.connect(self._sync_scrollbars)
+        canvas.hover_cell_changed.connect(self._refresh_content_label)
+        canvas.layout_changed.connect(self._on_layout_changed)
+        self._tabs.addTab(canvas, "無題")
+        return canvas
+
+    def _open_path(self, path: str):
+        """Open path in a new tab (reusing the current tab if it is empty).
+        A file that is already open just brings its tab to the front."""
+        path = os.path.abspath(path)
+        for i in range(self._tabs.count()):
+            if self._tabs.widget(i).filepath == path:
+                self._tabs.setCurrentIndex(i)
+                return
+        if is_project(path):
+            self._open_project(path)
+            return
+        canvas = self._canvas if not self._canvas.image else self._add_canvas()
+        self._tabs.setCurrentWidget(canvas)
+        prepared = self._folder_browser.take_prepared(path)
+        if prepared is not None:
+            canvas.load_prepared(prepared)
+        else:
+            canvas.load_image(path)
+        self._budget.touch(canvas)   # now that its pixmaps exist
+        self._update_titles()
+
+    def _open_project(self, path: str):
+        try:
+            project = open_project(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "プロジェクトを開く", f"開けませんでした: {path}\n{e}")
+            return
+        canvas = self._canvas if not self._canvas.image else self._add_canvas()
+        self._tabs.setCurrentWidget(canvas)
+        canvas.load_project(project)
+        self._apply_display_settings(project.grid_config)
+        self._on_tab_changed(self._tabs.currentIndex())   # spins, rulers, frames from the project
+
+    def _apply_display_settings(self, cfg):
+        """Set the window-wide grid / guide display controls from a stored GridConfig."""
+        self._grid_line_color = QColor(*cfg.line_color[:3])
+        self._guide_line_color = QColor(*cfg.guide_color[:3])
+        self._update_color_button(self._btn_grid_color, self._grid_line_color)
+        self._update_color_button(self._btn_guide_color, self._guide_line_color)
+        for widget, setter, value in (
+                (self._slider_grid_alpha, "setValue", cfg.line_color[3]),
+                (self._slider_guide_alpha, "setValue", cfg.guide_color[3]),
+                (self._chk_show_grid, "setChecked", cfg.show_grid),
+                (self._chk_show_guides, "setChecked", cfg.show_guides)):
+            widget.blockSignals(True)
+            getattr(widget, setter)(value)
+            widget.blockSignals(False)
+
+    def _close_tab(self, index: int):
+        canvas = self._tabs.widget(index)
+        canvas.commit_floating()
+        canvas.journal.discard()
+        self._budget.remove(canvas)
+        if self._tabs.count() == 1:
+            self._add_canvas()   # always keep one (possibly empty) document
+        self._tabs.removeTab(index)
+        canvas.deleteLater()
+
+    def _step_tab(self, step: int):
+        if self._tabs.count() > 1:
+            self._tabs.setCurrentIndex((self._tabs.currentIndex() + step) % self._tabs.count())
+
+    def _on_tab_changed(self, index: int):
+        if index < 0:
+            return
+        canvas = self._canvas
+        self._budget.touch(canvas)
+        # grid layout is per document; tool and display settings are window-wide
+        cfg = canvas.grid.config
+        for spin, value in ((self._spin_cols, cfg.cols), (self._spin_rows, cfg.rows)):
+            spin.blockSignals(True)
+            spin.setValue(value)
+            spin.blockSignals(False)
+        self._chk_show_rulers.blockSignals(True)
+        self._chk_show_rulers.setChecked(cfg.show_rulers)
+        self._chk_show_rulers.blockSignals(False)
+        self._select_tool(self._tool_name)
+        canvas.tools["cell_ruler"].mode = "H" if self._btn_ruler_h.isChecked() else "V"
+        canvas.show_overflow = self._chk_show_overflow.isChecked()
+        self._update_wand()
+        self._update_eraser_size(self._eraser_slider.value())
+        for i in range(self._tabs.count()):
+            self._tabs.widget(i).recorder = None
+        canvas.recorder = self._recorder   # recording follows the current tab
+        self._frame_panel.set_canvas(canvas)
+        self._update_grid()   # pushes display settings, rebuilds frames and overflow label
+        self._refresh_size_label()
+        self._refresh_content_label()
+        self._sync_scrollbars()
+        self._update_titles()
+
+    def _on_layout_changed(self):
+        if self.sender() is self._canvas:
+            self._on_tab_changed(self._tabs.currentIndex())   # spins follow the new layout
+
+    def _update_titles(self):
+        for i in range(self._tabs.count()):
+            path = self._tabs.widget(i).filepath
+            self._tabs.setTabText(i, os.path.basename(path) if path else "無題")
+            self._tabs.setTabToolTip(i, path or "")
+        path = self._filepath
+        self.setWindowTitle(f"Grid Sprite Editor — {os.path.basename(path)}" if path
+                            else "Grid Sprite Editor")
 
     # ------------------------------------------------------------------
     # Menu
@@ -74,7 +232,12 @@ class MainWindow(QMainWindow):
         self._act_resize.triggered.connect(self._resize_dialog)
         self._act_export = QAction("コマを個別にエクスポート...", self)
         self._act_export.triggered.connect(self._export_cells)
+        self._act_export_meta = QAction("フレーム情報をエクスポート (JSON)...", self)
+        self._act_export_meta.triggered.connect(self._export_metadata)
+        self._act_close_tab = QAction("タブを閉じる", self, shortcut=QKeySequence("Ctrl+W"))
+        self._act_close_tab.triggered.connect(lambda: self._close_tab(self._tabs.currentIndex()))
         file_menu.addAction(self._act_open)
+        file_menu.addAction(self._act_close_tab)
         file_menu.addSeparator()
         file_menu.addAction(self._act_save)
         file_menu.addAction(self._act_save_as)
@@ -82,24 +245,63 @@ class MainWindow(QMainWindow):
         file_menu.addAction(self._act_resize)
         file_menu.addSeparator()
         file_menu.addAction(self._act_export)
+        file_menu.addAction(self._act_export_meta)
+        file_menu.addSeparator()
+        png_menu = file_menu.addMenu("PNG の保存形式")
+        png_group = QActionGroup(self)
+        for label, mode in (
+            ("32bit RGBA（通常）", "off"),
+            ("パレット PNG（256色以下なら無劣化、超える場合は RGBA）", "lossless"),
+            ("パレット PNG（256色を超える場合は減色・ディザ）", "quantize"),
+        ):
+            act = QAction(label, self, checkable=True)
+            act.setChecked(mode == self._palette_mode)
+            act.triggered.connect(lambda _=False, m=mode: setattr(self, "_palette_mode", m))
+            png_group.addAction(act)
+            png_menu.addAction(act)
 
         # Edit
         edit_menu = mb.addMenu("編集(&E)")
         self._act_undo = QAction("元に戻す", self, shortcut=QKeySequence.StandardKey.Undo)
-        self._act_undo.triggered.connect(self._canvas.undo)
+        self._act_undo.triggered.connect(lambda: self._canvas.undo())
         self._act_redo = QAction("やり直し", self, shortcut=QKeySequence.StandardKey.Redo)
-        self._act_redo.triggered.connect(self._canvas.redo)
+        self._act_redo.triggered.connect(lambda: self._canvas.redo())
         edit_menu.addAction(self._act_undo)
         edit_menu.addAction(self._act_redo)
         edit_menu.addSeparator()
         self._act_flip_h = QAction("左右反転", self, shortcut=QKeySequence("H"))
-        self._act_flip_h.triggered.connect(self._canvas.flip_horizontal)
+        self._act_flip_h.triggered.connect(lambda: self._canvas.flip_horizontal())
         edit_menu.addAction(self._act_flip_h)
+        edit_menu.addSeparator()
+        self._act_remove_bg = QAction("背景を除去...", self)
+        self._act_remove_bg.triggered.connect(self._remove_background_dialog)
+        edit_menu.addAction(self._act_remove_bg)
+        self._act_defringe = QAction("フチ・ハロー除去...", self)
+        self._act_defringe.triggered.connect(self._defringe_dialog)
+        edit_menu.addAction(self._act_defringe)
+        edit_menu.addSeparator()
+        self._act_relayout = QAction("シートの再レイアウト...", self)
+        self._act_relayout.triggered.connect(self._relayout_dialog)
+        edit_menu.addAction(self._act_relayout)
+
+        # Macro
+        macro_menu = mb.addMenu("マクロ(&M)")
+        self._act_macro_record = QAction("記録", self, checkable=True)
+        self._act_macro_record.toggled.connect(self._toggle_macro_recording)
+        self._act_macro_apply = QAction("現在のシートに適用...", self)
+        self._act_macro_apply.triggered.connect(self._apply_macro)
+        self._act_macro_batch = QAction("複数のシートに一括適用...", self)
+        self._act_macro_batch.triggered.connect(self._batch_macro)
+        macro_menu.addAction(self._act_macro_record)
+        macro_menu.addSeparator()
+        macro_menu.addAction(self._act_macro_apply)
+        macro_menu.addAction(self._act_macro_batch)
 
         # View
         view_menu = mb.addMenu("表示(&V)")
+        self._view_menu = view_menu
         self._act_fit = QAction("全体表示", self, shortcut=QKeySequence("Ctrl+0"))
-        self._act_fit.triggered.connect(self._canvas.fit_view)
+        self._act_fit.triggered.connect(lambda: self._canvas.fit_view())
         self._act_zoom_in = QAction("ズームイン", self, shortcut=QKeySequence("Ctrl+="))
         self._act_zoom_in.triggered.connect(lambda: self._zoom_step(1.25))
         self._act_zoom_out = QAction("ズームアウト", self, shortcut=QKeySequence("Ctrl+-"))
@@ -107,6 +309,13 @@ class MainWindow(QMainWindow):
         view_menu.addAction(self._act_fit)
         view_menu.addAction(self._act_zoom_in)
         view_menu.addAction(self._act_zoom_out)
+        view_menu.addSeparator()
+        self._act_next_tab = QAction("次のタブ", self, shortcut=QKeySequence("Ctrl+Tab"))
+        self._act_next_tab.triggered.connect(lambda: self._step_tab(1))
+        self._act_prev_tab = QAction("前のタブ", self, shortcut=QKeySequence("Ctrl+Shift+Tab"))
+        self._act_prev_tab.triggered.connect(lambda: self._step_tab(-1))
+        view_menu.addAction(self._act_next_tab)
+        view_menu.addAction(self._act_prev_tab)
 
         # Animation
         anim_menu = mb.addMenu("アニメーション(&A)")
@@ -134,6 +343,7 @@ class MainWindow(QMainWindow):
         self._tool_actions: dict[str, QAction] = {}
         self._tool_actions["rect"] = tool_action("□ 矩形選択", "rect", "M")
         self._tool_actions["lasso"] = tool_action("⌒ ラッソ選択", "lasso", "L")
+        self._tool_actions["wand"] = tool_action("✦ 自動選択", "wand", "W")
         self._tool_actions["eraser"] = tool_action("◯ 消しゴム", "eraser", "E")
         self._tool_actions["cell_swap"] = tool_action("⇄ コマ入れ替え", "cell_swap")
         tb.addSeparator()
@@ -148,6 +358,7 @@ class MainWindow(QMainWindow):
         self._select_tool("rect")
 
     def _select_tool(self, name: str):
+        self._tool_name = name
         self._canvas.set_tool(name)
         for k, act in self._tool_actions.items():
             act.setChecked(k == name)
@@ -268,8 +479,7 @@ class MainWindow(QMainWindow):
         self._scale_slider.setRange(10, 300)
         self._scale_slider.setValue(100)
         self._scale_label = QLabel("100%")
-        self._scale_slider.valueChanged.connect(
-            lambda v: self._scale_label.setText(f"{v}%"))
+        self._scale_slider.valueChanged.connect(self._on_scale_slider)
         scale_slider_row.addWidget(self._scale_slider)
         scale_slider_row.addWidget(self._scale_label)
         scale_layout.addLayout(scale_slider_row)
@@ -285,6 +495,26 @@ class MainWindow(QMainWindow):
 
         layout.addWidget(scale_group)
 
+        # Magic wand / colour range
+        wand_group = QGroupBox("自動選択 (Wキー)")
+        wand_layout = QVBoxLayout(wand_group)
+        wand_layout.addWidget(QLabel("許容値:"))
+        self._wand_slider = QSlider(Qt.Orientation.Horizontal)
+        self._wand_slider.setRange(0, 255)
+        self._wand_slider.setValue(32)
+        self._wand_slider.valueChanged.connect(self._update_wand)
+        wand_layout.addWidget(self._wand_slider)
+        self._wand_tolerance_label = QLabel("32")
+        wand_layout.addWidget(self._wand_tolerance_label)
+        self._chk_wand_contiguous = QCheckBox("隣接ピクセルのみ (オフ = 色域選択)")
+        self._chk_wand_contiguous.setChecked(True)
+        self._chk_wand_contiguous.toggled.connect(self._update_wand)
+        wand_layout.addWidget(self._chk_wand_contiguous)
+        self._chk_wand_sheet = QCheckBox("シート全体 (オフ = クリックしたセル内)")
+        self._chk_wand_sheet.toggled.connect(self._update_wand)
+        wand_layout.addWidget(self._chk_wand_sheet)
+        layout.addWidget(wand_group)
+
         # Eraser size
         eraser_group = QGroupBox("消しゴム")
         eraser_layout = QVBoxLayout(eraser_group)
@@ -302,15 +532,26 @@ class MainWindow(QMainWindow):
         edit_group = QGroupBox("編集")
         edit_layout = QVBoxLayout(edit_group)
         btn_flip_h = QPushButton("↔ 左右反転 (H)")
-        btn_flip_h.clicked.connect(self._canvas.flip_horizontal)
+        btn_flip_h.clicked.connect(lambda: self._canvas.flip_horizontal())
         edit_layout.addWidget(btn_flip_h)
         layout.addWidget(edit_group)
 
+        # Overflow (bleed) detection
+        overflow_group = QGroupBox("はみ出し検出")
+        overflow_layout = QVBoxLayout(overflow_group)
+        self._chk_show_overflow = QCheckBox("はみ出し箇所を表示")
+        self._chk_show_overflow.toggled.connect(self._update_overflow)
+        overflow_layout.addWidget(self._chk_show_overflow)
+        self._overflow_label = QLabel("-")
+        self._overflow_label.setWordWrap(True)
+        overflow_layout.addWidget(self._overflow_label)
+        layout.addWidget(overflow_group)
+
         # Zoom
         zoom_group = QGroupBox("ズーム")
         zoom_layout = QVBoxLayout(zoom_group)
         btn_fit = QPushButton("全体表示")
-        btn_fit.clicked.connect(self._canvas.fit_view)
+        btn_fit.clicked.connect(lambda: self._canvas.fit_view())
         btn_zoom_in = QPushButton("ズームイン (+)")
         btn_zoom_in.clicked.connect(lambda: self._zoom_step(1.25))
         btn_zoom_out = QPushButton("ズームアウト (-)")
@@ -382,6 +623,30 @@ class MainWindow(QMainWindow):
         dock.setWidget(scroll)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, dock)
 
+    # ------------------------------------------------------------------
+    # Frame panel (reorder)
+    # ------------------------------------------------------------------
+    def _build_frame_panel(self):
+        dock = QDockWidget("コマ並べ替え", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea | Qt.DockWidgetArea.TopDockWidgetArea)
+        self._frame_panel = FramePanel(self._canvas)
+        dock.setWidget(self._frame_panel)
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, dock)
+        self._view_menu.addSeparator()
+        self._view_menu.addAction(dock.toggleViewAction())
+
+    # ------------------------------------------------------------------
+    # Folder browser
+    # ------------------------------------------------------------------
+    def _build_folder_browser(self):
+        dock = QDockWidget("フォルダ", self)
+        dock.setAllowedAreas(Qt.DockWidgetArea.LeftDockWidgetArea | Qt.DockWidgetArea.RightDockWidgetArea)
+        self._folder_browser = FolderBrowser(lambda: self._canvas.grid.config)
+        self._folder_browser.open_requested.connect(self._open_path)
+        dock.setWidget(self._folder_browser)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, dock)
+        self._view_menu.addAction(dock.toggleViewAction())
+
     def _update_grid(self):
         cfg = self._canvas.grid.config
         cfg.cols = self._spin_cols.value()
@@ -389,12 +654,17 @@ class MainWindow(QMainWindow):
         cfg.show_grid = self._chk_show_grid.isChecked()
         cfg.show_guides = self._chk_show_guides.isChecked()
         self._anim_rebuild_frames()
+        if hasattr(self, "_frame_panel"):
+            self._frame_panel.rebuild()
+        if hasattr(self, "_folder_browser"):
+            self._folder_browser.refresh_strip()
         a_grid  = self._slider_grid_alpha.value()
         a_guide = self._slider_guide_alpha.value()
         cfg.line_color  = (self._grid_line_color.red(),  self._grid_line_color.green(),
                            self._grid_line_color.blue(),  a_grid)
         cfg.guide_color = (self._guide_line_color.red(), self._guide_line_color.green(),
                            self._guide_line_color.blue(), a_guide)
+        self._refresh_overflow_label()
         self._canvas.update()
 
     def _update_color_button(self, btn: QPushButton, color: QColor):
@@ -433,13 +703,43 @@ class MainWindow(QMainWindow):
         self._select_tool("cell_scale")
         self._canvas.tools["cell_scale"].select_all()
 
+    def _on_scale_slider(self, val: int):
+        self._scale_label.setText(f"{val}%")
+        self._canvas.set_cell_scale_preview(None if val == 100 else val / 100.0)
+
     def _apply_cell_scale(self):
         cells = self._canvas.tools["cell_scale"].selected_cells
         if not cells:
             return
         factor = self._scale_slider.value() / 100.0
+        self._canvas.set_cell_scale_preview(None)
         self._canvas.scale_cells(cells, factor)
 
+    def _update_overflow(self):
+        self._canvas.show_overflow = self._chk_show_overflow.isChecked()
+        self._refresh_overflow_label()
+        self._canvas.update()
+
+    def _refresh_overflow_label(self):
+        img = self._canvas.image
+        if not img or not self._chk_show_overflow.isChecked():
+            self._overflow_label.setText("-")
+            return
+        regions = self._canvas.overflow.results(self._canvas.document)
+        if not regions:
+            self._overflow_label.setText("はみ出しなし")
+            return
+        cells = self._canvas.overflow.affected_cells(self._canvas.document)
+        names = ", ".join(f"({r},{c})" for c, r in cells)
+        self._overflow_label.setText(f"{len(regions)} 箇所 / {len(cells)} コマ\n(行,列): {names}")
+
+    def _update_wand(self):
+        tool = self._canvas.tools["wand"]
+        tool.tolerance = self._wand_slider.value()
+        tool.contiguous = self._chk_wand_contiguous.isChecked()
+        tool.whole_sheet = self._chk_wand_sheet.isChecked()
+        self._wand_tolerance_label.setText(str(tool.tolerance))
+
     def _update_eraser_size(self, val: int):
         self._eraser_size_label.setText(f"{val}px")
         self._canvas.tools["eraser"].brush_size = val
@@ -458,6 +758,25 @@ class MainWindow(QMainWindow):
     def _build_status_bar(self):
         self._status_label = QLabel("画像を開いてください")
         self.statusBar().addWidget(self._status_label)
+        self._content_label = QLabel("")
+        self.statusBar().addPermanentWidget(self._content_label)
+
+    def _refresh_content_label(self, *_):
+        """Content bbox of the cell under the cursor, relative to the cell centre."""
+        document = self._canvas.document
+        cell = self._canvas._hover_cell
+        if document is None or cell is None:
+            self._content_label.setText("")
+            return
+        col, row = cell
+        content = self._canvas.content.cell(document, col, row)
+        if content.box is None:
+            self._content_label.setText(f"コマ ({row},{col}) 空")
+            return
+        x0, y0, x1, y1 = content.box
+        dx, dy = self._canvas.content.center_offset(document, col, row)
+        self._content_label.setText(
+            f"コマ ({row},{col}) 内容 {x1 - x0}×{y1 - y0} px  中心から x {dx:+g}, y {dy:+g}")
 
     def _sync_scrollbars(self):
         """Update scrollbar ranges and values to match current canvas viewport."""
@@ -507,16 +826,22 @@ class MainWindow(QMainWindow):
             self._canvas._offset = QPointF(self._canvas._offset.x(), -val)
             self._canvas.update()
 
-    def _on_image_changed(self):
+    def _refresh_size_label(self):
         if self._canvas.image:
             w, h = self._canvas.image.size
             self._status_label.setText(f"{w} × {h} px")
+        else:
+            self._status_label.setText("画像を開いてください")
+
+    def _on_image_changed(self):
+        self._refresh_size_label()
         self._anim_rebuild_frames()
+        self._frame_panel.rebuild()
+        self._refresh_overflow_label()
+        self._refresh_content_label()
 
     def _anim_rebuild_frames(self):
         """Rebuild animation frames from current image. Called on every image change."""
-        from PyQt6.QtGui import QPixmap
-        from .canvas import pil_to_qimage
         img = self._canvas.image
         if not img:
             self._anim_frames = []
@@ -524,14 +849,9 @@ class MainWindow(QMainWindow):
             self._anim_frame_label.setText("- / -")
             return
         grid = self._canvas.grid
-        iw, ih = img.size
-        frames = []
-        for row in range(grid.config.rows):
-            for col in range(grid.config.cols):
-                x, y, w, h = grid.cell_rect(iw, ih, col, row)
-                cell = img.crop((x, y, x + w, y + h))
-                qi = pil_to_qimage(cell)
-                frames.append(QPixmap.fromImage(qi))
+        # cut from the display pixmap (cached per cell, no PIL round trip)
+        frames = [self._canvas.cell_pixmap(col, row)
+                  for row in range(grid.config.rows) for col in range(grid.config.cols)]
         self._anim_frames = frames
         total = len(frames)
         # update range spinbox limits
@@ -599,91 +919,316 @@ class MainWindow(QMainWindow):
             self._anim_timer.setInterval(1000 // val)
 
     def _on_file_dropped(self, path: str):
-        self._filepath = path
-        self.setWindowTitle(f"Grid Sprite Editor — {os.path.basename(path)}")
+        self._open_path(path)
 
     # ------------------------------------------------------------------
     # File operations
     # ------------------------------------------------------------------
     def _open_file(self):
-        path, _ = QFileDialog.getOpenFileName(
-            self, "画像を開く", "", "PNG Files (*.png);;All Files (*)"
+        paths, _ = QFileDialog.getOpenFileNames(
+            self, "画像を開く", "",
+            f"PNG / プロジェクト (*.png *{PROJECT_EXT});;PNG Files (*.png);;"
+            f"プロジェクト (*{PROJECT_EXT});;All Files (*)"
         )
-        if path:
-            self._canvas.load_image(path)
-            self._filepath = path
-            self.setWindowTitle(f"Grid Sprite Editor — {os.path.basename(path)}")
+        for path in paths:
+            self._open_path(path)
 
     def _save_file(self):
         if not self._canvas.image:
             return
+        self._canvas.commit_floating()
         if not self._filepath:
             self._save_file_as()
             return
-        self._canvas.image.save(self._filepath)
+        self._write_file(self._filepath)
         self.statusBar().showMessage("保存しました", 2000)
 
+    def _write_file(self, path: str):
+        """Save as a project (.gsproj: with grid, rulers and history) or a plain PNG."""
+        canvas = self._canvas
+        if is_project(path):
+            save_project(path, canvas.document, canvas.grid.config, canvas.history, canvas.content)
+        else:
+            save_png(canvas.image, path, self._palette_mode)
+        self._restart_journal()
+
     def _save_file_as(self):
         if not self._canvas.image:
             return
-        path, _ = QFileDialog.getSaveFileName(
-            self, "名前を付けて保存", "", "PNG Files (*.png)"
+        self._canvas.commit_floating()
+        path, selected = QFileDialog.getSaveFileName(
+            self, "名前を付けて保存", "", f"PNG Files (*.png);;プロジェクト (*{PROJECT_EXT})"
         )
         if path:
-            if not path.lower().endswith(".png"):
-                path += ".png"
-            self._canvas.image.save(path)
-            self._filepath = path
-            self.setWindowTitle(f"Grid Sprite Editor — {os.path.basename(path)}")
+            if not path.lower().endswith((".png", PROJECT_EXT)):
+                path += PROJECT_EXT if PROJECT_EXT in selected else ".png"
+            self._filepath = os.path.abspath(path)
+            self._write_file(self._filepath)
+            self._update_titles()
             self.statusBar().showMessage("保存しました", 2000)
 
+    def _restart_journal(self):
+        """The saved file is the new recovery base. A quantized palette save differs
+        from the document, so the journal then starts from a full snapshot."""
+        canvas = self._canvas
+        exact = is_project(canvas.filepath) or self._palette_mode != "quantize"
+        canvas.journal.start(canvas.filepath, None if exact else canvas.document.pixels)
+
+    # ------------------------------------------------------------------
+    # Macros
+    # ------------------------------------------------------------------
+    def _toggle_macro_recording(self, on: bool):
+        if on:
+            self._recorder = MacroRecorder()
+            self._canvas.recorder = self._recorder
+            self.statusBar().showMessage("マクロを記録中…", 3000)
+            return
+        recorder, self._recorder = self._recorder, None
+        self._canvas.recorder = None
+        if recorder is None or not len(recorder):
+            self.statusBar().showMessage("記録された操作はありません", 3000)
+            return
+        path, _ = QFileDialog.getSaveFileName(self, "マクロを保存", "", "マクロ (*.json)")
+        if path:
+            if not path.lower().endswith(".json"):
+                path += ".json"
+            recorder.macro.save(path)
+            self.statusBar().showMessage(f"マクロを保存しました（{len(recorder)} 操作）", 3000)
+
+    def _load_macro(self) -> Macro | None:
+        path, _ = QFileDialog.getOpenFileName(self, "マクロを開く", "", "マクロ (*.json)")
+        if not path:
+            return None
+        try:
+            return Macro.load(path)
+        except (OSError, ValueError, KeyError) as e:
+            QMessageBox.warning(self, "マクロ", f"マクロを読み込めませんでした:\n{e}")
+            return None
+
+    def _apply_macro(self):
+        if not self._canvas.image:
+            return
+        macro = self._load_macro()
+        if macro is None:
+            return
+        try:
+            self._canvas.apply_macro(macro)
+        except ValueError as e:
+            QMessageBox.warning(self, "マクロ", f"マクロを適用できませんでした:\n{e}")
+
+    def _batch_macro(self):
+        if self._macro_job is not None:
+            return
+        macro = self._load_macro()
+        if macro is None:
+            return
+        paths, _ = QFileDialog.getOpenFileNames(self, "適用するシート", "", "PNG Files (*.png)")
+        if not paths:
+            return
+        out_dir = QFileDialog.getExistingDirectory(self, "出力先フォルダ")
+        if not out_dir:
+            return
+        outs = [os.path.join(out_dir, os.path.basename(p)) for p in paths]
+        self._macro_job = MacroJob(macro, paths, outs, palette=self._palette_mode)
+        self._macro_errors: list[str] = []
+        self._macro_progress = QProgressDialog("マクロを適用中…", "中止", 0, len(paths), self)
+        self._macro_progress.setWindowTitle("マクロの一括適用")
+        self._macro_progress.setWindowModality(Qt.WindowModality.WindowModal)
+        self._macro_progress.canceled.connect(self._cancel_batch_macro)
+        self._macro_job.start()
+        self._macro_timer = QTimer(self)
+        self._macro_timer.setInterval(50)
+        self._macro_timer.timeout.connect(self._poll_batch_macro)
+        self._macro_timer.start()
+
+    def _poll_batch_macro(self):
+        job = self._macro_job
+        if job is None:
+            return
+        for path, _out, error in job.poll():
+            if error is not None:
+                self._macro_errors.append(f"{os.path.basename(path)}: {error}")
+        self._macro_progress.setValue(job.done)
+        if job.done >= job.total:
+            self._finish_batch_macro(f"{job.total - len(self._macro_errors)} / {job.total} 枚に適用しました")
+
+    def _cancel_batch_macro(self):
+        if self._macro_job is not None:
+            self._macro_job.cancel()
+            self._finish_batch_macro(f"中止しました（{self._macro_job.done} 枚完了）")
+
+    def _finish_batch_macro(self, message: str):
+        self._macro_timer.stop()
+        self._macro_job = None
+        self._macro_progress.canceled.disconnect(self._cancel_batch_macro)
+        self._macro_progress.close()
+        if self._macro_errors:
+            message += "\n\n失敗:\n" + "\n".join(self._macro_errors)
+        QMessageBox.information(self, "マクロの一括適用", message)
+
+    # ------------------------------------------------------------------
+    # Crash recovery
+    # ------------------------------------------------------------------
+    def _recover_journals(self):
+        for orphan in journal.find_orphans():
+            name = os.path.basename(orphan.source) if orphan.source else "無題"
+            text = f"前回異常終了したときの編集内容が残っています: {name}\n復元しますか？"
+            if orphan.source_changed:
+                text += "\n(元のファイルはその後変更されているため、正しく復元できない可能性があります)"
+            ans = QMessageBox.question(
+                self, "編集内容の復元", text,
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if ans == QMessageBox.StandardButton.Yes:
+                try:
+                    document = journal.replay(orphan)
+                except (OSError, ValueError):
+                    document = None
+                if document is not None:
+                    self._open_recovered(document, orphan.source)
+                else:
+                    QMessageBox.warning(self, "編集内容の復元", f"{name} を復元できませんでした")
+            journal.remove(orphan)
+
+    def _open_recovered(self, document, source: str | None):
+        canvas = self._canvas if not self._canvas.image else self._add_canvas()
+        self._tabs.setCurrentWidget(canvas)
+        canvas.load_recovered(document, source)
+        self._budget.touch(canvas)
+        self._update_titles()
+        self.statusBar().showMessage("編集内容を復元しました（未保存）", 4000)
+
+    def closeEvent(self, event):
+        for i in range(self._tabs.count()):
+            self._tabs.widget(i).journal.discard()
+        journal.wait_for_writes()
+        super().closeEvent(event)
+
     # ------------------------------------------------------------------
     # Resize
     # ------------------------------------------------------------------
     def _resize_dialog(self):
         if not self._canvas.image:
             return
-        dlg = ResizeDialog(self._canvas.image.size, self)
+        self._canvas.commit_floating()
+        dlg = ResizeDialog(self._canvas.image, self._canvas.grid, self)
         if dlg.exec() == QDialog.DialogCode.Accepted:
-            w, h = dlg.selected_size()
-            self._canvas.history.push(self._canvas.image)
-            self._canvas.image = resize_image(self._canvas.image, w, h)
-            self._canvas.refresh_pixmap()
+            iw, ih = self._canvas.document.size
+            self._canvas.history.push(self._canvas.document.pixels)
+            self._canvas.image = dlg.result_image()
+            w, h = self._canvas.document.size
+            self._canvas.record_step("resize", scale=[w / iw, h / ih], per_cell=dlg.per_cell())
+            self._canvas.mark_dirty()
             self._canvas.fit_view()
             self._canvas.image_changed.emit()
 
+    # ------------------------------------------------------------------
+    # Cleanup
+    # ------------------------------------------------------------------
+    def _remove_background_dialog(self):
+        if not self._canvas.image:
+            return
+        self._canvas.commit_floating()
+        dlg = RemoveBackgroundDialog(self._canvas.image, self)
+        if dlg.exec() == QDialog.DialogCode.Accepted:
+            self._canvas.remove_background(*dlg.values())
+            self.statusBar().showMessage("背景を除去しました（Ctrl+Z で元に戻せます）", 3000)
+
+    def _defringe_dialog(self):
+        if not self._canvas.image:
+            return
+        self._canvas.commit_floating()
+        dlg = DefringeDialog(self._canvas.image, self)
+        if dlg.exec() == QDialog.DialogCode.Accepted:
+            self._canvas.defringe(*dlg.values())
+            self.statusBar().showMessage("フチ・ハローを除去しました（Ctrl+Z で元に戻せます）", 3000)
+
+    def _relayout_dialog(self):
+        if not self._canvas.image:
+            return
+        self._canvas.commit_floating()
+        dlg = RelayoutDialog(self._canvas, self)
+        if dlg.exec() == QDialog.DialogCode.Accepted:
+            self._canvas.relayout(*dlg.values())
+            self.statusBar().showMessage("再レイアウトしました（Ctrl+Z で元に戻せます）", 3000)
+
     # ------------------------------------------------------------------
     # Export
     # ------------------------------------------------------------------
     def _export_cells(self):
         if not self._canvas.image:
             return
+        self._canvas.commit_floating()
         out_dir = QFileDialog.getExistingDirectory(self, "エクスポート先フォルダ")
         if not out_dir:
             return
         base = os.path.basename(self._filepath) if self._filepath else "sprite.png"
-        paths = export_cells(self._canvas.image, self._canvas.grid, out_dir, base)
+        dedupe = False
+        redundant = self._canvas.duplicates.redundant_cells(self._canvas.document)
+        if redundant:
+            ans = QMessageBox.question(
+                self, "重複コマ",
+                f"ほぼ同じコマが {len(redundant)} 枚あります。重複を除いて書き出しますか？",
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            dedupe = ans == QMessageBox.StandardButton.Yes
+        paths = export_cells(self._canvas.image, self._canvas.grid, out_dir, base,
+                             dedupe=dedupe, max_distance=self._canvas.duplicates.max_distance,
+                             palette=self._palette_mode)
         QMessageBox.information(self, "エクスポート完了",
                                 f"{len(paths)} 枚のPNGを出力しました。\n{out_dir}")
 
+    def _export_metadata(self):
+        """Frame rects, pivots and durations (animation FPS / range) as engine JSON."""
+        if not self._canvas.image:
+            return
+        self._canvas.commit_floating()
+        dlg = MetadataDialog(self)
+        if dlg.exec() != QDialog.DialogCode.Accepted:
+            return
+        fmt, pivot, use_range = dlg.values()
+        sheet = self._filepath or "sprite.png"
+        image_name = os.path.splitext(os.path.basename(sheet))[0] + ".png"
+        path, _ = QFileDialog.getSaveFileName(
+            self, "フレーム情報の保存先", metadata_path(sheet, None, fmt), "JSON (*.json)")
+        if not path:
+            return
+        canvas = self._canvas
+        content = canvas.content.boxes(canvas.document) if pivot == "content" else None
+        frame_range = self._anim_range() if use_range and self._anim_frames else None
+        try:
+            frames = write_metadata(path, fmt, canvas.image.size, canvas.grid, image_name,
+                                    content, pivot, self._spin_anim_fps.value(), frame_range)
+        except OSError as e:
+            QMessageBox.warning(self, "エラー", f"保存できませんでした:\n{e}")
+            return
+        self.statusBar().showMessage(f"{len(frames)} コマのフレーム情報を出力しました: {path}", 5000)
+
     # ------------------------------------------------------------------
     # Animation
     # ------------------------------------------------------------------
     def _show_animation(self):
         if not self._canvas.image:
             return
+        self._canvas.commit_floating()
         from .animation import AnimationPreviewDialog
         dlg = AnimationPreviewDialog(self._canvas.image, self._canvas.grid, self)
         dlg.exec()
 
 
 class ResizeDialog(QDialog):
-    def __init__(self, current_size: tuple[int, int], parent=None):
+    """Pick a target size, then run the tiled resize with progress and cancel."""
+
+    def __init__(self, image, grid, parent=None):
         super().__init__(parent)
         self.setWindowTitle("リサイズ")
+        self._image = image
+        self._grid = grid
+        self._job: TiledResizeJob | None = None
+        self._timer = QTimer(self)
+        self._timer.setInterval(50)
+        self._timer.timeout.connect(self._poll_job)
         layout = QVBoxLayout(self)
 
-        cw, ch = current_size
+        cw, ch = image.size
         layout.addWidget(QLabel(f"現在のサイズ: {cw} × {ch} px"))
 
         form = QFormLayout()
@@ -694,14 +1239,305 @@ class ResizeDialog(QDialog):
         form.addRow("プリセット:", self._combo)
         layout.addLayout(form)
 
-        btns = QDialogButtonBox(
+        self._chk_per_cell = QCheckBox("コマごとにリサイズ（コマ境界のにじみを防ぐ）")
+        layout.addWidget(self._chk_per_cell)
+
+        self._progress = QProgressBar()
+        self._progress.setVisible(False)
+        layout.addWidget(self._progress)
+
+        self._btns = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
         )
-        btns.accepted.connect(self.accept)
-        btns.rejected.connect(self.reject)
-        layout.addWidget(btns)
+        self._btns.accepted.connect(self._start_resize)
+        self._btns.rejected.connect(self.reject)
+        layout.addWidget(self._btns)
 
     def selected_size(self) -> tuple[int, int]:
         idx = self._combo.currentIndex()
         _, w, h = RESIZE_PRESETS[idx]
         return w, h
+
+    def per_cell(self) -> bool:
+        return self._chk_per_cell.isChecked()
+
+    def result_image(self):
+        return self._job.result() if self._job else None
+
+    def _start_resize(self):
+        w, h = self.selected_size()
+        if self._chk_per_cell.isChecked():
+            self._job = CellResizeJob(self._image, self._grid, w, h)
+        else:
+            self._job = TiledResizeJob(self._image, w, h)
+        self._job.start()
+        if self._job.error is not None:
+            self._job_failed()
+            return
+        if self._job.done >= self._job.total:
+            self.accept()
+            return
+        self._combo.setEnabled(False)
+        self._chk_per_cell.setEnabled(False)
+        self._btns.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self._progress.setRange(0, self._job.total)
+        self._progress.setValue(0)
+        self._progress.setVisible(True)
+        self._timer.start()
+
+    def _poll_job(self):
+        done = self._job.poll()
+        if self._job.error is not None:
+            self._job_failed()
+            return
+        self._progress.setValue(done)
+        if done >= self._job.total:
+            self._timer.stop()
+            self.accept()
+
+    def _job_failed(self):
+        error = self._job.error
+        QMessageBox.warning(self, "リサイズ", f"リサイズに失敗しました:\n{str(error) or repr(error)}")
+        self.reject()
+
+    def reject(self):
+        self._timer.stop()
+        if self._job:
+            self._job.cancel()
+            self._job = None
+        super().reject()
+
+
+class RemoveBackgroundDialog(QDialog):
+    """Key colour, tolerance, feather and border-flood option for background removal."""
+
+    def __init__(self, image, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("背景を除去")
+        self._color = QColor(*sample_background(image))
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self._btn_color = QPushButton()
+        self._btn_color.setFixedWidth(60)
+        self._btn_color.clicked.connect(self._pick_color)
+        self._update_color_button()
+        form.addRow("除去する色:", self._btn_color)
+
+        self._spin_tolerance = QSpinBox()
+        self._spin_tolerance.setRange(0, 255)
+        self._spin_tolerance.setValue(24)
+        form.addRow("許容値:", self._spin_tolerance)
+
+        self._spin_feather = QSpinBox()
+        self._spin_feather.setRange(0, 128)
+        self._spin_feather.setValue(8)
+        form.addRow("境界ぼかし:", self._spin_feather)
+        layout.addLayout(form)
+
+        self._chk_borders = QCheckBox("コマの縁につながる部分のみ（内側の同色を残す）")
+        self._chk_borders.setChecked(True)
+        layout.addWidget(self._chk_borders)
+
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+    def _update_color_button(self):
+        self._btn_color.setStyleSheet(
+            f"background-color: {self._color.name()}; border: 1px solid #888;")
+
+    def _pick_color(self):
+        c = QColorDialog.getColor(self._color, self, "除去する色")
+        if c.isValid():
+            self._color = c
+            self._update_color_button()
+
+    def values(self) -> tuple[tuple[int, int, int], int, bool, int]:
+        """(color, tolerance, from_borders, feather) for SpriteCanvas.remove_background."""
+        return ((self._color.red(), self._color.green(), self._color.blue()),
+                self._spin_tolerance.value(), self._chk_borders.isChecked(),
+                self._spin_feather.value())
+
+
+class DefringeDialog(QDialog):
+    """Alpha threshold, background un-mixing and alpha erode/dilate for edge cleanup."""
+
+    def __init__(self, image, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("フチ・ハロー除去")
+        # hidden RGB under transparent corners is usually the removed background
+        self._color = QColor(*sample_background(image))
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self._spin_threshold = QSpinBox()
+        self._spin_threshold.setRange(0, 255)
+        self._spin_threshold.setValue(16)
+        form.addRow("アルファしきい値:", self._spin_threshold)
+
+        color_row = QHBoxLayout()
+        self._chk_unmix = QCheckBox("背景色の混ざりを除去")
+        self._chk_unmix.setChecked(True)
+        color_row.addWidget(self._chk_unmix)
+        self._btn_color = QPushButton()
+        self._btn_color.setFixedWidth(60)
+        self._btn_color.clicked.connect(self._pick_color)
+        self._update_color_button()
+        color_row.addWidget(self._btn_color)
+        form.addRow("背景色:", color_row)
+
+        self._spin_grow = QSpinBox()
+        self._spin_grow.setRange(-10, 10)
+        self._spin_grow.setValue(0)
+        self._spin_grow.setSuffix(" px")
+        self._spin_grow.setToolTip("マイナスで収縮、プラスで膨張")
+        form.addRow("アルファ収縮/膨張:", self._spin_grow)
+        layout.addLayout(form)
+
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+    def _update_color_button(self):
+        self._btn_color.setStyleSheet(
+            f"background-color: {self._color.name()}; border: 1px solid #888;")
+
+    def _pick_color(self):
+        c = QColorDialog.getColor(self._color, self, "背景色")
+        if c.isValid():
+            self._color = c
+            self._update_color_button()
+
+    def values(self) -> tuple[int, tuple[int, int, int] | None, int]:
+        """(alpha_threshold, bg_color or None, grow) for SpriteCanvas.defringe."""
+        color = (self._color.red(), self._color.green(), self._color.blue()) \
+            if self._chk_unmix.isChecked() else None
+        return self._spin_threshold.value(), color, self._spin_grow.value()
+
+
+class RelayoutDialog(QDialog):
+    """Target grid (or strip), padding, trimming and empty-frame skipping for
+    SpriteCanvas.relayout, with the resulting layout previewed."""
+
+    def __init__(self, canvas, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("シートの再レイアウト")
+        self._canvas = canvas
+        cfg = canvas.grid.config
+        layout = QVBoxLayout(self)
+
+        form = QFormLayout()
+        self._combo = QComboBox()
+        self._combo.addItems(["グリッド（列×行を指定）", "横一列", "縦一列"])
+        self._combo.currentIndexChanged.connect(self._update)
+        form.addRow("配置:", self._combo)
+        self._spin_cols = QSpinBox()
+        self._spin_cols.setRange(0, 256)
+        self._spin_cols.setValue(cfg.cols)
+        self._spin_cols.setSpecialValueText("自動")
+        self._spin_rows = QSpinBox()
+        self._spin_rows.setRange(0, 256)
+        self._spin_rows.setValue(cfg.rows)
+        self._spin_rows.setSpecialValueText("自動")
+        size_row = QHBoxLayout()
+        size_row.addWidget(self._spin_cols)
+        size_row.addWidget(QLabel("×"))
+        size_row.addWidget(self._spin_rows)
+        form.addRow("列 × 行:", size_row)
+        self._spin_padding = QSpinBox()
+        self._spin_padding.setRange(0, 256)
+        self._spin_padding.setSuffix(" px")
+        self._spin_padding.setToolTip("各コマの上下左右に付ける透明の余白")
+        form.addRow("余白:", self._spin_padding)
+        self._chk_trim = QCheckBox("全コマ共通の内容範囲に切り詰める")
+        form.addRow("", self._chk_trim)
+        self._chk_skip = QCheckBox("空のコマを詰める")
+        form.addRow("", self._chk_skip)
+        for w in (self._spin_cols, self._spin_rows, self._spin_padding):
+            w.valueChanged.connect(self._update)
+        for w in (self._chk_trim, self._chk_skip):
+            w.toggled.connect(self._update)
+        layout.addLayout(form)
+
+        self._info = QLabel()
+        layout.addWidget(self._info)
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+        self._update()
+
+    def values(self) -> tuple[int, int, int, bool, bool]:
+        """(cols, rows, padding, trim, skip_empty) for SpriteCanvas.relayout (0 = auto)."""
+        mode = self._combo.currentIndex()
+        cols, rows = self._spin_cols.value(), self._spin_rows.value()
+        if mode == 1:
+            cols, rows = 0, 1
+        elif mode == 2:
+            cols, rows = 1, 0
+        return cols, rows, self._spin_padding.value(), self._chk_trim.isChecked(), \
+            self._chk_skip.isChecked()
+
+    def _update(self):
+        grid_mode = self._combo.currentIndex() == 0
+        self._spin_cols.setEnabled(grid_mode)
+        self._spin_rows.setEnabled(grid_mode)
+        cols, rows, padding, trim, skip = self.values()
+        canvas = self._canvas
+        counts = canvas.content.boxes(canvas.document)[1] if skip else None
+        frames = len(relayout_frames(canvas.grid, counts, skip))
+        cols, rows = fit_layout(frames, cols, rows)
+        text = f"{frames} コマ → {cols} × {rows}"
+        if frames > cols * rows:
+            text += f"（{frames - cols * rows} コマは入りきりません）"
+        self._info.setText(text)
+
+
+class MetadataDialog(QDialog):
+    """Layout, pivot source and frame range for _export_metadata."""
+
+    _FORMAT_LABELS = {"aseprite": "Aseprite / TexturePacker (JSON Array)",
+                      "godot": "Godot (SpriteFrames 用)", "unity": "Unity (Sprite 矩形とピボット)"}
+    _PIVOTS = [("コマの中心", "center"), ("ルーラー（縦線と一番下の横線）", "rulers"),
+               ("内容の下端中央（足元）", "content")]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("フレーム情報をエクスポート")
+        layout = QVBoxLayout(self)
+        form = QFormLayout()
+        self._combo_format = QComboBox()
+        for fmt in METADATA_FORMATS:
+            self._combo_format.addItem(self._FORMAT_LABELS[fmt], fmt)
+        form.addRow("形式:", self._combo_format)
+        self._combo_pivot = QComboBox()
+        for label, mode in self._PIVOTS:
+            self._combo_pivot.addItem(label, mode)
+        form.addRow("ピボット:", self._combo_pivot)
+        self._chk_range = QCheckBox("アニメーションの再生範囲のコマのみ")
+        self._chk_range.setChecked(True)
+        form.addRow("", self._chk_range)
+        layout.addLayout(form)
+        info = QLabel("表示時間はアニメーションの FPS から計算します。")
+        info.setWordWrap(True)
+        layout.addWidget(info)
+        btns = QDialogButtonBox(
+            QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+        )
+        btns.accepted.connect(self.accept)
+        btns.rejected.connect(self.reject)
+        layout.addWidget(btns)
+
+    def values(self) -> tuple[str, str, bool]:
+        """(format, pivot mode, limit to the animation range)."""
+        return self._combo_format.currentData(), self._combo_pivot.currentData(), \
+            self._chk_range.isChecked()
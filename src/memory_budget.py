@@ -0,0 +1,44 @@
+"""Shared memory budget for the display caches of open documents (no Qt required)."""
+from __future__ import annotations
+from collections import OrderedDict
+
+PIXMAP_BUDGET = 512 * 1024 * 1024   # bytes of display caches kept across all tabs
+
+
+class CacheBudget:
+    """LRU accounting of per-document display caches.
+
+    Owners implement cache_bytes() -> int and release_caches(). touch() marks an
+    owner most recently used; when the total goes over budget the least recently
+    used owners release their caches (rebuilt lazily from the document when shown
+    again). The most recent owner is never evicted, even on its own over budget.
+    """
+
+    def __init__(self, budget: int = PIXMAP_BUDGET):
+        self.budget = budget
+        self._lru: OrderedDict = OrderedDict()   # owner -> None, least recent first
+
+    def touch(self, owner) -> list:
+        """Mark owner as in use and enforce the budget; returns the evicted owners."""
+        self._lru[owner] = None
+        self._lru.move_to_end(owner)
+        return self.enforce()
+
+    def remove(self, owner):
+        self._lru.pop(owner, None)
+
+    def total(self) -> int:
+        return sum(owner.cache_bytes() for owner in self._lru)
+
+    def enforce(self) -> list:
+        sizes = {owner: owner.cache_bytes() for owner in self._lru}
+        total = sum(sizes.values())
+        evicted = []
+        for owner in list(self._lru)[:-1]:
+            if total <= self.budget:
+                break
+            if sizes[owner]:
+                owner.release_caches()
+                total -= sizes[owner]
+                evicted.append(owner)
+        return evicted
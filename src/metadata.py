@@ -0,0 +1,218 @@
+"""Frame metadata for game engines: per-frame rects, pivots and durations written as
+JSON next to a sheet, so an import step need not re-analyse it (no Qt required).
+
+Layouts:
+    aseprite   Aseprite "array" JSON (frames + meta.frameTags); the per-frame
+               normalized pivot is the TexturePacker / Phaser extension
+    godot      hframes / vframes, regions and Sprite2D offsets for a SpriteFrames import
+    unity      sprite rects and pivots in Unity's bottom-left origin, plus frame rate
+"""
+from __future__ import annotations
+import json
+import os
+from dataclasses import dataclass
+import numpy as np
+from .analysis import ContentIndex, content_boxes
+from .document import Document
+from .grid import GridManager, GridConfig
+from .project import is_project, open_project
+
+METADATA_FORMATS = ("aseprite", "godot", "unity")
+PIVOT_MODES = ("center", "rulers", "content")   # content = bottom centre of the content bbox
+UNITY_PIXELS_PER_UNIT = 100
+
+
+@dataclass
+class FrameMeta:
+    name: str                               # matches export_cells' file names (without .png)
+    cell: tuple[int, int]                   # (col, row)
+    rect: tuple[int, int, int, int]         # (x, y, w, h) in the sheet, top-left origin
+    pivot: tuple[float, float]              # frame-relative pixels
+    duration: int                           # ms
+
+
+def frame_durations(count: int, fps: float) -> list[int]:
+    """Whole-millisecond durations whose running total stays on the fps clock
+    (8 fps -> 125 ms each; 12 fps -> 83, 84, 83, ...)."""
+    fps = max(fps, 0.001)
+    return [round(1000 * (i + 1) / fps) - round(1000 * i / fps) for i in range(count)]
+
+
+def _ruler_pivot(config: GridConfig) -> tuple[float | None, float | None]:
+    """Relative pivot from the rulers: the vertical one nearest the cell centre and
+    the lowest horizontal one (the ground line). None for an axis without rulers."""
+    rx = min(config.v_rulers, key=lambda r: abs(r - 0.5)) if config.v_rulers else None
+    ry = max(config.h_rulers) if config.h_rulers else None
+    return rx, ry
+
+
+def build_frames(image_size: tuple[int, int], grid: GridManager, stem: str,
+                 content: tuple[np.ndarray, np.ndarray] | None = None,
+                 pivot: str = "center", fps: float = 8,
+                 frame_range: tuple[int, int] | None = None) -> list[FrameMeta]:
+    """Row-major frames first..last (0-based, inclusive; None = all cells).
+
+    pivot "rulers" uses the grid's ruler lines, "content" the bottom centre of
+    each cell's content bbox from content = (boxes, counts) as returned by
+    content_boxes / ContentIndex.boxes; either falls back to the cell centre
+    where there is nothing to go by.
+    """
+    if pivot not in PIVOT_MODES:
+        raise ValueError(f"unknown pivot mode: {pivot}")
+    if pivot == "content" and content is None:
+        raise ValueError("content pivot needs the content index")
+    iw, ih = image_size
+    cfg = grid.config
+    cells = [(c, r) for r in range(cfg.rows) for c in range(cfg.cols)]
+    if frame_range is not None:
+        cells = cells[frame_range[0]:frame_range[1] + 1]
+    rx, ry = _ruler_pivot(cfg) if pivot == "rulers" else (None, None)
+    frames = []
+    for (col, row), duration in zip(cells, frame_durations(len(cells), fps)):
+        x, y, w, h = grid.cell_rect(iw, ih, col, row)
+        px = w * rx if rx is not None else w / 2
+        py = h * ry if ry is not None else h / 2
+        if pivot == "content":
+            boxes, counts = content
+            if counts[row, col]:
+                x0, _, x1, y1 = (int(v) for v in boxes[row, col])
+                px, py = (x0 + x1) / 2 - x, y1 - y
+        frames.append(FrameMeta(f"{stem}_{row}_{col}", (col, row), (x, y, w, h),
+                                (float(px), float(py)), duration))
+    return frames
+
+
+# ----------------------------------------------------------------------
+# Layouts
+# ----------------------------------------------------------------------
+def _aseprite(frames: list[FrameMeta], image: str, size: tuple[int, int],
+              grid: GridManager, fps: float, tag: str) -> dict:
+    out = []
+    for f in frames:
+        x, y, w, h = f.rect
+        out.append({
+            "filename": f.name + ".png",
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": False,
+            "trimmed": False,
+            "spriteSourceSize": {"x": 0, "y": 0, "w": w, "h": h},
+            "sourceSize": {"w": w, "h": h},
+            "pivot": {"x": round(f.pivot[0] / w, 4), "y": round(f.pivot[1] / h, 4)},
+            "duration": f.duration,
+        })
+    return {
+        "frames": out,
+        "meta": {
+            "app": "grid-sprite-editor",
+            "image": image,
+            "format": "RGBA8888",
+            "size": {"w": size[0], "h": size[1]},
+            "scale": "1",
+            "frameTags": [{"name": tag, "from": 0, "to": len(frames) - 1,
+                           "direction": "forward"}] if frames else [],
+        },
+    }
+
+
+def _godot(frames: list[FrameMeta], image: str, size: tuple[int, int],
+           grid: GridManager, fps: float, tag: str) -> dict:
+    cfg = grid.config
+    return {
+        "texture": image,
+        "size": list(size),
+        "hframes": cfg.cols,
+        "vframes": cfg.rows,
+        "animations": [{
+            "name": tag,
+            "speed": fps,
+            "loop": True,
+            "frames": [{
+                "frame": f.cell[1] * cfg.cols + f.cell[0],
+                "region": list(f.rect),
+                # Sprite2D (centered) offset that puts the pivot on the node origin
+                "offset": [f.rect[2] / 2 - f.pivot[0], f.rect[3] / 2 - f.pivot[1]],
+                "duration": round(f.duration * fps / 1000, 4),   # relative to 1 / speed
+            } for f in frames],
+        }],
+    }
+
+
+def _unity(frames: list[FrameMeta], image: str, size: tuple[int, int],
+           grid: GridManager, fps: float, tag: str) -> dict:
+    ih = size[1]
+    return {
+        "texture": image,
+        "size": {"width": size[0], "height": size[1]},
+        "pixelsPerUnit": UNITY_PIXELS_PER_UNIT,
+        "sprites": [{
+            "name": f.name,
+            "rect": {"x": f.rect[0], "y": ih - f.rect[1] - f.rect[3],
+                     "width": f.rect[2], "height": f.rect[3]},
+            "alignment": 9,   # SpriteAlignment.Custom
+            "pivot": {"x": round(f.pivot[0] / f.rect[2], 4),
+                      "y": round(1 - f.pivot[1] / f.rect[3], 4)},
+        } for f in frames],
+        "animation": {"name": tag, "frameRate": fps, "loop": True,
+                      "frames": [f.name for f in frames]},
+    }
+
+
+_LAYOUTS = {"aseprite": _aseprite, "godot": _godot, "unity": _unity}
+
+
+def metadata_json(fmt: str, frames: list[FrameMeta], image: str, size: tuple[int, int],
+                  grid: GridManager, fps: float, tag: str) -> dict:
+    if fmt not in _LAYOUTS:
+        raise ValueError(f"unknown metadata format: {fmt}")
+    return _LAYOUTS[fmt](frames, image, size, grid, fps, tag)
+
+
+def write_metadata(path: str, fmt: str, image_size: tuple[int, int], grid: GridManager,
+                   image_name: str, content: tuple[np.ndarray, np.ndarray] | None = None,
+                   pivot: str = "center", fps: float = 8,
+                   frame_range: tuple[int, int] | None = None) -> list[FrameMeta]:
+    """Build the frames and write them as fmt JSON to path; returns the frames.
+    image_name is the sheet file the JSON refers to (normally a sibling of path)."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    frames = build_frames(image_size, grid, stem, content, pivot, fps, frame_range)
+    data = metadata_json(fmt, frames, image_name, image_size, grid, fps, stem)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=1, ensure_ascii=False)
+    return frames
+
+
+# ----------------------------------------------------------------------
+# Batch
+# ----------------------------------------------------------------------
+def metadata_path(sheet: str, out_dir: str | None, fmt: str) -> str:
+    """<stem>.json next to the sheet (or in out_dir); other layouts get a suffix."""
+    stem = os.path.splitext(os.path.basename(sheet))[0]
+    name = f"{stem}.json" if fmt == "aseprite" else f"{stem}.{fmt}.json"
+    return os.path.join(out_dir if out_dir else os.path.dirname(os.path.abspath(sheet)), name)
+
+
+def sheet_metadata(path: str, grid_config: GridConfig, fmt: str, out_dir: str | None = None,
+                   pivot: str = "center", fps: float = 8,
+                   frame_range: tuple[int, int] | None = None) -> str:
+    """Write metadata for one sheet file and return the JSON path.
+
+    A .gsproj supplies its own grid and rulers and, when its stored content
+    index is current, the content boxes, so no pixels are scanned; a PNG is
+    scanned once (alpha only) if the pivot needs content.
+    """
+    if is_project(path):
+        project = open_project(path)
+        document, grid = project.document, GridManager(project.grid_config)
+        index = ContentIndex(grid)
+        project.restore_index(index)
+        content = index.boxes(document) if pivot == "content" else None
+        image_name = os.path.splitext(os.path.basename(path))[0] + ".png"
+    else:
+        document, grid = Document.open(path), GridManager(grid_config)
+        content = content_boxes(document.pixels[..., 3], grid) if pivot == "content" else None
+        image_name = os.path.basename(path)
+    out = metadata_path(path, out_dir, fmt)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    write_metadata(out, fmt, document.size, grid, image_name, content, pivot, fps, frame_range)
+    return out
@@ -0,0 +1,200 @@
+"""Project files (.gsproj): the sheet plus grid / ruler layout, undo history and
+cached analysis in one zip archive (no Qt required).
+
+    project.json            format version, sheet size, grid config, history boxes / layouts,
+                            index layout
+    sheet.png               the sheet itself
+    thumbnail.png           THUMB_SIZE preview (for file browsers)
+    history/undo/NNNN.npy   undo snapshots, oldest first (read on first use)
+    history/redo/NNNN.npy   redo snapshots
+    index/content_*.npy     ContentIndex boxes / counts
+"""
+from __future__ import annotations
+import dataclasses
+import io
+import json
+import os
+import tempfile
+import zipfile
+from dataclasses import dataclass
+import numpy as np
+from PIL import Image
+from .analysis import ContentIndex
+from .document import Document
+from .grid import GridConfig
+from .history import HistoryManager, is_regions
+from .thumbnails import THUMB_SIZE
+
+PROJECT_EXT = ".gsproj"
+FORMAT_VERSION = 1
+HISTORY_COMPRESS_LEVEL = 1   # snapshots are mostly transparent: fast deflate is plenty
+
+
+def is_project(path: str) -> bool:
+    return path.lower().endswith(PROJECT_EXT)
+
+
+def _config_to_json(config: GridConfig) -> dict:
+    return dataclasses.asdict(config)
+
+
+def _config_from_json(data: dict) -> GridConfig:
+    names = {f.name for f in dataclasses.fields(GridConfig)}
+    values = {k: v for k, v in data.items() if k in names}
+    for k, v in values.items():
+        if k.endswith("_color"):
+            values[k] = tuple(v)
+    return GridConfig(**values)
+
+
+class _Member:
+    """Loader for one .npy member, read from the project file when history needs it."""
+
+    def __init__(self, path: str, name: str):
+        self.path = path
+        self.name = name
+
+    def __call__(self) -> np.ndarray:
+        with zipfile.ZipFile(self.path) as zf, zf.open(self.name) as f:
+            return np.load(io.BytesIO(f.read()))
+
+
+def _history_name(stack: str, i: int) -> str:
+    return f"history/{stack}/{i:04d}.npy"
+
+
+def _box_to_json(box) -> list | None:
+    if box is None:
+        return None
+    return [list(b) for b in box] if is_regions(box) else list(box)
+
+
+def _box_from_json(box) -> tuple | None:
+    """A history box: None, [x0, y0, x1, y1] or a list of those (multi-region entry)."""
+    if box is None:
+        return None
+    if box and isinstance(box[0], list):
+        return tuple(tuple(b) for b in box)
+    return tuple(box)
+
+
+def _lazy_history(path: str, meta: dict) -> tuple[list, list]:
+    stacks = []
+    history = meta.get("history", {})
+    for stack in ("undo", "redo"):
+        boxes = history.get(stack, [])
+        layouts = history.get(f"{stack}_layouts") or [None] * len(boxes)
+        stacks.append([(_box_from_json(box), _Member(path, _history_name(stack, i)),
+                        tuple(layout) if layout is not None else None)
+                       for i, (box, layout) in enumerate(zip(boxes, layouts))])
+    return stacks[0], stacks[1]
+
+
+def _write_array(zf: zipfile.ZipFile, name: str, array: np.ndarray):
+    with zf.open(name, "w", force_zip64=True) as f:
+        np.save(f, array)
+
+
+def _file_mode(path: str) -> int:
+    """Permission bits for path: those of the file it replaces, else the umask default."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except OSError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def save_project(path: str, document: Document, grid_config: GridConfig,
+                 history: HistoryManager | None = None, content: ContentIndex | None = None):
+    """Write the project to path (atomically: temp file, then rename).
+
+    History snapshots still only on disk are streamed across one at a time;
+    afterwards every history entry refers to the new file, so the in-memory
+    copies are released.
+    """
+    undo, redo = history.entries() if history is not None else ([], [])
+    meta = {
+        "version": FORMAT_VERSION,
+        "size": list(document.size),
+        "grid": _config_to_json(grid_config),
+        "history": {"undo": [_box_to_json(b) for b, _, _ in undo],
+                    "redo": [_box_to_json(b) for b, _, _ in redo],
+                    "undo_layouts": [list(g) if g else None for _, _, g in undo],
+                    "redo_layouts": [list(g) if g else None for _, _, g in redo]},
+    }
+    state = content.state() if content is not None else None
+    if state is not None:
+        meta["index"] = {"layout": list(state[0])}
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(suffix=PROJECT_EXT, dir=directory)
+    os.close(fd)
+    try:
+        os.chmod(tmp, _file_mode(path))   # mkstemp makes it 0600, which os.replace would keep
+        with zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED,
+                             compresslevel=HISTORY_COMPRESS_LEVEL) as zf:
+            zf.writestr("project.json", json.dumps(meta, indent=1))
+            buf = io.BytesIO()
+            document.image.save(buf, "PNG")
+            zf.writestr("sheet.png", buf.getvalue(), compress_type=zipfile.ZIP_STORED)
+            thumb = document.image.copy()
+            thumb.thumbnail((THUMB_SIZE, THUMB_SIZE), Image.LANCZOS)
+            buf = io.BytesIO()
+            thumb.save(buf, "PNG")
+            zf.writestr("thumbnail.png", buf.getvalue(), compress_type=zipfile.ZIP_STORED)
+            for stack, entries in (("undo", undo), ("redo", redo)):
+                for i, (_, snapshot, _) in enumerate(entries):
+                    _write_array(zf, _history_name(stack, i),
+                                 snapshot() if callable(snapshot) else snapshot)
+            if state is not None:
+                _write_array(zf, "index/content_boxes.npy", state[1])
+                _write_array(zf, "index/content_counts.npy", state[2])
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if history is not None:
+        history.load(*_lazy_history(os.path.abspath(path), meta))
+
+
+@dataclass
+class Project:
+    """An opened project: the sheet and layout are read up front; history and the
+    cached index are attached on demand (restore_history / restore_index)."""
+    path: str
+    document: Document
+    grid_config: GridConfig
+    meta: dict
+
+    def restore_history(self, history: HistoryManager):
+        """Attach the stored undo/redo stacks; each snapshot is read on first use."""
+        history.load(*_lazy_history(self.path, self.meta))
+
+    def restore_index(self, content: ContentIndex):
+        index = self.meta.get("index")
+        if not index:
+            return
+        layout = tuple(index["layout"])
+        with zipfile.ZipFile(self.path) as zf:
+            boxes = np.load(io.BytesIO(zf.read("index/content_boxes.npy")))
+            counts = np.load(io.BytesIO(zf.read("index/content_counts.npy")))
+        cols, rows = layout[2], layout[3]
+        if boxes.shape == (rows, cols, 4) and counts.shape == (rows, cols):
+            content.restore(layout, boxes, counts)
+
+
+def open_project(path: str) -> Project:
+    """Read the sheet and layout of a project; raises ValueError if it is not one."""
+    path = os.path.abspath(path)
+    try:
+        with zipfile.ZipFile(path) as zf:
+            meta = json.loads(zf.read("project.json"))
+            if meta.get("version", 0) > FORMAT_VERSION:
+                raise ValueError(f"project format {meta['version']} is newer than this editor")
+            with zf.open("sheet.png") as f:
+                document = Document.open(f)
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise ValueError(f"not a project file: {path}") from e
+    return Project(path, document, _config_from_json(meta.get("grid", {})), meta)
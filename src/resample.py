@@ -0,0 +1,278 @@
+"""Tiled, multi-process Lanczos resize, plus a per-cell variant.
+
+The output is split into tiles; each tile is computed from a source crop that
+includes the kernel margin, in a worker process, and stitched back. The
+coefficients and fixed-point arithmetic mirror Pillow's Resample.c, so the
+result is identical to ``image.resize(size, Image.LANCZOS)``.
+"""
+from __future__ import annotations
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+import numpy as np
+from PIL import Image
+from .grid import GridManager
+
+TILE_SIZE = 512
+# below this many output pixels a plain Pillow resize is faster than the pool
+MIN_TILED_PIXELS = 1024 * 1024
+
+_PRECISION_BITS = 32 - 8 - 2
+_LANCZOS_SUPPORT = 3.0
+
+_executor: ProcessPoolExecutor | None = None
+_thread_executor: ThreadPoolExecutor | None = None
+
+
+def get_process_executor() -> ProcessPoolExecutor:
+    """Shared worker-process pool (resize tiles, batch macro runs)."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) - 1))
+    return _executor
+
+
+def get_thread_executor() -> ThreadPoolExecutor:
+    """Shared thread pool for Pillow/NumPy work that releases the GIL."""
+    global _thread_executor
+    if _thread_executor is None:
+        _thread_executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+    return _thread_executor
+
+
+def _sinc(x: float) -> float:
+    if x == 0.0:
+        return 1.0
+    x = x * math.pi
+    return math.sin(x) / x
+
+
+def _lanczos(x: float) -> float:
+    if -3.0 <= x < 3.0:
+        return _sinc(x) * _sinc(x / 3)
+    return 0.0
+
+
+def lanczos_coeffs(in_size: int, out_size: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Pillow-compatible 8bpc Lanczos coefficients for one axis.
+
+    Returns (xmin, xlen, kk): first source index and tap count per output
+    pixel, and the (out_size, ksize) fixed-point weights.
+    """
+    scale = filterscale = in_size / out_size
+    if filterscale < 1.0:
+        filterscale = 1.0
+    support = _LANCZOS_SUPPORT * filterscale
+    ksize = int(math.ceil(support)) * 2 + 1
+    ss = 1.0 / filterscale
+    one = 1 << _PRECISION_BITS
+    xmins = np.zeros(out_size, dtype=np.int64)
+    xlens = np.zeros(out_size, dtype=np.int64)
+    kk = np.zeros((out_size, ksize), dtype=np.int64)
+    for xx in range(out_size):
+        center = (xx + 0.5) * scale
+        xmin = max(int(center - support + 0.5), 0)
+        xmax = min(int(center + support + 0.5), in_size) - xmin
+        ws = [_lanczos((x + xmin - center + 0.5) * ss) for x in range(xmax)]
+        ww = 0.0
+        for w in ws:
+            ww += w
+        row = kk[xx]
+        for x, w in enumerate(ws):
+            if ww != 0.0:
+                w /= ww
+            row[x] = int(-0.5 + w * one) if w < 0 else int(0.5 + w * one)
+        xmins[xx] = xmin
+        xlens[xx] = xmax
+    return xmins, xlens, kk
+
+
+def _resample_axis(src: np.ndarray, axis: int, xmin: np.ndarray, kk: np.ndarray) -> np.ndarray:
+    """Apply fixed-point coefficients along axis (0 = rows, 1 = columns).
+    xmin is relative to src; taps past the valid range carry zero weight."""
+    n = src.shape[axis]
+    out_shape = list(src.shape)
+    out_shape[axis] = len(xmin)
+    # int32 like Pillow: Lanczos weights keep the sums well inside its range
+    acc = np.full(out_shape, 1 << (_PRECISION_BITS - 1), dtype=np.int32)
+    for j in range(kk.shape[1]):
+        weights = kk[:, j].astype(np.int32)
+        if not weights.any():
+            continue
+        idx = np.minimum(xmin + j, n - 1)
+        taps = np.take(src, idx, axis=axis).astype(np.int32)
+        if axis == 0:
+            acc += taps * weights[:, None, None]
+        else:
+            acc += taps * weights[None, :, None]
+    return np.clip(acc >> _PRECISION_BITS, 0, 255).astype(np.uint8)
+
+
+def _resample_tile(crop: np.ndarray,
+                   h_coeffs: tuple[np.ndarray, np.ndarray] | None,
+                   v_coeffs: tuple[np.ndarray, np.ndarray] | None) -> np.ndarray:
+    """Worker: resample one premultiplied RGBA crop. Coefficient xmin are crop-relative."""
+    premul = np.asarray(Image.fromarray(crop, "RGBA").convert("RGBa"))
+    data = premul
+    if h_coeffs is not None:
+        data = _resample_axis(data, 1, *h_coeffs)
+    if v_coeffs is not None:
+        data = _resample_axis(data, 0, *v_coeffs)
+    out = Image.frombuffer("RGBa", (data.shape[1], data.shape[0]), data.tobytes(), "raw", "RGBa", 0, 1)
+    return np.asarray(out.convert("RGBA"))
+
+
+def _span(xmin: np.ndarray, xlen: np.ndarray, lo: int, hi: int) -> tuple[int, int]:
+    return int(xmin[lo:hi].min()), int((xmin[lo:hi] + xlen[lo:hi]).max())
+
+
+class TiledResizeJob:
+    """A Lanczos resize split into tiles computed in a process pool.
+
+    Call start(), then poll() until done == total (or use run() to block). A tile
+    that fails (e.g. out of memory, a broken pool) cancels the job and is kept in
+    error.
+    """
+
+    def __init__(self, image: Image.Image, width: int, height: int, tile: int = TILE_SIZE):
+        self.image = image.convert("RGBA") if image.mode != "RGBA" else image
+        self.width = width
+        self.height = height
+        self.tile = tile
+        self._tiles: list[tuple[int, int, int, int]] = [
+            (x0, y0, min(width, x0 + tile), min(height, y0 + tile))
+            for y0 in range(0, height, tile) for x0 in range(0, width, tile)
+        ]
+        self._futures: dict[Future, tuple[int, int, int, int]] = {}
+        self._out: np.ndarray | None = None
+        self._result: Image.Image | None = None
+        self.done = 0
+        self.cancelled = False
+        self.error: Exception | None = None
+
+    @property
+    def total(self) -> int:
+        return len(self._tiles)
+
+    def _fail(self, error: Exception):
+        self.error = error
+        self.cancel()
+
+    def _finished(self):
+        """(box, result) of the tiles finished since the last call; stops at a failed one."""
+        for fut in [f for f in self._futures if f.done()]:
+            box = self._futures.pop(fut, None)
+            if box is None or fut.cancelled():
+                continue
+            try:
+                result = fut.result()
+            except Exception as e:   # reported through error, not out of a timer slot
+                self._fail(e)
+                return
+            yield box, result
+
+    def start(self):
+        iw, ih = self.image.size
+        if (self.width, self.height) == (iw, ih):
+            self._result = self.image.copy()
+            self.done = self.total
+            return
+        if self.width * self.height < MIN_TILED_PIXELS:
+            self._result = self.image.resize((self.width, self.height), Image.LANCZOS)
+            self.done = self.total
+            return
+        src = np.asarray(self.image)
+        need_h = self.width != iw
+        need_v = self.height != ih
+        hx = lanczos_coeffs(iw, self.width) if need_h else None
+        vy = lanczos_coeffs(ih, self.height) if need_v else None
+        self._out = np.empty((self.height, self.width, 4), dtype=np.uint8)
+        try:
+            executor = get_process_executor()
+            for box in self._tiles:
+                x0, y0, x1, y1 = box
+                sx0, sx1 = _span(hx[0], hx[1], x0, x1) if hx else (x0, x1)
+                sy0, sy1 = _span(vy[0], vy[1], y0, y1) if vy else (y0, y1)
+                h_c = (hx[0][x0:x1] - sx0, hx[2][x0:x1]) if hx else None
+                v_c = (vy[0][y0:y1] - sy0, vy[2][y0:y1]) if vy else None
+                crop = np.ascontiguousarray(src[sy0:sy1, sx0:sx1])
+                self._futures[executor.submit(_resample_tile, crop, h_c, v_c)] = box
+        except Exception as e:   # e.g. the pool broke before all tiles were queued
+            self._fail(e)
+
+    def poll(self) -> int:
+        """Stitch finished tiles into the output. Returns the number of tiles done."""
+        for (x0, y0, x1, y1), tile in self._finished():
+            self._out[y0:y1, x0:x1] = tile
+            self.done += 1
+        return self.done
+
+    def cancel(self):
+        self.cancelled = True
+        for fut in self._futures:
+            fut.cancel()
+        self._futures.clear()
+
+    def result(self) -> Image.Image | None:
+        if self.cancelled or self.done < self.total:
+            return None
+        if self._result is None:
+            self._result = Image.fromarray(self._out, "RGBA")
+            self._out = None
+        return self._result
+
+    def run(self, progress=None, cancelled=None) -> Image.Image | None:
+        """Blocking helper. progress(done, total) is called as tiles finish;
+        cancelled() returning True aborts and makes the result None."""
+        self.start()
+        while self._futures:
+            wait(list(self._futures), timeout=0.1, return_when=FIRST_COMPLETED)
+            self.poll()
+            if self.error is not None:
+                raise self.error
+            if progress:
+                progress(self.done, self.total)
+            if cancelled and cancelled():
+                self.cancel()
+                return None
+        return self.result()
+
+
+class CellResizeJob(TiledResizeJob):
+    """Resize each grid cell independently into its target cell, in a thread pool.
+
+    Pixels never blend across cell borders, so frame edges stay clean.
+    Same start()/poll()/result() interface as TiledResizeJob.
+    """
+
+    def __init__(self, image: Image.Image, grid: GridManager, width: int, height: int):
+        super().__init__(image, width, height)
+        self.grid = grid
+        cfg = grid.config
+        self._tiles = [(c, r) for r in range(cfg.rows) for c in range(cfg.cols)]
+        self._canvas: Image.Image | None = None
+
+    def start(self):
+        iw, ih = self.image.size
+        self._canvas = Image.new("RGBA", (self.width, self.height), (0, 0, 0, 0))
+        executor = get_thread_executor()
+        try:
+            for col, row in self._tiles:
+                x, y, w, h = self.grid.cell_rect(iw, ih, col, row)
+                tx, ty, tw, th = self.grid.cell_rect(self.width, self.height, col, row)
+                cell = self.image.crop((x, y, x + w, y + h))
+                fut = executor.submit(cell.resize, (tw, th), Image.LANCZOS)
+                self._futures[fut] = (tx, ty, tx + tw, ty + th)
+        except Exception as e:
+            self._fail(e)
+
+    def poll(self) -> int:
+        for (x0, y0, _, _), cell in self._finished():
+            self._canvas.paste(cell, (x0, y0))
+            self.done += 1
+        return self.done
+
+    def result(self) -> Image.Image | None:
+        if self.cancelled or self.done < self.total:
+            return None
+        return self._canvas
@@ -0,0 +1,143 @@
+from __future__ import annotations
+from dataclasses import dataclass
+import numpy as np
+from PIL import Image, ImageDraw
+
+
+@dataclass
+class FloatingSelection:
+    """Pixels lifted from the sheet that follow the selection rect until committed.
+
+    Successive drags, resizes and nudges only move the target rect; the sheet is
+    written once on commit, as one history entry.
+    """
+    image: Image.Image                   # lifted pixels at their original size
+    source: tuple[int, int, int, int]    # (x0, y0, x1, y1) they were lifted from
+    cut: bool                            # True: source is erased on commit (move), False: copy
+
+    def render(self, size: tuple[int, int]) -> Image.Image:
+        """Lifted pixels at the target size (LANCZOS only when the size changed)."""
+        if size == self.image.size:
+            return self.image
+        return self.image.resize(size, Image.LANCZOS)
+
+
+def polygon_box(pts: list[tuple[int, int]]) -> tuple[int, int, int, int]:
+    """Bounding box (x0, y0, x1, y1) of the pixels a filled integer polygon covers."""
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+    return min(xs), min(ys), max(xs) + 1, max(ys) + 1
+
+
+def polygon_mask(pts: list[tuple[int, int]], box: tuple[int, int, int, int]) -> Image.Image:
+    """'L' mask of the polygon rasterized only over box (polygon in image coordinates)."""
+    mask = Image.new("L", (box[2] - box[0], box[3] - box[1]), 0)
+    ImageDraw.Draw(mask).polygon([(x - box[0], y - box[1]) for x, y in pts], fill=255)
+    return mask
+
+
+COMBINE_MODES = ("replace", "add", "subtract", "intersect")
+
+
+@dataclass(frozen=True)
+class SelectionMask:
+    """Bitmap selection trimmed to its bounding box (x0, y0, x1, y1) in image
+    coordinates, stored bit-packed (8 pixels per byte, rows padded to a byte)."""
+    box: tuple[int, int, int, int]
+    bits: np.ndarray                     # uint8, shape (y1 - y0, ceil((x1 - x0) / 8))
+
+    # -- construction ---------------------------------------------------
+    @classmethod
+    def from_array(cls, mask: np.ndarray, origin: tuple[int, int] = (0, 0)) -> SelectionMask | None:
+        """Trim a bool array placed at origin to its bounding box (None if empty)."""
+        rows = np.flatnonzero(mask.any(axis=1))
+        if not len(rows):
+            return None
+        cols = np.flatnonzero(mask.any(axis=0))
+        y0, y1 = int(rows[0]), int(rows[-1]) + 1
+        x0, x1 = int(cols[0]), int(cols[-1]) + 1
+        ox, oy = origin
+        return cls((ox + x0, oy + y0, ox + x1, oy + y1), np.packbits(mask[y0:y1, x0:x1], axis=1))
+
+    @classmethod
+    def from_rect(cls, box: tuple[int, int, int, int]) -> SelectionMask | None:
+        x0, y0, x1, y1 = box
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return cls(box, np.packbits(np.ones((y1 - y0, x1 - x0), dtype=bool), axis=1))
+
+    @classmethod
+    def from_polygon(cls, pts: list[tuple[int, int]]) -> SelectionMask | None:
+        if len(pts) < 3:
+            return None
+        box = polygon_box(pts)
+        return cls.from_array(np.asarray(polygon_mask(pts, box)) > 0, box[:2])
+
+    # -- access ---------------------------------------------------------
+    @property
+    def width(self) -> int:
+        return self.box[2] - self.box[0]
+
+    @property
+    def height(self) -> int:
+        return self.box[3] - self.box[1]
+
+    @property
+    def mask(self) -> np.ndarray:
+        """Unpacked bool array over box."""
+        return np.unpackbits(self.bits, axis=1, count=self.width).view(bool)
+
+    def count(self) -> int:
+        return int(np.unpackbits(self.bits, axis=1, count=self.width).sum())
+
+    def contains(self, x: int, y: int) -> bool:
+        x0, y0, x1, y1 = self.box
+        if not (x0 <= x < x1 and y0 <= y < y1):
+            return False
+        lx = x - x0
+        return bool(self.bits[y - y0, lx >> 3] & (0x80 >> (lx & 7)))
+
+    def crop(self, box: tuple[int, int, int, int]) -> np.ndarray:
+        """The mask placed onto box: a bool array of box's shape, False outside the mask."""
+        bx0, by0, bx1, by1 = box
+        out = np.zeros((by1 - by0, bx1 - bx0), dtype=bool)
+        x0, y0, x1, y1 = self.box
+        ix0, iy0, ix1, iy1 = max(x0, bx0), max(y0, by0), min(x1, bx1), min(y1, by1)
+        if ix0 < ix1 and iy0 < iy1:
+            # unpack only the rows that overlap
+            rows = np.unpackbits(self.bits[iy0 - y0:iy1 - y0], axis=1, count=self.width).view(bool)
+            out[iy0 - by0:iy1 - by0, ix0 - bx0:ix1 - bx0] = rows[:, ix0 - x0:ix1 - x0]
+        return out
+
+    # -- transforms -----------------------------------------------------
+    def translated(self, dx: int, dy: int) -> SelectionMask:
+        x0, y0, x1, y1 = self.box
+        return SelectionMask((x0 + dx, y0 + dy, x1 + dx, y1 + dy), self.bits)
+
+    def flipped_horizontal(self) -> SelectionMask:
+        """Mirrored inside its own box."""
+        return SelectionMask(self.box, np.packbits(self.mask[:, ::-1], axis=1))
+
+
+def combine(current: SelectionMask | None, shape: SelectionMask | None,
+            mode: str) -> SelectionMask | None:
+    """Boolean combine of the current selection with a new shape.
+
+    mode is one of COMBINE_MODES; only the boxes involved are touched.
+    """
+    if mode == "replace" or (mode == "add" and current is None):
+        return shape
+    if current is None:
+        return None
+    if shape is None:
+        return None if mode == "intersect" else current
+    a, b = current.box, shape.box
+    if mode == "add":
+        box = (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+        return SelectionMask.from_array(current.crop(box) | shape.crop(box), box[:2])
+    if mode == "subtract":
+        return SelectionMask.from_array(current.mask & ~shape.crop(a), a[:2])
+    box = (max(a[0], b[0]), max(a[1], b[1]), min(a[2], b[2]), min(a[3], b[3]))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    return SelectionMask.from_array(current.crop(box) & shape.crop(box), box[:2])
@@ -0,0 +1,209 @@
+"""Sheet thumbnails and per-cell strips with a persistent on-disk cache (no Qt required)."""
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from PIL import Image
+from .grid import GridManager, GridConfig
+
+THUMB_SIZE = 128        # longest side of a sheet thumbnail
+STRIP_CELL = 48         # longest side of one cell in a strip preview
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "grid-sprite-editor", "thumbnails")
+CACHE_MAX_BYTES = 64 << 20     # disk cache cap; least recently used entries go first
+
+_executor: ThreadPoolExecutor | None = None
+
+
+def get_thumbnail_executor() -> ThreadPoolExecutor:
+    """Thread pool for preview decoding, separate from the editing pool so a folder
+    of hundreds of sheets never queues ahead of edits."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+    return _executor
+
+
+def load_reduced(path: str, max_side: int) -> Image.Image:
+    """Decode path as RGBA at roughly max_side or more on its longest side.
+
+    draft() lets JPEG decode at a DCT-scaled size; other formats decode fully and
+    reduce() box-averages by an integer factor, much cheaper than a full resample.
+    """
+    with Image.open(path) as im:
+        im.draft("RGBA", (max_side, max_side))
+        im = im.convert("RGBA")
+    factor = max(1, max(im.size) // max_side)
+    return im.reduce(factor) if factor > 1 else im
+
+
+def make_thumbnail(path: str, size: int = THUMB_SIZE) -> Image.Image:
+    im = load_reduced(path, size)
+    im.thumbnail((size, size), Image.LANCZOS)
+    return im
+
+
+def make_strip(path: str, cols: int, rows: int, cell_size: int = STRIP_CELL) -> Image.Image:
+    """All cells of the sheet side by side (row-major), each fitted into cell_size."""
+    with Image.open(path) as im:
+        iw, ih = im.size
+    # decode just large enough that one cell still covers cell_size
+    im = load_reduced(path, max(iw, ih) * cell_size // max(1, iw // cols, ih // rows))
+    grid = GridManager(GridConfig(cols=cols, rows=rows))
+    sx, sy = im.width / iw, im.height / ih
+    strip = Image.new("RGBA", (cell_size * cols * rows, cell_size), (0, 0, 0, 0))
+    for i in range(cols * rows):
+        x, y, w, h = grid.cell_rect(iw, ih, i % cols, i // cols)
+        cell = im.crop((int(x * sx), int(y * sy), int((x + w) * sx), int((y + h) * sy)))
+        cell.thumbnail((cell_size, cell_size), Image.LANCZOS)
+        strip.paste(cell, (i * cell_size + (cell_size - cell.width) // 2,
+                           (cell_size - cell.height) // 2))
+    return strip
+
+
+class ThumbnailCache:
+    """PNG previews stored under directory, keyed by path, mtime and file size
+    (plus the variant, e.g. thumbnail size or strip grid). Editing a sheet on
+    disk changes its key, so stale entries are never hit again; they age out
+    once the directory exceeds max_bytes, oldest access time first."""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total = 0
+        self.prune()
+
+    def _entry(self, path: str, variant: str) -> str | None:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        key = f"{os.path.abspath(path)}\0{st.st_mtime_ns}\0{st.st_size}\0{variant}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".png")
+
+    def prune(self):
+        """Delete least recently used entries until the cache is within max_bytes
+        (down to 3/4 of it, so a run of writes does not rescan on every put)."""
+        with self._lock:
+            entries = []
+            try:
+                with os.scandir(self.directory) as it:
+                    for e in it:
+                        if e.name.endswith(".png") and e.is_file():
+                            st = e.stat()
+                            entries.append((st.st_atime, st.st_size, e.path))
+            except OSError:
+                self._total = 0
+                return
+            total = sum(size for _, size, _ in entries)
+            if total > self.max_bytes:
+                entries.sort()
+                for _, size, entry in entries:
+                    if total <= self.max_bytes * 3 // 4:
+                        break
+                    try:
+                        os.remove(entry)
+                    except OSError:
+                        continue
+                    total -= size
+            self._total = total
+
+    def get(self, path: str, variant: str) -> Image.Image | None:
+        entry = self._entry(path, variant)
+        if entry is None or not os.path.exists(entry):
+            return None
+        try:
+            with Image.open(entry) as im:
+                im = im.convert("RGBA")
+        except OSError:
+            return None   # truncated / corrupt entry: regenerate
+        try:
+            os.utime(entry)   # record the access even on noatime / relatime mounts
+        except OSError:
+            pass
+        return im
+
+    def put(self, path: str, variant: str, image: Image.Image):
+        entry = self._entry(path, variant)
+        if entry is None:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # write then rename, so a concurrent reader never sees half a file
+        fd, tmp = tempfile.mkstemp(suffix=".png", dir=self.directory)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                image.save(f, "PNG")
+            size = os.path.getsize(tmp)
+            os.replace(tmp, entry)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        with self._lock:
+            self._total += size
+            full = self._total > self.max_bytes
+        if full:
+            self.prune()
+
+    def thumbnail(self, path: str, size: int = THUMB_SIZE) -> Image.Image:
+        variant = f"thumb{size}"
+        im = self.get(path, variant)
+        if im is None:
+            im = make_thumbnail(path, size)
+            self.put(path, variant, im)
+        return im
+
+    def strip(self, path: str, cols: int, rows: int, cell_size: int = STRIP_CELL) -> Image.Image:
+        variant = f"strip{cols}x{rows}@{cell_size}"
+        im = self.get(path, variant)
+        if im is None:
+            im = make_strip(path, cols, rows, cell_size)
+            self.put(path, variant, im)
+        return im
+
+
+class ThumbnailJob:
+    """Thumbnails of many sheets produced in a background thread pool.
+
+    Call start(), then poll() for the (path, image or None) pairs finished since
+    the last poll until done == total. Unreadable files yield None.
+    """
+
+    def __init__(self, cache: ThumbnailCache, paths: list[str], size: int = THUMB_SIZE):
+        self.cache = cache
+        self.paths = list(paths)
+        self.size = size
+        self._futures: dict[Future, str] = {}
+        self.done = 0
+
+    @property
+    def total(self) -> int:
+        return len(self.paths)
+
+    def _run(self, path: str) -> Image.Image | None:
+        try:
+            return self.cache.thumbnail(path, self.size)
+        except (OSError, ValueError):
+            return None
+
+    def start(self):
+        executor = get_thumbnail_executor()
+        for path in self.paths:
+            self._futures[executor.submit(self._run, path)] = path
+
+    def poll(self) -> list[tuple[str, Image.Image | None]]:
+        finished = [f for f in self._futures if f.done()]
+        results = []
+        for fut in finished:
+            path = self._futures.pop(fut)
+            if not fut.cancelled():
+                results.append((path, fut.result()))
+            self.done += 1
+        return results
+
+    def cancel(self):
+        for fut in self._futures:
+            fut.cancel()
+        self._futures.clear()
@@ -21,3 +21,16 @@ class BaseTool(ABC):
     def cursor(self):
         from PyQt6.QtCore import Qt
         return Qt.CursorShape.ArrowCursor
+
+
+def combine_mode(modifiers) -> str:
+    """Selection combine mode for a new shape: Shift adds, Ctrl+Shift subtracts,
+    Alt+Shift intersects (plain Alt stays the cell-move shortcut)."""
+    from PyQt6.QtCore import Qt
+    if not modifiers & Qt.KeyboardModifier.ShiftModifier:
+        return "replace"
+    if modifiers & Qt.KeyboardModifier.ControlModifier:
+        return "subtract"
+    if modifiers & Qt.KeyboardModifier.AltModifier:
+        return "intersect"
+    return "add"
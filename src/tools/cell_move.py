@@ -19,7 +19,6 @@ class CellMoveTool(BaseTool):
         cell = self.canvas.grid.cell_at(w, h, int(image_pos.x()), int(image_pos.y()))
         if cell is None:
             return
-        self.canvas.history.push(self.canvas.image)
         self._active = True
         self._cell = cell
         self._start = image_pos
@@ -23,7 +23,6 @@ class CellSwapTool(BaseTool):
             self.canvas.update()
         else:
             if cell != self._first_cell:
-                self.canvas.history.push(self.canvas.image)
                 self.canvas.swap_cells(self._first_cell, cell)
             self._first_cell = None
             self.canvas.swap_highlight = None
@@ -1,3 +1,4 @@
+import numpy as np
 from PyQt6.QtCore import QPointF, Qt
 from PyQt6.QtGui import QMouseEvent
 from .base import BaseTool
@@ -11,7 +12,7 @@ class EraserTool(BaseTool):
         self._last_pos: QPointF | None = None
 
     def mouse_press(self, event: QMouseEvent, image_pos: QPointF):
-        self.canvas.history.push(self.canvas.image)
+        self.canvas.history.push(self.canvas.document.pixels)
         self._drawing = True
         self._last_pos = image_pos
         self._erase(image_pos)
@@ -22,18 +23,23 @@ class EraserTool(BaseTool):
             self._last_pos = image_pos
 
     def mouse_release(self, event: QMouseEvent, image_pos: QPointF):
+        if self._drawing:
+            self.canvas.image_changed.emit()
         self._drawing = False
         self._last_pos = None
 
     def _erase(self, pos: QPointF):
-        from PIL import ImageDraw
-        img = self.canvas.image
-        draw = ImageDraw.Draw(img)
+        doc = self.canvas.document
         r = self.brush_size // 2
         x, y = int(pos.x()), int(pos.y())
-        draw.ellipse([x - r, y - r, x + r, y + r], fill=(0, 0, 0, 0))
-        self.canvas.refresh_pixmap()
-        self.canvas.update()
+        iw, ih = doc.size
+        x0, y0, x1, y1 = max(0, x - r), max(0, y - r), min(iw, x + r + 1), min(ih, y + r + 1)
+        if x0 >= x1 or y0 >= y1:
+            return
+        # disc of radius r, written straight into the document
+        yy, xx = np.ogrid[y0 - y:y1 - y, x0 - x:x1 - x]
+        doc.view((x0, y0, x1, y1))[xx * xx + yy * yy <= r * r] = 0
+        self.canvas.mark_dirty((x0, y0, x1, y1))
 
     def cursor(self):
         return Qt.CursorShape.CrossCursor
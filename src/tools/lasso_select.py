@@ -1,55 +1,107 @@
+import numpy as np
 from PyQt6.QtCore import QPointF, Qt
 from PyQt6.QtGui import QMouseEvent, QPolygonF
-from .base import BaseTool
+from .base import BaseTool, combine_mode
+from ..selection import SelectionMask
+
+MIN_STEP = 2.0         # widget px between recorded samples while drawing
+SIMPLIFY_TOLERANCE = 0.5  # image px; below the rasterization grid
+
+
+def _simplify(points: np.ndarray, tolerance: float) -> np.ndarray:
+    """Douglas–Peucker simplification of an (n, 2) point array (endpoints kept)."""
+    n = len(points)
+    if n < 3:
+        return points
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        lo, hi = stack.pop()
+        if hi - lo < 2:
+            continue
+        a, b = points[lo], points[hi]
+        seg = b - a
+        rel = points[lo + 1:hi] - a
+        length = np.hypot(*seg)
+        if length == 0:
+            dist = np.hypot(rel[:, 0], rel[:, 1])
+        else:
+            dist = np.abs(seg[0] * rel[:, 1] - seg[1] * rel[:, 0]) / length
+        i = int(np.argmax(dist))
+        if dist[i] > tolerance:
+            mid = lo + 1 + i
+            keep[mid] = True
+            stack.append((lo, mid))
+            stack.append((mid, hi))
+    return points[keep]
 
 
 class LassoSelectTool(BaseTool):
     def __init__(self, canvas):
         super().__init__(canvas)
-        self._points: list[QPointF] = []
+        self._drawing = False
+        self._last: QPointF | None = None
         self._dragging_selection = False
         self._drag_start: QPointF | None = None
+        self._combine = "replace"   # mode for the polygon being drawn
 
     def mouse_press(self, event: QMouseEvent, image_pos: QPointF):
-        if self.canvas.lasso_polygon and self._polygon_contains(self.canvas.lasso_polygon, image_pos):
-            # start drag: snapshot is kept up-to-date by commit, only push history here
-            self.canvas.history.push(self.canvas.image)
-            # If no snapshot yet (first drag after drawing), take one now
-            if self.canvas._lasso_snapshot is None:
-                self.canvas._lasso_snapshot = self.canvas.image.copy()
-            if self.canvas._lasso_original_polygon is None:
-                self.canvas._lasso_original_polygon = QPolygonF(self.canvas.lasso_polygon)
+        self._combine = combine_mode(event.modifiers())
+        if self._combine != "replace":
+            # Shift/Ctrl/Alt: draw a polygon that is combined into the selection mask
+            self.canvas.begin_combine()
+            self.canvas.lasso_polygon = QPolygonF([image_pos])
+            self._drawing = True
+            self._last = image_pos
+            self._dragging_selection = False
+        elif self.canvas.lasso_polygon and self._polygon_contains(self.canvas.lasso_polygon, image_pos):
+            # start drag: the polygon stays put, only canvas.lasso_offset changes until commit
             self._dragging_selection = True
             self._drag_start = image_pos
         else:
             self.canvas.clear_selection()
-            self._points = [image_pos]
+            self.canvas.lasso_polygon = QPolygonF([image_pos])
+            self._drawing = True
+            self._last = image_pos
             self._dragging_selection = False
 
     def mouse_move(self, event: QMouseEvent, image_pos: QPointF):
         if self._dragging_selection and self._drag_start:
-            dx = image_pos.x() - self._drag_start.x()
-            dy = image_pos.y() - self._drag_start.y()
-            self.canvas.lasso_polygon = QPolygonF(
-                [QPointF(p.x() + dx, p.y() + dy) for p in self.canvas.lasso_polygon]
-            )
-            self._drag_start = image_pos
+            self.canvas.lasso_offset = image_pos - self._drag_start
             self.canvas.update()
-        elif self._points:
-            self._points.append(image_pos)
-            self.canvas.lasso_polygon = QPolygonF(self._points)
+        elif self._drawing and self._last is not None:
+            # online distance thresholding: drop samples closer than MIN_STEP on screen
+            d = image_pos - self._last
+            if (d.x() * d.x() + d.y() * d.y()) * self.canvas._zoom ** 2 < MIN_STEP ** 2:
+                return
+            self._last = image_pos
+            self.canvas.append_lasso_point(image_pos)
             self.canvas.update()
 
     def mouse_release(self, event: QMouseEvent, image_pos: QPointF):
         if self._dragging_selection:
             self.canvas.commit_lasso_move()
-        elif len(self._points) > 2:
-            self._points.append(self._points[0])  # close polygon
-            self.canvas.lasso_polygon = QPolygonF(self._points)
+        elif self._drawing:
+            poly = self.canvas.lasso_polygon
+            if poly is not None and poly.count() > 2:
+                pts = np.array([(p.x(), p.y()) for p in poly], dtype=float)
+                pts = _simplify(pts, SIMPLIFY_TOLERANCE)
+                pts = np.vstack([pts, pts[:1]])  # close polygon
+                self.canvas.lasso_polygon = QPolygonF([QPointF(x, y) for x, y in pts])
+            else:
+                self.canvas.lasso_polygon = None
+            if self._combine != "replace":
+                poly = self.canvas.lasso_polygon
+                shape = SelectionMask.from_polygon(
+                    [(int(p.x()), int(p.y())) for p in poly]) if poly is not None else None
+                self.canvas.combine_selection(shape, self._combine)
             self.canvas.update()
-        self._points = []
+        self._drawing = False
+        self._last = None
         self._dragging_selection = False
         self._drag_start = None
+        self._combine = "replace"
 
     def _polygon_contains(self, poly: QPolygonF, pt: QPointF) -> bool:
         return poly.containsPoint(pt, Qt.FillRule.OddEvenFill)
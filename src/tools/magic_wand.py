@@ -0,0 +1,21 @@
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QMouseEvent
+from .base import BaseTool, combine_mode
+
+
+class MagicWandTool(BaseTool):
+    """Click selects by color within the clicked cell (or the whole sheet).
+    Dragging inside the selection (handled by the canvas) moves its pixels."""
+
+    def __init__(self, canvas):
+        super().__init__(canvas)
+        self.tolerance = 32
+        self.contiguous = True      # False = colour range (every matching pixel)
+        self.whole_sheet = False
+
+    def mouse_press(self, event: QMouseEvent, image_pos: QPointF):
+        self.canvas.select_color(image_pos, self.tolerance, self.contiguous, self.whole_sheet,
+                                 combine_mode(event.modifiers()))
+
+    def cursor(self):
+        return Qt.CursorShape.PointingHandCursor
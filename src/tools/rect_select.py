@@ -1,6 +1,7 @@
 from PyQt6.QtCore import QPointF, QRectF, Qt
 from PyQt6.QtGui import QMouseEvent
-from .base import BaseTool
+from .base import BaseTool, combine_mode
+from ..selection import SelectionMask
 
 # Handle indices: 0=TL 1=T 2=TR 3=R 4=BR 5=B 6=BL 7=L
 HANDLE_SIZE = 8  # pixels in widget space
@@ -43,6 +44,7 @@ class RectSelectTool(BaseTool):
         self._resize_handle: int | None = None   # 0-7
         self._resize_origin_rect: QRectF | None = None
         self._copy_mode: bool = False
+        self._combine: str = "replace"   # mode for the rect being drawn
 
     def _get_handle_at(self, image_pos: QPointF) -> int | None:
         sel = self.canvas.selection_rect
@@ -54,6 +56,15 @@ class RectSelectTool(BaseTool):
         return None
 
     def mouse_press(self, event: QMouseEvent, image_pos: QPointF):
+        mode = combine_mode(event.modifiers())
+        if mode != "replace":
+            # Shift/Ctrl/Alt: draw a rect that is combined into the selection mask
+            self.canvas.begin_combine()
+            self._combine = mode
+            self._start = image_pos
+            self._dragging_selection = False
+            return
+
         sel = self.canvas.selection_rect
 
         # Check resize handle first
@@ -62,13 +73,19 @@ class RectSelectTool(BaseTool):
             self._resize_handle = handle
             self._resize_origin_rect = QRectF(sel)
             self._drag_start = image_pos
+            self.canvas.float_selection(cut=True)
+            self._resize_origin_rect = QRectF(self.canvas.selection_rect)
             return
 
         if sel and sel.contains(image_pos):
             self._dragging_selection = True
             self._copy_mode = bool(event.modifiers() & Qt.KeyboardModifier.ControlModifier)
+            if self._copy_mode:
+                # Ctrl-drag stamps the current float down and lifts a copy of it
+                self.canvas.commit_floating()
+            self.canvas.float_selection(cut=not self._copy_mode)
             self._drag_start = image_pos
-            self._drag_origin_rect = QRectF(sel)
+            self._drag_origin_rect = QRectF(self.canvas.selection_rect)
         else:
             self.canvas.clear_selection()
             self._start = image_pos
@@ -108,23 +125,39 @@ class RectSelectTool(BaseTool):
             self.canvas.setCursor(Qt.CursorShape.CrossCursor)
 
     def mouse_release(self, event: QMouseEvent, image_pos: QPointF):
+        # pixels stay floating; the canvas composites them on deselect / commit
         if self._resize_handle is not None and self._resize_origin_rect:
             new_rect = self._calc_resize(image_pos)
             if new_rect.width() > 1 and new_rect.height() > 1:
-                self._commit_resize(self._resize_origin_rect, new_rect)
+                self.canvas.selection_rect = QRectF(
+                    int(new_rect.x()), int(new_rect.y()),
+                    int(new_rect.width()), int(new_rect.height()))
+            else:
+                self.canvas.selection_rect = self._resize_origin_rect
+            self.canvas.update()
             self._resize_handle = None
             self._resize_origin_rect = None
             self._drag_start = None
             return
 
-        if self._dragging_selection:
-            self._commit_move(image_pos)
+        if self._dragging_selection and self._drag_origin_rect and self._drag_start:
+            # snap to whole pixels
+            dx = int(image_pos.x() - self._drag_start.x())
+            dy = int(image_pos.y() - self._drag_start.y())
+            self.canvas.selection_rect = self._drag_origin_rect.translated(dx, dy)
+            self.canvas.update()
+
+        if self._combine != "replace":
+            shape = SelectionMask.from_rect(self.canvas._rect_box()) \
+                if self.canvas.selection_rect else None
+            self.canvas.combine_selection(shape, self._combine)
 
         self._start = None
         self._dragging_selection = False
         self._drag_start = None
         self._drag_origin_rect = None
         self._copy_mode = False
+        self._combine = "replace"
 
     def _calc_resize(self, image_pos: QPointF) -> QRectF:
         r = QRectF(self._resize_origin_rect)
@@ -137,31 +170,5 @@ class RectSelectTool(BaseTool):
         if h in (4, 5, 6):   r.setBottom(max(y, r.top() + 1))
         return r
 
-    def _commit_move(self, image_pos: QPointF):
-        if not self._drag_origin_rect or not self._drag_start:
-            return
-        dx = int(image_pos.x() - self._drag_start.x())
-        dy = int(image_pos.y() - self._drag_start.y())
-        if dx == 0 and dy == 0:
-            return
-        if self._copy_mode:
-            self.canvas.copy_selection_pixels(
-                int(self._drag_origin_rect.x()), int(self._drag_origin_rect.y()),
-                int(self._drag_origin_rect.width()), int(self._drag_origin_rect.height()),
-                dx, dy
-            )
-        else:
-            self.canvas.move_selection_pixels(
-                int(self._drag_origin_rect.x()), int(self._drag_origin_rect.y()),
-                int(self._drag_origin_rect.width()), int(self._drag_origin_rect.height()),
-                dx, dy
-            )
-
-    def _commit_resize(self, orig: QRectF, new: QRectF):
-        self.canvas.resize_selection_pixels(
-            int(orig.x()), int(orig.y()), int(orig.width()), int(orig.height()),
-            int(new.x()),  int(new.y()),  int(new.width()),  int(new.height()),
-        )
-
     def cursor(self):
         return Qt.CursorShape.CrossCursor
@@ -0,0 +1,162 @@
+"""Watch a folder for newly generated sheets and prepare them before they are
+opened: decode, overflow / duplicate / content analysis, thumbnail (no Qt required)."""
+from __future__ import annotations
+import copy
+import os
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from PIL import Image
+from .analysis import OverflowDetector, DuplicateDetector, ContentIndex
+from .document import Document
+from .grid import GridManager, GridConfig
+from .thumbnails import ThumbnailCache, get_thumbnail_executor
+
+POLL_INTERVAL = 1.0     # seconds between folder scans
+MAX_PREPARED = 8        # decoded sheets kept ready to open (each holds full pixels)
+IMAGE_EXTENSIONS = (".png",)
+
+
+def file_key(path: str) -> tuple[int, int] | None:
+    """(mtime_ns, size) identifying one version of a file; None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def scan_folder(folder: str) -> dict[str, tuple[int, int]]:
+    """{path: file_key} of the sheets directly inside folder."""
+    found = {}
+    try:
+        with os.scandir(folder) as it:
+            for e in it:
+                if not e.name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                try:
+                    if e.is_file():
+                        st = e.stat()
+                        found[e.path] = (st.st_mtime_ns, st.st_size)
+                except OSError:
+                    pass   # removed between listing and stat
+    except OSError:
+        pass
+    return found
+
+
+class FolderWatcher:
+    """Polling folder watcher (portable, no inotify dependency).
+
+    poll() returns sheets that appeared or changed since they were last reported,
+    once their size and mtime held still across two polls, so a sheet the
+    generator is still writing is not picked up half-written.
+    """
+
+    def __init__(self, folder: str, include_existing: bool = False):
+        self.folder = folder
+        self._seen: dict[str, tuple[int, int]] = {} if include_existing else scan_folder(folder)
+        self._pending: dict[str, tuple[int, int]] = {}
+
+    @property
+    def pending(self) -> int:
+        """Sheets seen changing that are not reported yet (still being written)."""
+        return len(self._pending)
+
+    def poll(self) -> list[str]:
+        current = scan_folder(self.folder)
+        ready = []
+        for path, key in current.items():
+            if self._seen.get(path) == key:
+                continue
+            if self._pending.get(path) == key:
+                del self._pending[path]
+                self._seen[path] = key
+                ready.append(path)
+            else:
+                self._pending[path] = key
+        for known in (self._seen, self._pending):
+            for path in [p for p in known if p not in current]:
+                del known[path]
+        return sorted(ready)
+
+
+@dataclass
+class PreparedSheet:
+    """A sheet decoded and analysed ahead of time; the canvas adopts it as is."""
+    path: str
+    key: tuple[int, int]          # file_key at decode time
+    document: Document
+    overflow: OverflowDetector
+    duplicates: DuplicateDetector
+    content: ContentIndex
+    thumbnail: Image.Image | None
+
+
+def prepare_sheet(path: str, grid_config: GridConfig,
+                  cache: ThumbnailCache | None = None) -> PreparedSheet:
+    """Decode path and run the per-cell analyses the editor shows on load."""
+    key = file_key(path)
+    if key is None:
+        raise FileNotFoundError(path)
+    document = Document.open(path)
+    grid = GridManager(copy.deepcopy(grid_config))
+    overflow = OverflowDetector(grid)
+    overflow.results(document)
+    duplicates = DuplicateDetector(grid)
+    duplicates.hashes(document)
+    content = ContentIndex(grid)
+    content.update(document)
+    thumbnail = cache.thumbnail(path) if cache is not None else None
+    return PreparedSheet(path, key, document, overflow, duplicates, content, thumbnail)
+
+
+class SheetPreparer:
+    """prepare_sheet() in the preview thread pool, keeping the latest max_prepared
+    results until they are opened (take) or pushed out by newer sheets."""
+
+    def __init__(self, cache: ThumbnailCache | None = None, max_prepared: int = MAX_PREPARED):
+        self.cache = cache
+        self.max_prepared = max_prepared
+        self._futures: dict[Future, str] = {}
+        self._ready: OrderedDict[str, PreparedSheet] = OrderedDict()
+
+    @property
+    def busy(self) -> bool:
+        return bool(self._futures)
+
+    def submit(self, path: str, grid_config: GridConfig):
+        path = os.path.abspath(path)
+        fut = get_thumbnail_executor().submit(prepare_sheet, path, grid_config, self.cache)
+        self._futures[fut] = path
+
+    def poll(self) -> list[tuple[str, PreparedSheet | None]]:
+        """(path, sheet or None if unreadable) for each job finished since the last poll."""
+        results = []
+        for fut in [f for f in self._futures if f.done()]:
+            path = self._futures.pop(fut)
+            try:
+                sheet = fut.result()
+            except (OSError, ValueError):
+                sheet = None
+            if sheet is not None:
+                self._ready[path] = sheet
+                self._ready.move_to_end(path)
+                while len(self._ready) > self.max_prepared:
+                    self._ready.popitem(last=False)
+            results.append((path, sheet))
+        return results
+
+    def take(self, path: str) -> PreparedSheet | None:
+        """The prepared sheet for path if the file has not changed since; consumes it."""
+        self.poll()
+        sheet = self._ready.pop(os.path.abspath(path), None)
+        if sheet is None or file_key(sheet.path) != sheet.key:
+            return None
+        return sheet
+
+    def cancel(self):
+        for fut in self._futures:
+            fut.cancel()
+        self._futures.clear()
+        self._ready.clear()